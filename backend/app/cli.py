@@ -0,0 +1,145 @@
+"""
+Tareas de mantenimiento del backend.
+
+Uso (desde la raíz del proyecto):
+    python -m backend.app.cli backfill-identifiers
+    python -m backend.app.cli rebuild-rollups
+    python -m backend.app.cli export --format csv --output documentos.csv
+    python -m backend.app.cli archive --days 365
+    python -m backend.app.cli vacuum
+    python -m backend.app.cli startup-report
+"""
+import argparse
+import asyncio
+import sys
+from datetime import date
+
+from .db import init_db, schema_lock, vacuum_database, SessionLocal
+from .services.analytics import rebuild_quality_rollups
+from .services.export import EXPORT_FORMATS, iter_export, iter_flat_rows
+from .services.identifiers import backfill_identifiers
+from .services.retention import archive_old_documents
+
+
+def _cmd_backfill_identifiers(args: argparse.Namespace) -> None:
+    with SessionLocal() as db:
+        processed = backfill_identifiers(db, batch_size=args.batch_size)
+    print(f"Identificadores reconstruidos para {processed} documentos.")
+
+
+def _cmd_rebuild_rollups(args: argparse.Namespace) -> None:
+    with SessionLocal() as db:
+        processed = rebuild_quality_rollups(db)
+    print(f"Agregaciones de calidad regeneradas a partir de {processed} documentos.")
+
+
+def _cmd_export(args: argparse.Namespace) -> None:
+    with SessionLocal() as db:
+        rows = iter_flat_rows(
+            db,
+            doc_type=args.doc_type,
+            date_from=args.date_from,
+            date_to=args.date_to,
+            include_raw_text=args.include_raw_text,
+        )
+        chunks = iter_export(rows, args.format, include_raw_text=args.include_raw_text)
+
+        if args.output == "-":
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            return
+
+        with open(args.output, "wb") as fh:
+            for chunk in chunks:
+                fh.write(chunk)
+
+
+def _cmd_archive(args: argparse.Namespace) -> None:
+    with SessionLocal() as db:
+        archived = archive_old_documents(
+            db,
+            retention_days=args.days,
+            batch_size=args.batch_size,
+            max_batches=args.max_batches,
+        )
+    print(f"{archived} documentos archivados.")
+
+
+def _cmd_vacuum(args: argparse.Namespace) -> None:
+    vacuum_database()
+    print("Base de datos compactada (auto_vacuum=INCREMENTAL activado).")
+
+
+def _cmd_startup_report(args: argparse.Namespace) -> None:
+    # Se importa aquí para medir también los imports de la aplicación
+    from .main import app
+
+    async def run_lifespan():
+        async with app.router.lifespan_context(app):
+            pass
+
+    asyncio.run(run_lifespan())
+    print("Tiempos de arranque del backend:")
+    print(app.state.startup_report.format())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Tareas de mantenimiento del backend")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    backfill = subparsers.add_parser(
+        "backfill-identifiers",
+        help="Pobla la tabla de identificadores para los documentos existentes",
+    )
+    backfill.add_argument("--batch-size", type=int, default=500)
+    backfill.set_defaults(func=_cmd_backfill_identifiers)
+
+    rollups = subparsers.add_parser(
+        "rebuild-rollups",
+        help="Regenera desde cero las agregaciones diarias de calidad",
+    )
+    rollups.set_defaults(func=_cmd_rebuild_rollups)
+
+    export = subparsers.add_parser(
+        "export",
+        help="Exporta el historial en NDJSON, CSV o Parquet",
+    )
+    export.add_argument("--format", choices=EXPORT_FORMATS, default="ndjson")
+    export.add_argument("--output", default="-", help="Archivo de salida ('-' para stdout)")
+    export.add_argument("--doc-type", default=None)
+    export.add_argument("--date-from", type=date.fromisoformat, default=None)
+    export.add_argument("--date-to", type=date.fromisoformat, default=None)
+    export.add_argument("--include-raw-text", action="store_true")
+    export.set_defaults(func=_cmd_export)
+
+    archive = subparsers.add_parser(
+        "archive",
+        help="Mueve documentos antiguos a archivos comprimidos (política de retención)",
+    )
+    archive.add_argument("--days", type=int, default=None, help="Por defecto RETENTION_DAYS")
+    archive.add_argument("--batch-size", type=int, default=None)
+    archive.add_argument("--max-batches", type=int, default=None)
+    archive.set_defaults(func=_cmd_archive)
+
+    vacuum = subparsers.add_parser(
+        "vacuum",
+        help="Compacta la BD y activa el vaciado incremental (una vez, en BD creadas antes)",
+    )
+    vacuum.set_defaults(func=_cmd_vacuum)
+
+    startup = subparsers.add_parser(
+        "startup-report",
+        help="Ejecuta el arranque de la API (sin servir requests) y muestra el tiempo de cada fase",
+    )
+    startup.set_defaults(func=_cmd_startup_report)
+
+    args = parser.parse_args()
+
+    # Las tablas nuevas deben existir antes de ejecutar cualquier tarea
+    with schema_lock():
+        init_db()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
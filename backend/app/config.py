@@ -1,5 +1,5 @@
 from pathlib import Path
-from typing import Optional, List
+from typing import Dict, Optional, List
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -9,6 +9,51 @@ class Settings(BaseSettings):
     openai_api_key: str
     openai_model: str = "gpt-4o-mini"
 
+    # Ruteo de modelos: documentos cortos con texto digital van a OPENAI_MODEL (rápido y
+    # barato); escaneos y documentos largos, y los reintentos por mala calidad o JSON
+    # inválido, van a OPENAI_STRONG_MODEL
+    model_routing_enabled: bool = True
+    openai_strong_model: str = "gpt-4o"
+    routing_fast_max_pages: int = 3
+    routing_fast_max_chars: int = 8000
+    routing_escalation_min_quality: float = 0.6
+    # USD por millón de tokens: [entrada, salida]
+    model_prices_per_mtok: Dict[str, List[float]] = {
+        "gpt-4o-mini": [0.15, 0.60],
+        "gpt-4o": [2.50, 10.00],
+    }
+
+    # Documentos largos: el texto se divide en fragmentos solapados que se extraen en
+    # paralelo y se combinan campo por campo (map-reduce)
+    chunked_extraction_enabled: bool = True
+    chunked_min_chars: int = 30000
+    chunk_chars: int = 12000
+    chunk_overlap_chars: int = 800
+    chunked_max_parallel: int = 4
+
+    # Re-extracción por campo: si evaluate_quality marca pocos campos, se le piden solo
+    # esos al modelo fuerte (con un esquema mínimo) en lugar de re-procesar el documento
+    field_reextraction_enabled: bool = True
+    field_reextraction_max_fields: int = 5
+    # Imágenes originales guardadas por SHA-256 para re-extraer campos después
+    # (POST /documents/{id}/reextract); los PDFs reutilizan el raw_text guardado
+    source_cache_dir: Optional[str] = None
+    source_cache_max_mb: int = 200  # 0 desactiva la cache
+
+    # PDFs con varios documentos (POST /documents/bundle): límite de segmentos,
+    # extracciones en paralelo por paquete y resolución de las páginas escaneadas
+    bundle_max_segments: int = 20
+    bundle_max_parallel: int = 4
+    bundle_scan_dpi: int = 150
+    # Páginas escaneadas consecutivas que se envían juntas (como varias imágenes) por segmento
+    bundle_max_scan_pages: int = 10
+
+    # Imágenes casi duplicadas (re-escaneos, otra foto del mismo documento) por dHash:
+    # off, flag (se informa en near_duplicate) o reuse (se reutiliza la extracción previa
+    # sin llamar al modelo). Distancia de Hamming máxima entre hashes: 0 a 7
+    near_duplicate_mode: str = "flag"
+    near_duplicate_max_distance: int = 4
+
     # Tamaño máximo en MB
     max_file_size_mb: int = 20
 
@@ -27,6 +72,48 @@ class Settings(BaseSettings):
     #Base de datos 
     database_url: Optional[str] = None  
 
+    # SQLite con varios workers: espera por el lock de escritura y reintentos del commit
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_write_retries: int = 5
+
+    # Persistencia write-behind: un único escritor agrupa inserts en group commits
+    write_behind_enabled: bool = False
+    write_behind_max_batch: int = 50
+    write_behind_max_latency_ms: int = 25
+
+    # Control de admisión de /documents/process: extracciones en curso, memoria
+    # retenida y cola acotada con reparto justo por cliente. Los límites son del
+    # servicio completo: cada worker aplica su parte (límite / WEB_CONCURRENCY, mínimo 1),
+    # y el reparto por turnos es entre los clientes que atiende cada worker
+    admission_enabled: bool = True
+    admission_max_in_flight: int = 16
+    admission_max_buffered_mb: int = 200
+    admission_max_queue: int = 64
+    admission_max_queue_per_client: int = 8
+    admission_queue_timeout_s: float = 30.0
+    # Header que identifica al cliente (si no viene, se usa la IP)
+    admission_client_header: str = "x-api-key"
+    # Workers de uvicorn (la misma variable que lee uvicorn para --workers)
+    web_concurrency: int = 1
+
+    # Arranque: precargar cliente del modelo, PyMuPDF y conexión a la BD
+    # (desactivar en pruebas para arrancar más rápido)
+    startup_warmup: bool = True
+
+    # Trazas por request (OpenTelemetry): none, file (JSON por línea) u otlp (colector local)
+    tracing_exporter: str = "none"
+    tracing_file: Optional[str] = None
+    tracing_otlp_endpoint: str = "http://localhost:4318/v1/traces"
+    # Muestreo por cabeza: fracción de requests que se trazan
+    tracing_sample_ratio: float = 0.05
+
+    # Retención: documentos con más de N días se mueven a archivos comprimidos
+    retention_days: int = 365
+    archive_dir: Optional[str] = None
+    archive_batch_size: int = 200
+    # Páginas libres (4 KiB) que se devuelven al sistema después de cada lote archivado
+    archive_vacuum_pages: int = 2000
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
@@ -46,5 +133,32 @@ class Settings(BaseSettings):
         db_path.parent.mkdir(parents=True, exist_ok=True)
         return f"sqlite:///{db_path}"
 
+    @property
+    def tracing_file_path(self) -> Path:
+        """
+        Por defecto las trazas se escriben en ./data/traces.jsonl
+        """
+        if self.tracing_file:
+            return Path(self.tracing_file)
+        return Path(__file__).resolve().parents[2] / "data" / "traces.jsonl"
+
+    @property
+    def archive_root(self) -> Path:
+        """
+        Por defecto los archivos de archivo histórico van en ./data/archive
+        """
+        if self.archive_dir:
+            return Path(self.archive_dir)
+        return Path(__file__).resolve().parents[2] / "data" / "archive"
+
+    @property
+    def source_cache_root(self) -> Path:
+        """
+        Por defecto las imágenes originales se guardan en ./data/sources
+        """
+        if self.source_cache_dir:
+            return Path(self.source_cache_dir)
+        return Path(__file__).resolve().parents[2] / "data" / "sources"
+
 
 settings = Settings()
@@ -1,4 +1,9 @@
-from sqlalchemy import create_engine
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 from .config import settings
@@ -10,9 +15,117 @@ if DATABASE_URL.startswith("sqlite"):
         DATABASE_URL,
         connect_args={"check_same_thread": False},  # requerido por SQLite en hilos
     )
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        # WAL: las lecturas (historial, búsqueda) no se bloquean mientras se escribe
+        cursor = dbapi_connection.cursor()
+        # Las páginas que libera el archivado se devuelven al sistema con
+        # incremental_vacuum (solo aplica a BD nuevas; las existentes, con `cli vacuum`)
+        cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        cursor.execute("PRAGMA journal_mode=WAL")
+        # Con varios workers los commits compiten por el lock de escritura:
+        # SQLite espera hasta busy_timeout antes de fallar con "database is locked"
+        cursor.execute(f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}")
+        cursor.close()
 else:
     engine = create_engine(DATABASE_URL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
+
+
+def _add_missing_columns() -> None:
+    """
+    create_all no altera tablas existentes: agrega las columnas nuevas (nullable)
+    y sus índices cuando faltan en bases de datos creadas con versiones anteriores.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                col_type = column.type.compile(dialect=engine.dialect)
+                conn.exec_driver_sql(
+                    f"ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}"
+                )
+
+            existing_indexes = {i["name"] for i in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(conn)
+
+
+def init_db() -> None:
+    """Crea las tablas que no existan y completa las columnas nuevas."""
+    from . import models  # noqa: F401  (registra los modelos en Base.metadata)
+
+    Base.metadata.create_all(bind=engine)
+    _add_missing_columns()
+
+
+def reclaim_free_pages(max_pages: int) -> int:
+    """
+    Devuelve al sistema hasta `max_pages` páginas libres (BD con auto_vacuum=INCREMENTAL).
+    Devuelve cuántas páginas libres había; no hace nada fuera de SQLite.
+    """
+    if not DATABASE_URL.startswith("sqlite") or max_pages <= 0:
+        return 0
+    with engine.connect() as conn:
+        free_pages = conn.exec_driver_sql("PRAGMA freelist_count").scalar() or 0
+        if free_pages:
+            # El pragma libera una página por paso y sqlite3 solo da un paso en execute();
+            # executescript lo ejecuta hasta el final
+            conn.connection.driver_connection.executescript(
+                f"PRAGMA incremental_vacuum({int(max_pages)});"
+            )
+    return free_pages
+
+
+def vacuum_database() -> None:
+    """
+    VACUUM completo que además activa auto_vacuum=INCREMENTAL en BD creadas antes
+    de que existiera (el modo solo cambia al reconstruir el archivo).
+    """
+    if not DATABASE_URL.startswith("sqlite"):
+        return
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.exec_driver_sql("VACUUM")
+
+
+def is_database_locked(exc: BaseException) -> bool:
+    """True si el error es SQLite sin poder tomar el lock de escritura a tiempo."""
+    return isinstance(exc, OperationalError) and "database is locked" in str(exc.orig)
+
+
+@contextmanager
+def schema_lock() -> Iterator[None]:
+    """
+    Serializa la creación del esquema entre procesos: con `uvicorn --workers N`
+    todos los workers ejecutan el arranque a la vez y competirían por crear las
+    mismas tablas. Usa un lock de archivo junto a la BD SQLite; en otros motores
+    (o sin fcntl) no hace nada.
+    """
+    database = engine.url.database if engine.dialect.name == "sqlite" else None
+    try:
+        import fcntl
+    except ImportError:
+        fcntl = None
+
+    if not database or database == ":memory:" or fcntl is None:
+        yield
+        return
+
+    lock_path = Path(database).with_name(Path(database).name + ".lock")
+    with open(lock_path, "a") as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
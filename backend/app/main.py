@@ -1,17 +1,111 @@
-import json
+import time
 
-from fastapi import FastAPI, UploadFile, File, HTTPException, Depends
+_IMPORT_STARTED = time.perf_counter()
+
+import asyncio
+import hashlib
+import mimetypes
+import re
+from contextlib import asynccontextmanager, nullcontext
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from .security.files import validate_uploaded_file
-from .services.pdf_reader import extract_text_from_pdf
-from .services.openai_client import classify_and_extract
+from .services.pdf_reader import extract_text_from_pdf, inspect_scanned_pages, render_pdf_pages
+from .services.segmentation import Segment, segment_pages
+from .services.openai_client import classify_and_extract, extract_fields
+from .services.model_routing import RoutedExtraction
+from .services.field_reextraction import fields_to_reextract
 from .services.validation import evaluate_quality
-from .schemas.documents import ExtractedDocument
-from .schemas.history import DocumentHistoryItem
-from .db import Base, engine, SessionLocal
-from .models import DocumentRecord
+from .services.persistence import save_bundle, save_document, update_document
+from .services.source_cache import load_source, store_source
+from .services.image_hash import MAX_INDEXED_DISTANCE, dhash, find_near_duplicate
+from .services.write_behind import DocumentWriter, WriterUnavailableError
+from .services.admission import AdmissionController, client_key, request_cost
+from .services.analytics import get_quality_analytics
+from .services.archive_store import load_payload
+from .services.http_cache import make_etag, not_modified_or_tag
+from .services.responses import json_response, parse_projection
+from .services.metrics import (
+    DocumentMetrics,
+    mark_worker_stopped,
+    record_cache_lookup,
+    render_metrics,
+    track_document,
+)
+from .services.tracing import setup_tracing, shutdown_tracing, start_request_span, start_span
+from .services.export import EXPORT_FORMATS, MEDIA_TYPES, iter_export, iter_flat_rows
+from .services.identifiers import find_documents_by_identifier
+from .services.search import ensure_search_index, is_search_supported, search_documents
+from .schemas.analytics import QualityRollupItem
+from .schemas.documents import BundleResult, DocumentSegment, ExtractedDocument, NearDuplicate
+from .schemas.history import DocumentHistoryItem, DocumentSummaryItem, UploadItem
+from .schemas.search import DocumentSearchHit
+from .config import settings
+from .db import engine, init_db, schema_lock, SessionLocal
+from .models import DocumentRecord, UploadRecord
+from .startup import StartupReport, run_warmup
+
+
+# Escritor write-behind (opcional, WRITE_BEHIND_ENABLED=true)
+document_writer: Optional[DocumentWriter] = None
+
+# Control de admisión de /documents/process (ADMISSION_ENABLED, activo por defecto)
+admission_controller: Optional[AdmissionController] = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Arranque explícito, fase por fase: esquema de la BD, índice de búsqueda,
+    warm-up (conexión, cliente del modelo, PyMuPDF) y escritor write-behind.
+    Los tiempos quedan en el log y en /health/startup.
+    """
+    global document_writer, admission_controller
+
+    report = StartupReport()
+    report.add("imports", (_APP_CREATED - _IMPORT_STARTED) * 1000)
+
+    with report.phase("tracing"):
+        setup_tracing()
+    # Con varios workers, solo uno a la vez crea o migra el esquema
+    with schema_lock():
+        with report.phase("init_db"):
+            init_db()
+        with report.phase("search_index"):
+            ensure_search_index(engine)
+    if settings.startup_warmup:
+        await run_in_threadpool(run_warmup, report)
+    if settings.write_behind_enabled:
+        with report.phase("write_behind"):
+            document_writer = DocumentWriter(
+                SessionLocal,
+                max_batch=settings.write_behind_max_batch,
+                max_latency_ms=settings.write_behind_max_latency_ms,
+            )
+            await document_writer.start()
+    if settings.admission_enabled:
+        admission_controller = AdmissionController.from_settings()
+
+    app.state.startup_report = report
+    report.log()
+
+    yield
+
+    # Vacía la cola de persistencia y los spans pendientes antes de terminar
+    if document_writer is not None:
+        await document_writer.stop()
+        document_writer = None
+    shutdown_tracing()
+    mark_worker_stopped()
 
 
 app = FastAPI(
@@ -22,8 +116,11 @@ app = FastAPI(
         "extraer campos clave usando OpenAI, evaluar calidad de datos y "
         "persistir resultados para consulta posterior."
     ),
+    lifespan=lifespan,
 )
 
+_APP_CREATED = time.perf_counter()
+
 # CORS abierto para desarrollo
 app.add_middleware(
     CORSMiddleware,
@@ -33,6 +130,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compresión de respuestas grandes (historial, payloads con raw_text)
+app.add_middleware(GZipMiddleware, minimum_size=1000)
+
 def get_db():
     db = SessionLocal()
     try:
@@ -41,12 +141,23 @@ def get_db():
         db.close()
 
 
-# Eventos de aplicación 
+def _to_history_item(record: DocumentRecord) -> DocumentHistoryItem:
+    # Si el documento fue archivado, el payload se lee del archivo histórico
+    payload = load_payload(record)
+
+    return DocumentHistoryItem(
+        id=record.id,
+        filename=record.filename,
+        doc_type=record.doc_type,
+        quality_score=record.quality_score,
+        created_at=record.created_at,
+        updated_at=record.updated_at,
+        upload_id=record.upload_id,
+        page_from=record.page_from,
+        page_to=record.page_to,
+        payload=payload,
+    )
 
-@app.on_event("startup")
-def on_startup():
-    """Crea las tablas si no existen."""
-    Base.metadata.create_all(bind=engine)
 
 # Endpoints
 
@@ -55,21 +166,216 @@ def health_check():
     return {"status": "ok"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics_endpoint():
+    """Métricas en formato Prometheus (latencia por etapa, errores del LLM, caches)."""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
+@app.get("/health/startup")
+def startup_report(request: Request):
+    """Duración de cada fase del arranque de este proceso (ms)."""
+    report: Optional[StartupReport] = getattr(request.app.state, "startup_report", None)
+    if report is None:
+        raise HTTPException(status_code=503, detail="El arranque aún no terminó")
+    return report.as_dict()
+
+
 @app.post("/documents/process", response_model=ExtractedDocument)
 async def process_document(
+    request: Request,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    fields: Optional[str] = None,
+    exclude: Optional[str] = None,
 ):
+    """
+    Clasifica el documento, extrae sus campos y guarda el resultado.
+    `fields` / `exclude` (lista separada por comas, admite "seccion.campo") limitan
+    la respuesta, por ejemplo `exclude=raw_text`; lo guardado siempre es completo.
+    """
+    # Validar la proyección antes de hacer trabajo costoso
+    include_fields = parse_projection(fields, ExtractedDocument)
+    exclude_fields = parse_projection(exclude, ExtractedDocument)
+
+    root_attributes = {"file.name": file.filename or "", "file.content_type": file.content_type or ""}
+    with start_request_span("process_document", request.headers, root_attributes) as root_span:
+        async with _admission(request, file.size, file.content_type), track_document(file.content_type) as metrics:
+            file_bytes, content_sha256 = await _read_upload(file, metrics)
+
+            # Imágenes: hash perceptual y búsqueda de re-escaneos del mismo documento
+            image_hash = None
+            match = None
+            if file.content_type in IMAGE_TYPES:
+                with metrics.stage("image_hash"), start_span("image_hash") as span:
+                    image_hash = await run_in_threadpool(_fingerprint_image, content_sha256, file_bytes)
+                    if image_hash:
+                        match = await run_in_threadpool(_lookup_near_duplicate, image_hash)
+                    span.set_attribute("image.near_duplicate", match is not None)
+
+            if match is not None and match[1] is not None:
+                # Casi duplicado y NEAR_DUPLICATE_MODE=reuse: sin llamada al modelo
+                near_duplicate, extracted_with_quality = match
+            else:
+                extracted, routed = await _extract_document(file, file_bytes, metrics)
+                root_span.set_attribute("document.type", extracted.doc_type.value)
+                extracted_with_quality = await _refine_extraction(extracted, routed, metrics)
+                root_span.set_attribute("llm.tier", routed.tier)
+                near_duplicate = match[0] if match is not None else None
+            extracted_with_quality.near_duplicate = near_duplicate
+            metrics.doc_type = extracted_with_quality.doc_type.value
+
+            # Persistir en BD (incluye los índices derivados)
+            with metrics.stage("persist"), start_span("persist") as span:
+                written = False
+                if document_writer is not None:
+                    try:
+                        await document_writer.submit(
+                            file.filename, extracted_with_quality, content_sha256, image_hash
+                        )
+                        written = True
+                    except WriterUnavailableError:
+                        # El escritor no está activo: el documento se guarda directamente
+                        pass
+                span.set_attribute("persist.write_behind", written)
+                if not written:
+                    await run_in_threadpool(
+                        _persist_document, file.filename, extracted_with_quality, content_sha256, image_hash
+                    )
+
+            # Respuesta
+            with metrics.stage("serialize"), start_span("serialize") as span:
+                response = json_response(request, extracted_with_quality, include_fields, exclude_fields)
+                span.set_attribute("response.bytes", len(response.body))
+                return response
+
 
-    # Validar archivo
-    file_bytes = await validate_uploaded_file(file)
+def _admission(request: Request, size: Optional[int], content_type: Optional[str]):
+    """Sin capacidad (extracciones en curso, memoria, cola por cliente) se responde 429."""
+    if admission_controller is None:
+        return nullcontext()
+    cost = request_cost(size, content_type)
+    return admission_controller.admit(client_key(request), cost)
 
+
+async def _refine_extraction(
+    extracted: ExtractedDocument,
+    routed: RoutedExtraction,
+    metrics: DocumentMetrics,
+) -> ExtractedDocument:
+    """Evalúa la calidad y, si hace falta, escala al modelo fuerte o re-extrae campos puntuales."""
+    extracted_with_quality = _evaluate_quality(extracted, metrics)
+
+    # Si el modelo rápido dio un resultado pobre, se re-procesa con el fuerte
+    reason = routed.escalation_reason(extracted_with_quality)
+    if reason:
+        extracted = await _call_model(metrics, "llm_escalation", routed.escalate, reason)
+        extracted_with_quality = _evaluate_quality(extracted, metrics)
+
+    # Pocos campos con observaciones: se piden solo esos, sin re-procesar todo
+    # (no en documentos por fragmentos: la llamada llevaría el texto completo)
+    paths = fields_to_reextract(extracted_with_quality)
+    if (
+        settings.field_reextraction_enabled
+        and not routed.chunked
+        and 0 < len(paths) <= settings.field_reextraction_max_fields
+    ):
+        extracted = await _call_model(
+            metrics, "llm_fields", routed.reextract_fields, extracted_with_quality, paths
+        )
+        extracted_with_quality = _evaluate_quality(extracted, metrics)
+
+    routed.record_served()
+    return extracted_with_quality
+
+
+def _persist_document(
+    filename: str,
+    extracted: ExtractedDocument,
+    content_sha256: str,
+    image_hash: Optional[str] = None,
+) -> int:
+    """
+    Escritura directa en una sesión propia y fuera del event loop: el commit puede
+    esperar el lock de SQLite (otro worker escribiendo) y la conexión vuelve al
+    pool apenas termina, no al final del request.
+    """
+    with SessionLocal() as db:
+        return save_document(db, filename, extracted, content_sha256, image_hash).id
+
+
+IMAGE_TYPES = ("image/jpeg", "image/png")
+
+
+def _fingerprint_image(content_sha256: str, file_bytes: bytes) -> Optional[str]:
+    """Guarda la imagen en la cache de fuentes y devuelve su dHash (None si está desactivado)."""
+    # La imagen no queda en el payload: se guarda para re-extraer campos después
+    store_source(content_sha256, file_bytes)
+    if settings.near_duplicate_mode == "off":
+        return None
+    return dhash(file_bytes)
+
+
+def _lookup_near_duplicate(image_hash: str) -> Optional[Tuple[NearDuplicate, Optional[ExtractedDocument]]]:
+    """
+    Documento previo con una imagen casi idéntica. Con NEAR_DUPLICATE_MODE=reuse devuelve
+    también su extracción (copiada, con near_duplicate.reused=True) para no llamar al modelo.
+    """
+    max_distance = min(settings.near_duplicate_max_distance, MAX_INDEXED_DISTANCE)
+    with SessionLocal() as db:
+        found = find_near_duplicate(db, image_hash, max_distance)
+        record_cache_lookup("near_duplicate", found is not None)
+        if found is None:
+            return None
+
+        record, distance = found
+        previous = None
+        if settings.near_duplicate_mode == "reuse":
+            try:
+                previous = ExtractedDocument.model_validate(load_payload(record))
+            except ValueError:
+                previous = None  # payload ilegible: se extrae de nuevo
+
+    return NearDuplicate(document_id=record.id, distance=distance, reused=previous is not None), previous
+
+
+def _evaluate_quality(extracted: ExtractedDocument, metrics: DocumentMetrics) -> ExtractedDocument:
+    with metrics.stage("quality"), start_span("validate_quality") as span:
+        extracted_with_quality = evaluate_quality(extracted)
+        span.set_attribute("document.quality_score", extracted_with_quality.quality_score)
+        span.set_attribute("document.issues", len(extracted_with_quality.issues))
+    return extracted_with_quality
+
+
+async def _call_model(metrics: DocumentMetrics, stage: str, func, *args) -> ExtractedDocument:
+    """Llama al modelo en el threadpool (no bloquea otros requests); si falla, 502."""
+    try:
+        with metrics.stage(stage), start_span("extract"):
+            return await run_in_threadpool(func, *args)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=502,
+            detail=f"Error al interpretar la respuesta del modelo: {exc}",
+        ) from exc
+
+
+async def _extract_document(
+    file: UploadFile,
+    file_bytes: bytes,
+    metrics: DocumentMetrics,
+) -> Tuple[ExtractedDocument, RoutedExtraction]:
+    """Obtiene el texto (PDF) o la imagen del archivo y llama al modelo elegido por el ruteo."""
     raw_text = None
     image_bytes = None
+    page_count = 1
 
     # Lógica según tipo MIME
     if file.content_type == "application/pdf":
-        pdf_data = extract_text_from_pdf(file_bytes)
+        with metrics.stage("pdf_text"), start_span("parse_pdf") as span:
+            pdf_data = await run_in_threadpool(extract_text_from_pdf, file_bytes)
+            span.set_attribute("pdf.pages", len(pdf_data["pages"]))
+            span.set_attribute("pdf.text_chars", len(pdf_data["full_text"]))
+        page_count = len(pdf_data["pages"])
         if pdf_data["has_text"]:
             raw_text = pdf_data["full_text"]
         else:
@@ -80,7 +386,7 @@ async def process_document(
                     "PDFs escaneados sin texto (solo PDFs digitales e imágenes)."
                 ),
             )
-    elif file.content_type in ("image/jpeg", "image/png"):
+    elif file.content_type in IMAGE_TYPES:
         image_bytes = file_bytes
     else:
         raise HTTPException(
@@ -88,45 +394,186 @@ async def process_document(
             detail="Tipo de archivo no soportado. Use PDF, JPG o PNG.",
         )
 
-    # Llamar a OpenAI
-    try:
-        extracted = classify_and_extract(raw_text=raw_text, image_bytes=image_bytes)
-    except ValueError as exc:
-        raise HTTPException(
-            status_code=502,
-            detail=f"Error al interpretar la respuesta del modelo: {exc}",
-        ) from exc
+    # Llamar a OpenAI con el modelo que corresponde al documento
+    routed = RoutedExtraction(
+        classify_and_extract, raw_text, image_bytes, page_count, extract_fields=extract_fields
+    )
+    extracted = await _call_model(metrics, "llm", routed.run)
+    metrics.doc_type = extracted.doc_type.value
 
-    # Evaluación de calidad
-    extracted_with_quality = evaluate_quality(extracted)
+    return extracted, routed
 
-    # Persistir en BD
-    record = DocumentRecord(
-        filename=file.filename,
-        doc_type=extracted_with_quality.doc_type.value,
-        quality_score=extracted_with_quality.quality_score,
-        payload_json=extracted_with_quality.model_dump_json(),
-    )
-    db.add(record)
-    db.commit()
-    db.refresh(record)
 
-    # Respuesta
-    return extracted_with_quality
+async def _read_upload(file: UploadFile, metrics: DocumentMetrics) -> Tuple[bytes, str]:
+    """Valida el archivo (tamaño, extensión, tipo) y calcula su SHA-256."""
+    with metrics.stage("validate"), start_span("validate") as span:
+        file_bytes = await validate_uploaded_file(file)
+        content_sha256 = hashlib.sha256(file_bytes).hexdigest()
+        span.set_attribute("file.bytes", len(file_bytes))
+    return file_bytes, content_sha256
+
+
+@app.post("/documents/bundle", response_model=BundleResult)
+async def process_bundle(request: Request, file: UploadFile = File(...)):
+    """
+    PDF con varios documentos (ej. cédula escaneada + póliza + contrato).
+    Se segmenta por rasgos baratos de cada página (texto, palabras clave, "página 1 de N"),
+    cada segmento se extrae en paralelo con su propio ruteo de modelo y se guarda
+    como un documento propio enlazado al upload. Las páginas escaneadas se envían
+    como imagen. Un segmento que falla se informa en `error` sin perder los demás.
+    """
+    if file.content_type != "application/pdf":
+        raise HTTPException(status_code=400, detail="Solo se pueden segmentar archivos PDF.")
+
+    root_attributes = {"file.name": file.filename or "", "file.content_type": file.content_type}
+    with start_request_span("process_bundle", request.headers, root_attributes) as root_span:
+        async with _admission(request, file.size, file.content_type), track_document(file.content_type) as metrics:
+            file_bytes, content_sha256 = await _read_upload(file, metrics)
+
+            with metrics.stage("pdf_text"), start_span("parse_pdf") as span:
+                pdf_data = await run_in_threadpool(extract_text_from_pdf, file_bytes)
+                span.set_attribute("pdf.pages", len(pdf_data["pages"]))
+            pages = pdf_data["pages"]
+
+            with metrics.stage("segment"), start_span("segment") as span:
+                # Páginas sin texto: tamaño de hoja y hojas en blanco (que no se extraen)
+                scanned = [number for number, text in enumerate(pages, start=1) if not text.strip()]
+                scans = await run_in_threadpool(inspect_scanned_pages, file_bytes, scanned) if scanned else {}
+                blank_pages = [number for number, info in scans.items() if info["blank"]]
+                segments = segment_pages(pages, scans, settings.bundle_max_scan_pages)
+                span.set_attribute("bundle.segments", len(segments))
+                span.set_attribute("bundle.blank_pages", len(blank_pages))
+            if not segments:
+                raise HTTPException(status_code=400, detail="El PDF no tiene páginas con contenido.")
+            if len(segments) > settings.bundle_max_segments:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"El PDF tiene {len(segments)} documentos; el máximo es {settings.bundle_max_segments}.",
+                )
+            root_span.set_attribute("bundle.segments", len(segments))
+
+            # Extracción en paralelo, acotada por paquete
+            semaphore = asyncio.Semaphore(settings.bundle_max_parallel)
+            results = await asyncio.gather(
+                *(_extract_segment(file_bytes, pages, segment, semaphore, metrics) for segment in segments),
+                return_exceptions=True,
+            )
+
+            extracted_segments = []
+            items: List[DocumentSegment] = []
+            for segment, result in zip(segments, results):
+                item = DocumentSegment(page_from=segment.page_from, page_to=segment.page_to)
+                if isinstance(result, HTTPException):
+                    item.error = result.detail
+                elif isinstance(result, BaseException):
+                    raise result
+                else:
+                    item.document = result
+                    extracted_segments.append((result, segment.page_from, segment.page_to))
+                items.append(item)
+            if not extracted_segments:
+                raise HTTPException(status_code=502, detail="No se pudo extraer ningún documento del PDF.")
+            metrics.doc_type = "BUNDLE"
+
+            with metrics.stage("persist"), start_span("persist"):
+                upload_id, document_ids = await run_in_threadpool(
+                    _persist_bundle, file.filename, content_sha256, len(pages), extracted_segments
+                )
+            ids = iter(document_ids)
+            for item in items:
+                if item.document is not None:
+                    item.document_id = next(ids)
+
+            return BundleResult(
+                upload_id=upload_id,
+                filename=file.filename,
+                page_count=len(pages),
+                segments=items,
+                blank_pages=blank_pages,
+            )
+
+
+async def _extract_segment(
+    file_bytes: bytes,
+    pages: List[str],
+    segment: Segment,
+    semaphore: asyncio.Semaphore,
+    metrics: DocumentMetrics,
+) -> ExtractedDocument:
+    """Texto (o imágenes, si las páginas son escaneadas) del segmento -> modelo -> calidad."""
+    async with semaphore:
+        span_attributes = {"segment.page_from": segment.page_from, "segment.page_to": segment.page_to}
+        with start_span("segment_extract", span_attributes):
+            raw_text = None
+            image_bytes = None
+            if segment.is_scan:
+                with metrics.stage("pdf_render"):
+                    image_bytes = await run_in_threadpool(
+                        render_pdf_pages, file_bytes, segment.scan_pages, settings.bundle_scan_dpi
+                    )
+            else:
+                raw_text = segment.text(pages)
+
+            routed = RoutedExtraction(
+                classify_and_extract, raw_text, image_bytes, segment.page_count, extract_fields=extract_fields
+            )
+            extracted = await _call_model(metrics, "llm", routed.run)
+            return await _refine_extraction(extracted, routed, metrics)
+
+
+def _persist_bundle(filename: str, content_sha256: str, page_count: int, segments) -> Tuple[int, List[int]]:
+    """Igual que _persist_document: sesión propia y fuera del event loop."""
+    with SessionLocal() as db:
+        return save_bundle(db, filename, content_sha256, page_count, segments)
+
+
+@app.get("/uploads/{upload_id}", response_model=UploadItem)
+def get_upload(upload_id: int, db: Session = Depends(get_db)):
+    """PDF paquete y los documentos extraídos de él, en orden de páginas."""
+    upload = db.get(UploadRecord, upload_id)
+    if upload is None:
+        raise HTTPException(status_code=404, detail="Upload no encontrado")
+
+    records = (
+        db.query(DocumentRecord)
+        .filter(DocumentRecord.upload_id == upload_id)
+        .order_by(DocumentRecord.page_from, DocumentRecord.id)
+        .all()
+    )
+    return UploadItem(
+        id=upload.id,
+        filename=upload.filename,
+        content_sha256=upload.content_sha256,
+        page_count=upload.page_count,
+        created_at=upload.created_at,
+        documents=[_to_history_item(r) for r in records],
+    )
 
 
 @app.get("/documents/history", response_model=list[DocumentHistoryItem])
 def list_documents_history(
+    request: Request,
+    response: Response,
     limit: int = 20,
     db: Session = Depends(get_db),
 ):
     """
     Historial de documentos procesados más recientes.
     Incluye el JSON completo (`payload`) para poder reconstruir el panel.
+    Responde 304 si el cliente envía If-None-Match con el ETag vigente
+    (derivado del último id registrado, de la última modificación y de los filtros).
     """
     if limit < 1 or limit > 100:
         limit = 20
 
+    latest_id, latest_update = db.query(
+        func.max(DocumentRecord.id), func.max(DocumentRecord.updated_at)
+    ).one()
+    etag = make_etag("history", latest_id or 0, latest_update, limit)
+    not_modified = not_modified_or_tag(request, response, etag)
+    if not_modified is not None:
+        return not_modified
+
     records = (
         db.query(DocumentRecord)
         .order_by(DocumentRecord.created_at.desc())
@@ -134,24 +581,329 @@ def list_documents_history(
         .all()
     )
 
-    items: list[DocumentHistoryItem] = []
+    return [_to_history_item(r) for r in records]
+
+
+@app.get("/documents/history/summary", response_model=list[DocumentSummaryItem])
+def list_documents_summary(
+    request: Request,
+    response: Response,
+    limit: int = 200,
+    offset: int = 0,
+    doc_type: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Historial liviano (sin payload) para listados paginados, opcionalmente de un
+    solo tipo. El total de documentos (con el filtro) va en el header X-Total-Count.
+    El detalle de cada documento se obtiene aparte con /documents/{id}.
+    """
+    if limit < 1 or limit > 1000:
+        limit = 200
+    offset = max(offset, 0)
+
+    filters = [DocumentRecord.doc_type == doc_type] if doc_type else []
+    latest_id, latest_update, total = (
+        db.query(
+            func.max(DocumentRecord.id), func.max(DocumentRecord.updated_at), func.count(DocumentRecord.id)
+        )
+        .filter(*filters)
+        .one()
+    )
+    etag = make_etag("summary", latest_id or 0, latest_update, total, limit, offset, doc_type)
+    not_modified = not_modified_or_tag(request, response, etag)
+    if not_modified is not None:
+        return not_modified
+    response.headers["X-Total-Count"] = str(total)
+
+    # Solo columnas livianas: payload_json no se lee de la BD
+    rows = (
+        db.query(
+            DocumentRecord.id,
+            DocumentRecord.filename,
+            DocumentRecord.doc_type,
+            DocumentRecord.quality_score,
+            DocumentRecord.created_at,
+            DocumentRecord.updated_at,
+        )
+        .filter(*filters)
+        .order_by(DocumentRecord.created_at.desc(), DocumentRecord.id.desc())
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
+
+    return [DocumentSummaryItem(**row._mapping) for row in rows]
+
+
+@app.get("/documents/search", response_model=list[DocumentSearchHit])
+def search_documents_endpoint(
+    q: str,
+    doc_type: Optional[str] = None,
+    limit: int = 20,
+    db: Session = Depends(get_db),
+):
+    """
+    Búsqueda de texto completo sobre el texto extraído y los campos clave
+    (nombres, identificaciones, objeto del contrato, coberturas).
+    Resultados ordenados por relevancia, con fragmento resaltado.
+    """
+    if not is_search_supported(engine):
+        raise HTTPException(
+            status_code=501,
+            detail="La búsqueda de texto completo solo está disponible con SQLite.",
+        )
+
+    if limit < 1 or limit > 100:
+        limit = 20
+
+    hits = search_documents(db, q, doc_type=doc_type, limit=limit)
+    return [DocumentSearchHit(**hit) for hit in hits]
+
+
+@app.get("/documents/by-identifier/{value}", response_model=list[DocumentHistoryItem])
+def list_documents_by_identifier(
+    value: str,
+    limit: int = 100,
+    db: Session = Depends(get_db),
+):
+    """
+    Todos los documentos que contienen una identificación (cédula, NIT o número de póliza).
+    El valor se normaliza igual que al indexar: "1.098.765.432" equivale a "1098765432".
+    """
+    if limit < 1 or limit > 500:
+        limit = 100
+
+    records = find_documents_by_identifier(db, value, limit=limit)
+    return [_to_history_item(r) for r in records]
+
+
+_SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+def _find_by_hash(db: Session, sha256: str) -> Optional[DocumentRecord]:
+    """Último documento registrado para el contenido con ese SHA-256."""
+    sha256 = sha256.lower()
+    if not _SHA256_RE.match(sha256):
+        raise HTTPException(status_code=400, detail="El hash debe ser un SHA-256 en hexadecimal.")
+
+    return (
+        db.query(DocumentRecord)
+        .filter(DocumentRecord.content_sha256 == sha256)
+        .order_by(DocumentRecord.id.desc())
+        .first()
+    )
+
+
+@app.head("/documents/by-hash/{sha256}")
+def head_document_by_hash(sha256: str, db: Session = Depends(get_db)):
+    """
+    Consulta previa a la carga: 200 (con X-Document-Id) si el archivo ya fue procesado,
+    404 si no. El cliente calcula el SHA-256 localmente y evita reenviar el archivo.
+    """
+    record = _find_by_hash(db, sha256)
+    record_cache_lookup("content_hash", record is not None)
+    if record is None:
+        return Response(status_code=404)
+    return Response(status_code=200, headers={"X-Document-Id": str(record.id)})
+
+
+@app.get("/documents/by-hash/{sha256}", response_model=DocumentHistoryItem)
+def get_document_by_hash(sha256: str, response: Response, db: Session = Depends(get_db)):
+    """Resultado ya registrado para el contenido con ese SHA-256."""
+    record = _find_by_hash(db, sha256)
+    if record is None:
+        raise HTTPException(status_code=404, detail="No hay documentos con ese hash")
+
+    response.headers["X-Document-Id"] = str(record.id)
+    return _to_history_item(record)
 
-    for r in records:
-        payload: dict
+
+@app.get("/analytics/quality", response_model=list[QualityRollupItem])
+def quality_analytics(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    doc_type: Optional[str] = None,
+    top_issues: int = 5,
+    db: Session = Depends(get_db),
+):
+    """
+    Conteo de documentos, quality_score promedio y campos con más observaciones
+    por día y tipo de documento. Por defecto, los últimos 30 días.
+    Lee solo las tablas de agregación, que se mantienen en cada insert.
+    """
+    if date_from is None and date_to is None:
+        date_from = datetime.now(timezone.utc).date() - timedelta(days=30)
+    if top_issues < 0 or top_issues > 50:
+        top_issues = 5
+
+    return get_quality_analytics(
+        db,
+        date_from=date_from,
+        date_to=date_to,
+        doc_type=doc_type,
+        top_issues=top_issues,
+    )
+
+
+@app.get("/documents/export")
+def export_documents(
+    format: str = "ndjson",
+    doc_type: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    include_raw_text: bool = False,
+):
+    """
+    Exportación completa del historial en NDJSON, CSV o Parquet.
+    Las secciones cedula / acta_seguro / contrato se aplanan en columnas tipadas.
+    Se transmite por chunks leyendo la BD con un cursor, sin cargar todo en memoria.
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Formato no soportado. Use uno de: {', '.join(EXPORT_FORMATS)}.",
+        )
+
+    def stream():
+        # La sesión vive mientras dura la respuesta, no la dependencia del request
+        db = SessionLocal()
         try:
-            payload = json.loads(r.payload_json) if r.payload_json else {}
-        except json.JSONDecodeError:
-            payload = {}
-
-        items.append(
-            DocumentHistoryItem(
-                id=r.id,
-                filename=r.filename,
-                doc_type=r.doc_type,
-                quality_score=r.quality_score,
-                created_at=r.created_at,
-                payload=payload,
+            rows = iter_flat_rows(
+                db,
+                doc_type=doc_type,
+                date_from=date_from,
+                date_to=date_to,
+                include_raw_text=include_raw_text,
             )
+            yield from iter_export(rows, format, include_raw_text=include_raw_text)
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        stream(),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="documents.{format}"'},
+    )
+
+
+@app.post("/documents/{document_id}/reextract", response_model=DocumentHistoryItem)
+async def reextract_document_fields(
+    document_id: int,
+    request: Request,
+    fields: Optional[str] = None,
+):
+    """
+    Vuelve a pedir al modelo solo algunos campos de un documento ya guardado y
+    combina la respuesta con el resultado existente (sin re-procesar el documento).
+    `fields` es una lista separada por comas ("cedula.estatura_m"); por defecto,
+    los campos con observaciones de calidad. Reutiliza el raw_text guardado o la
+    imagen original si sigue en la cache de fuentes. Pasa por el mismo control de
+    admisión y las mismas métricas que /documents/process.
+    """
+    requested = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    source = await run_in_threadpool(_reextraction_source, document_id, requested)
+    if isinstance(source, DocumentHistoryItem):
+        return source  # nada que re-extraer
+    previous, paths, raw_text, image_bytes, content_type = source
+
+    routed = RoutedExtraction(classify_and_extract, raw_text, image_bytes, extract_fields=extract_fields)
+    if routed.chunked:
+        # Como en _refine_extraction: la llamada llevaría el texto completo del documento
+        raise HTTPException(
+            status_code=409,
+            detail="El documento se extrajo por fragmentos; vuelva a procesarlo para corregir campos.",
         )
 
-    return items
+    size = len(image_bytes) if image_bytes is not None else len(raw_text.encode("utf-8"))
+    async with _admission(request, size, content_type), track_document(content_type) as metrics:
+        metrics.doc_type = previous.doc_type.value
+        extracted = await _call_model(metrics, "llm_fields", routed.reextract_fields, previous, paths)
+        extracted_with_quality = _evaluate_quality(extracted, metrics)
+
+        with metrics.stage("persist"):
+            return await run_in_threadpool(_save_reextraction, document_id, previous, extracted_with_quality)
+
+
+def _reextraction_source(document_id: int, requested: Optional[List[str]]):
+    """
+    Documento guardado, campos a pedir y su fuente (raw_text o imagen), o el
+    documento tal cual si no hay campos que re-extraer. 404/409/422/400 si no se puede.
+    """
+    with SessionLocal() as db:
+        record = db.get(DocumentRecord, document_id)
+        if record is None:
+            raise HTTPException(status_code=404, detail="Documento no encontrado")
+        if record.archived_at is not None:
+            raise HTTPException(status_code=409, detail="El documento está archivado y no se puede modificar")
+
+        try:
+            previous = ExtractedDocument.model_validate(load_payload(record))
+        except ValueError as exc:
+            raise HTTPException(
+                status_code=422,
+                detail="El resultado guardado del documento no es legible; vuelva a procesarlo.",
+            ) from exc
+
+        try:
+            paths = fields_to_reextract(previous, requested)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        if len(paths) > settings.field_reextraction_max_fields:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Se pueden re-extraer hasta {settings.field_reextraction_max_fields} campos por vez.",
+            )
+        if not paths:
+            return _to_history_item(record)
+
+        raw_text = previous.raw_text or None
+        image_bytes = None
+        if raw_text is None:
+            image_bytes = load_source(record.content_sha256) if record.content_sha256 else None
+            if image_bytes is None:
+                raise HTTPException(
+                    status_code=409,
+                    detail="La imagen original ya no está disponible; vuelva a procesar el documento.",
+                )
+        content_type = "application/pdf" if raw_text is not None else mimetypes.guess_type(record.filename)[0]
+
+    return previous, paths, raw_text, image_bytes, content_type
+
+
+def _save_reextraction(
+    document_id: int,
+    previous: ExtractedDocument,
+    extracted: ExtractedDocument,
+) -> DocumentHistoryItem:
+    with SessionLocal() as db:
+        record = db.get(DocumentRecord, document_id)
+        if record is None:
+            raise HTTPException(status_code=404, detail="Documento no encontrado")
+        record = update_document(db, record, previous, extracted)
+        return _to_history_item(record)
+
+
+@app.get("/documents/{document_id}", response_model=DocumentHistoryItem)
+def get_document(
+    document_id: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+):
+    """
+    Detalle de un documento por id.
+    Los documentos archivados por la política de retención se leen
+    de forma transparente desde su archivo comprimido.
+    El ETag depende del id y de la última re-extracción de campos (updated_at).
+    """
+    record = db.get(DocumentRecord, document_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Documento no encontrado")
+
+    etag = make_etag("document", record.id, record.updated_at)
+    not_modified = not_modified_or_tag(request, response, etag)
+    if not_modified is not None:
+        return not_modified
+
+    return _to_history_item(record)
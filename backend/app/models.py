@@ -1,9 +1,23 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Text, ForeignKey, Index
 from sqlalchemy.sql import func
 
 from .db import Base
 
 
+class UploadRecord(Base):
+    """
+    Archivo subido que contenía varios documentos (PDF "paquete"). Cada segmento
+    queda como un DocumentRecord propio que apunta aquí con upload_id.
+    """
+    __tablename__ = "uploads"
+
+    id = Column(Integer, primary_key=True)
+    filename = Column(String(255), nullable=False)
+    content_sha256 = Column(String(64), nullable=True, index=True)
+    page_count = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
 class DocumentRecord(Base):
     __tablename__ = "documents"
 
@@ -13,3 +27,78 @@ class DocumentRecord(Base):
     quality_score = Column(Float, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     payload_json = Column(Text, nullable=False)
+    # Última modificación del payload (re-extracción de campos); None si nunca cambió
+    updated_at = Column(DateTime(timezone=True), nullable=True, index=True)
+
+    # SHA-256 del archivo original, para detectar archivos ya procesados
+    content_sha256 = Column(String(64), nullable=True, index=True)
+
+    # Retención: cuando el documento se archiva, payload_json queda vacío (fila "stub")
+    # y el payload completo vive en el archivo comprimido indicado en archive_path.
+    archived_at = Column(DateTime(timezone=True), nullable=True)
+    archive_path = Column(String(255), nullable=True)
+
+    # Documentos extraídos de un paquete: upload de origen y páginas (1-based, inclusivas)
+    upload_id = Column(Integer, ForeignKey("uploads.id"), nullable=True, index=True)
+    page_from = Column(Integer, nullable=True)
+    page_to = Column(Integer, nullable=True)
+
+    # Hash perceptual (dHash, 16 hex) de las imágenes, para detectar re-escaneos del mismo documento
+    image_dhash = Column(String(16), nullable=True)
+
+
+class DocumentIdentifier(Base):
+    """
+    Identificadores normalizados (cédula, NIT, póliza) de cada documento.
+    Permite buscar todos los documentos de una identificación sin parsear payload_json.
+    """
+    __tablename__ = "document_identifiers"
+
+    id = Column(Integer, primary_key=True)
+    document_id = Column(
+        Integer,
+        ForeignKey("documents.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    field_name = Column(String(64), nullable=False)  # ej: "cedula.numero"
+    value = Column(String(64), nullable=False, index=True)  # sin puntos ni espacios
+
+
+class ImageHashBand(Base):
+    """
+    Bandas de 8 bits del dHash de cada imagen. Permite buscar hashes cercanos
+    (distancia de Hamming) con un índice exacto en lugar de recorrer todos.
+    """
+    __tablename__ = "document_image_hash_bands"
+    __table_args__ = (Index("ix_image_hash_bands_band_value", "band", "value"),)
+
+    id = Column(Integer, primary_key=True)
+    document_id = Column(
+        Integer,
+        ForeignKey("documents.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    band = Column(Integer, nullable=False)
+    value = Column(Integer, nullable=False)
+
+
+class QualityDailyRollup(Base):
+    """Conteo y suma de quality_score por día y tipo de documento (se actualiza en cada insert)."""
+    __tablename__ = "quality_daily_rollups"
+
+    day = Column(Date, primary_key=True)
+    doc_type = Column(String(50), primary_key=True)
+    doc_count = Column(Integer, nullable=False, default=0)
+    quality_sum = Column(Float, nullable=False, default=0.0)
+
+
+class IssueDailyRollup(Base):
+    """Número de FieldIssue por día, tipo de documento y campo."""
+    __tablename__ = "issue_daily_rollups"
+
+    day = Column(Date, primary_key=True)
+    doc_type = Column(String(50), primary_key=True)
+    field_name = Column(String(64), primary_key=True)
+    issue_count = Column(Integer, nullable=False, default=0)
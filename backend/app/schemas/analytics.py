@@ -0,0 +1,20 @@
+from datetime import date
+from typing import List
+
+from pydantic import BaseModel, Field
+
+
+class IssueCount(BaseModel):
+    field_name: str
+    count: int
+
+
+class QualityRollupItem(BaseModel):
+    day: date
+    doc_type: str
+    doc_count: int
+    avg_quality_score: float
+    top_issues: List[IssueCount] = Field(
+        default_factory=list,
+        description="Campos con más observaciones de calidad en el día",
+    )
@@ -114,6 +114,35 @@ class FieldIssue(BaseModel):
     message: str
 
 
+class ExtractionInfo(BaseModel):
+    """Qué modelo atendió el documento (ruteo por costo/latencia) y lo que costó."""
+
+    tier: str = Field(..., description="Nivel del ruteo: fast, strong o default")
+    model: str
+    llm_ms: Optional[float] = None
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    cost_usd: Optional[float] = Field(None, description="Costo estimado de la llamada que se usó")
+    escalated_from: Optional[str] = Field(None, description="Nivel que falló antes de escalar")
+    escalation_reason: Optional[str] = Field(None, description="invalid_output, missing_section o low_quality")
+    chunks: Optional[int] = Field(None, description="Fragmentos extraídos en paralelo (documentos largos)")
+    reextracted_fields: List[str] = Field(
+        default_factory=list,
+        description="Campos completados con una re-extracción puntual (seccion.campo)",
+    )
+    reextraction_cost_usd: Optional[float] = Field(
+        None, description="Costo acumulado de las re-extracciones por campo"
+    )
+
+
+class NearDuplicate(BaseModel):
+    """Imagen casi idéntica (por hash perceptual) a un documento ya procesado."""
+
+    document_id: int
+    distance: int = Field(..., description="Distancia de Hamming entre los dHash (0 a 64)")
+    reused: bool = Field(False, description="True si se reutilizó su extracción sin llamar al modelo")
+
+
 class ExtractedDocument(BaseModel):
     doc_type: DocumentType
     raw_text: str = Field(..., description="Texto base usado para la extracción")
@@ -131,3 +160,23 @@ class ExtractedDocument(BaseModel):
         default_factory=list,
         description="Listado de problemas de calidad de datos detectados",
     )
+    extraction: Optional[ExtractionInfo] = None
+    near_duplicate: Optional[NearDuplicate] = None
+
+
+class DocumentSegment(BaseModel):
+    """Un documento dentro de un PDF paquete (páginas 1-based, inclusivas)."""
+
+    page_from: int
+    page_to: int
+    document_id: Optional[int] = None
+    document: Optional[ExtractedDocument] = None
+    error: Optional[str] = Field(None, description="Motivo si el segmento no se pudo extraer")
+
+
+class BundleResult(BaseModel):
+    upload_id: int
+    filename: str
+    page_count: int
+    segments: List[DocumentSegment]
+    blank_pages: List[int] = Field(default_factory=list, description="Hojas en blanco descartadas")
@@ -1,13 +1,38 @@
 from datetime import datetime
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel
 
 
+class DocumentSummaryItem(BaseModel):
+    """Fila del historial sin payload, para listados livianos."""
+    id: int
+    filename: str
+    doc_type: str
+    quality_score: float
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+
 class DocumentHistoryItem(BaseModel):
     id: int
     filename: str
     doc_type: str
     quality_score: float
     created_at: datetime
+    updated_at: Optional[datetime] = None
+    # Solo para documentos que vienen de un PDF paquete (/documents/bundle)
+    upload_id: Optional[int] = None
+    page_from: Optional[int] = None
+    page_to: Optional[int] = None
     payload: Dict[str, Any]
+
+
+class UploadItem(BaseModel):
+    """PDF paquete con los documentos que se extrajeron de él, en orden de páginas."""
+    id: int
+    filename: str
+    content_sha256: Optional[str] = None
+    page_count: int
+    created_at: datetime
+    documents: List[DocumentHistoryItem]
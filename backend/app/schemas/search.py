@@ -0,0 +1,13 @@
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+
+class DocumentSearchHit(BaseModel):
+    id: int
+    filename: str
+    doc_type: str
+    quality_score: float
+    created_at: datetime
+    score: float = Field(..., description="Relevancia bm25 (mayor es más relevante)")
+    snippet: str = Field(..., description="Fragmento con los términos resaltados entre **")
@@ -0,0 +1,203 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Optional
+
+from fastapi import HTTPException, Request, status
+
+from ..config import settings
+from .metrics import (
+    ADMISSION_BUFFERED_BYTES,
+    ADMISSION_QUEUE_DEPTH,
+    observe_admission_wait,
+    record_admission_rejection,
+)
+
+
+class _Waiter:
+    __slots__ = ("cost", "future")
+
+    def __init__(self, cost: int, future: "asyncio.Future[None]") -> None:
+        self.cost = cost
+        self.future = future
+
+
+class AdmissionController:
+    """
+    Control de admisión de /documents/process (estado de un worker; from_settings
+    le asigna su parte de los límites globales).
+
+    Limita las extracciones en curso y los bytes retenidos en memoria por ellas.
+    Lo que no cabe espera en una cola acotada, con una fila por cliente atendida
+    por turnos (round-robin): un cliente que sube un lote grande no deja sin turno
+    a los demás. Si la cola está llena, el cliente ya tiene demasiados pendientes
+    o la espera supera `queue_timeout_s`, se rechaza con 429 y Retry-After.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 16,
+        max_buffered_bytes: int = 200 * 1024 * 1024,
+        max_queue: int = 64,
+        max_queue_per_client: int = 8,
+        queue_timeout_s: float = 30.0,
+    ) -> None:
+        self._max_in_flight = max_in_flight
+        self._max_buffered_bytes = max_buffered_bytes
+        self._max_queue = max_queue
+        self._max_queue_per_client = max_queue_per_client
+        self._queue_timeout_s = queue_timeout_s
+
+        self._in_flight = 0
+        self._buffered_bytes = 0
+        # Filas por cliente; el orden del OrderedDict es el turno del round-robin
+        self._queues: "OrderedDict[str, Deque[_Waiter]]" = OrderedDict()
+        self._queued = 0
+        # Promedio móvil de la duración de una extracción (para estimar Retry-After)
+        self._avg_service_s = 5.0
+
+    @classmethod
+    def from_settings(cls) -> "AdmissionController":
+        """
+        Los ADMISSION_* son límites del servicio: con WEB_CONCURRENCY workers, cada
+        uno aplica 1/N de ellos (sin bajar de 1), así la suma no supera lo configurado.
+        """
+        workers = max(settings.web_concurrency, 1)
+
+        def share(limit: int) -> int:
+            return max(limit // workers, 1)
+
+        return cls(
+            max_in_flight=share(settings.admission_max_in_flight),
+            max_buffered_bytes=share(settings.admission_max_buffered_mb * 1024 * 1024),
+            max_queue=share(settings.admission_max_queue),
+            max_queue_per_client=share(settings.admission_max_queue_per_client),
+            queue_timeout_s=settings.admission_queue_timeout_s,
+        )
+
+    def _fits(self, cost: int) -> bool:
+        if self._in_flight >= self._max_in_flight:
+            return False
+        # Un archivo más grande que el límite se admite solo, sin otros en curso
+        return self._buffered_bytes == 0 or self._buffered_bytes + cost <= self._max_buffered_bytes
+
+    def _retry_after(self) -> int:
+        """Segundos estimados hasta que la cola actual se vacíe."""
+        rounds = (self._queued + self._in_flight) / max(self._max_in_flight, 1)
+        return max(1, math.ceil(rounds * self._avg_service_s))
+
+    def _reject(self, reason: str, detail: str) -> HTTPException:
+        record_admission_rejection(reason)
+        return HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=detail,
+            headers={"Retry-After": str(self._retry_after())},
+        )
+
+    def _admit(self, cost: int) -> None:
+        self._in_flight += 1
+        self._buffered_bytes += cost
+        ADMISSION_BUFFERED_BYTES.inc(cost)
+
+    def _release(self, cost: int, service_s: float) -> None:
+        self._in_flight -= 1
+        self._buffered_bytes -= cost
+        ADMISSION_BUFFERED_BYTES.dec(cost)
+        self._avg_service_s = 0.8 * self._avg_service_s + 0.2 * service_s
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Admite en turnos a la cabeza de cada fila mientras haya capacidad."""
+        while self._queues:
+            client_id, queue = next(iter(self._queues.items()))
+            waiter = queue[0]
+            if not self._fits(waiter.cost):
+                return
+            queue.popleft()
+            self._dequeued(client_id, queue)
+            if not waiter.future.done():
+                self._admit(waiter.cost)
+                waiter.future.set_result(None)
+
+    def _dequeued(self, client_id: str, queue: Deque[_Waiter], rotate: bool = True) -> None:
+        self._queued -= 1
+        ADMISSION_QUEUE_DEPTH.dec()
+        if not queue:
+            del self._queues[client_id]
+        elif rotate:
+            # El cliente atendido pasa al final del turno
+            self._queues.move_to_end(client_id)
+
+    async def _wait(self, client_id: str, cost: int) -> None:
+        if self._queued >= self._max_queue:
+            raise self._reject("queue_full", "El servicio está saturado; intente más tarde.")
+        if len(self._queues.get(client_id, ())) >= self._max_queue_per_client:
+            raise self._reject(
+                "client_queue_full", "Demasiados documentos pendientes para este cliente."
+            )
+
+        queue = self._queues.setdefault(client_id, deque())
+        waiter = _Waiter(cost, asyncio.get_running_loop().create_future())
+        queue.append(waiter)
+        self._queued += 1
+        ADMISSION_QUEUE_DEPTH.inc()
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self._queue_timeout_s)
+        except asyncio.TimeoutError:
+            if waiter.future.done():
+                # Fue admitido justo al vencer la espera
+                return
+            self._abandon(client_id, queue, waiter)
+            raise self._reject("timeout", "El servicio está saturado; intente más tarde.") from None
+        except asyncio.CancelledError:
+            # El cliente se desconectó mientras esperaba
+            if waiter.future.done():
+                self._release(cost, self._avg_service_s)
+            else:
+                self._abandon(client_id, queue, waiter)
+            raise
+
+    def _abandon(self, client_id: str, queue: Deque[_Waiter], waiter: _Waiter) -> None:
+        waiter.future.cancel()
+        queue.remove(waiter)
+        self._dequeued(client_id, queue, rotate=False)
+        # Si el que se va era una cabeza que no cabía, los que siguen quizás sí
+        self._dispatch()
+
+    @asynccontextmanager
+    async def admit(self, client_id: str, cost: int) -> AsyncIterator[None]:
+        """Espera turno (o rechaza con 429) y libera el lugar al terminar."""
+        queued_at = time.perf_counter()
+        if self._fits(cost) and not self._queues:
+            self._admit(cost)
+        else:
+            await self._wait(client_id, cost)
+        started = time.perf_counter()
+        observe_admission_wait(started - queued_at)
+
+        try:
+            yield
+        finally:
+            self._release(cost, time.perf_counter() - started)
+
+
+def client_key(request: Request) -> str:
+    """Identidad para el reparto justo: la API key si viene, si no la IP del cliente."""
+    api_key = request.headers.get(settings.admission_client_header)
+    if api_key:
+        return f"key:{api_key}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+def request_cost(size: Optional[int], content_type: Optional[str]) -> int:
+    """
+    Bytes que el documento retendrá en memoria: el archivo y, para imágenes,
+    además su copia en base64 (4/3 del tamaño) para el modelo.
+    """
+    size = size or 0
+    if content_type and content_type.startswith("image/"):
+        return size + math.ceil(size * 4 / 3)
+    return size
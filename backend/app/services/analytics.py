@@ -0,0 +1,226 @@
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from ..models import DocumentRecord, IssueDailyRollup, QualityDailyRollup
+from ..schemas.analytics import IssueCount, QualityRollupItem
+from ..schemas.documents import ExtractedDocument
+from .archive_store import load_payload
+
+
+def _as_day(value: Any) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    # SQLite puede devolver el timestamp como texto
+    return datetime.fromisoformat(str(value)).date()
+
+
+def _upsert_increment(
+    db: Session,
+    model,
+    keys: Dict[str, Any],
+    increments: Dict[str, Any],
+) -> None:
+    """
+    Suma `increments` a la fila identificada por `keys`, creándola si no existe.
+    Se hace con un único INSERT ... ON CONFLICT para que sea atómico entre transacciones.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        table = model.__table__
+        stmt = insert(table).values(**keys, **increments)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={col: table.c[col] + stmt.excluded[col] for col in increments},
+        )
+        db.execute(stmt)
+        return
+
+    # Otros motores: leer-modificar-escribir dentro de la misma transacción
+    row = db.get(model, tuple(keys.values()))
+    if row is None:
+        db.add(model(**keys, **increments))
+    else:
+        for col, inc in increments.items():
+            setattr(row, col, getattr(row, col) + inc)
+
+
+RollupTotals = Dict[Tuple[date, str], List[float]]
+RollupIssues = Dict[Tuple[date, str, str], int]
+
+
+def new_rollup_increments() -> Tuple[RollupTotals, RollupIssues]:
+    """Acumuladores vacíos para collect_rollup_increments / apply_rollup_increments."""
+    return defaultdict(lambda: [0, 0.0]), defaultdict(int)
+
+
+def collect_rollup_increments(
+    record: DocumentRecord,
+    extracted: ExtractedDocument,
+    totals: RollupTotals,
+    issues: RollupIssues,
+) -> None:
+    """Suma la contribución de un documento a los acumuladores (sin tocar la BD)."""
+    day = _as_day(record.created_at)
+    doc_type = record.doc_type
+
+    totals[(day, doc_type)][0] += 1
+    totals[(day, doc_type)][1] += float(record.quality_score)
+    for issue in extracted.issues:
+        issues[(day, doc_type, issue.field_name)] += 1
+
+
+def apply_rollup_increments(db: Session, totals: RollupTotals, issues: RollupIssues) -> None:
+    """Aplica los acumuladores con un upsert por clave (día, tipo[, campo])."""
+    for (day, doc_type), (count, quality_sum) in totals.items():
+        _upsert_increment(
+            db,
+            QualityDailyRollup,
+            {"day": day, "doc_type": doc_type},
+            {"doc_count": count, "quality_sum": quality_sum},
+        )
+    for (day, doc_type, field_name), count in issues.items():
+        _upsert_increment(
+            db,
+            IssueDailyRollup,
+            {"day": day, "doc_type": doc_type, "field_name": field_name},
+            {"issue_count": count},
+        )
+
+
+def update_quality_rollups(
+    db: Session,
+    record: DocumentRecord,
+    extracted: ExtractedDocument,
+) -> None:
+    """Actualiza las agregaciones diarias dentro de la transacción del insert del documento."""
+    totals, issues = new_rollup_increments()
+    collect_rollup_increments(record, extracted, totals, issues)
+    apply_rollup_increments(db, totals, issues)
+
+
+def replace_quality_rollups(
+    db: Session,
+    record: DocumentRecord,
+    previous: ExtractedDocument,
+    current: ExtractedDocument,
+) -> None:
+    """
+    Corrige las agregaciones de un documento ya contado cuyo resultado cambió
+    (re-extracción de campos): ajusta quality_sum y reemplaza sus observaciones.
+    """
+    day = _as_day(record.created_at)
+    doc_type = record.doc_type
+
+    totals, issues = new_rollup_increments()
+    totals[(day, doc_type)][1] += current.quality_score - previous.quality_score
+    for issue in previous.issues:
+        issues[(day, doc_type, issue.field_name)] -= 1
+    for issue in current.issues:
+        issues[(day, doc_type, issue.field_name)] += 1
+    apply_rollup_increments(db, totals, {key: count for key, count in issues.items() if count})
+
+
+def rebuild_quality_rollups(db: Session) -> int:
+    """
+    Regenera las agregaciones desde cero recorriendo la tabla documents.
+    Devuelve el número de documentos procesados.
+    """
+    totals, issues = new_rollup_increments()
+
+    processed = 0
+    query = db.query(
+        DocumentRecord.id,
+        DocumentRecord.created_at,
+        DocumentRecord.doc_type,
+        DocumentRecord.quality_score,
+        DocumentRecord.payload_json,
+        DocumentRecord.archive_path,
+    )
+    for row in query.yield_per(500):
+        day = _as_day(row.created_at)
+        totals[(day, row.doc_type)][0] += 1
+        totals[(day, row.doc_type)][1] += float(row.quality_score)
+
+        for issue in load_payload(row).get("issues") or []:
+            field_name = issue.get("field_name")
+            if field_name:
+                issues[(day, row.doc_type, field_name)] += 1
+
+        processed += 1
+
+    db.query(IssueDailyRollup).delete(synchronize_session=False)
+    db.query(QualityDailyRollup).delete(synchronize_session=False)
+
+    for (day, doc_type), (count, quality_sum) in totals.items():
+        db.add(
+            QualityDailyRollup(
+                day=day,
+                doc_type=doc_type,
+                doc_count=count,
+                quality_sum=quality_sum,
+            )
+        )
+    for (day, doc_type, field_name), count in issues.items():
+        db.add(
+            IssueDailyRollup(
+                day=day,
+                doc_type=doc_type,
+                field_name=field_name,
+                issue_count=count,
+            )
+        )
+
+    db.commit()
+    return processed
+
+
+def get_quality_analytics(
+    db: Session,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    doc_type: Optional[str] = None,
+    top_issues: int = 5,
+) -> List[QualityRollupItem]:
+    """Consulta solo las tablas de agregación (nunca la tabla documents)."""
+    totals_q = db.query(QualityDailyRollup)
+    # Una re-extracción puede dejar en 0 el conteo de un campo
+    issues_q = db.query(IssueDailyRollup).filter(IssueDailyRollup.issue_count > 0)
+
+    if date_from:
+        totals_q = totals_q.filter(QualityDailyRollup.day >= date_from)
+        issues_q = issues_q.filter(IssueDailyRollup.day >= date_from)
+    if date_to:
+        totals_q = totals_q.filter(QualityDailyRollup.day <= date_to)
+        issues_q = issues_q.filter(IssueDailyRollup.day <= date_to)
+    if doc_type:
+        totals_q = totals_q.filter(QualityDailyRollup.doc_type == doc_type)
+        issues_q = issues_q.filter(IssueDailyRollup.doc_type == doc_type)
+
+    issues_by_key: Dict[Tuple[date, str], List[IssueCount]] = defaultdict(list)
+    for row in issues_q.order_by(IssueDailyRollup.issue_count.desc()):
+        issues_by_key[(row.day, row.doc_type)].append(
+            IssueCount(field_name=row.field_name, count=row.issue_count)
+        )
+
+    items: List[QualityRollupItem] = []
+    rows = totals_q.order_by(QualityDailyRollup.day.desc(), QualityDailyRollup.doc_type)
+    for row in rows:
+        avg = row.quality_sum / row.doc_count if row.doc_count else 0.0
+        items.append(
+            QualityRollupItem(
+                day=row.day,
+                doc_type=row.doc_type,
+                doc_count=row.doc_count,
+                avg_quality_score=avg,
+                top_issues=issues_by_key[(row.day, row.doc_type)][:top_issues],
+            )
+        )
+
+    return items
@@ -0,0 +1,78 @@
+import json
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List
+
+from ..config import settings
+
+
+ARCHIVE_SUFFIX = ".ndjson.zst"
+
+
+def archive_relative_path(year: int, month: int, first_id: int, last_id: int) -> str:
+    """Ruta relativa a archive_root, particionada por año y mes de creación."""
+    return f"{year:04d}/{month:02d}/documents-{first_id}-{last_id}{ARCHIVE_SUFFIX}"
+
+
+def write_archive_file(relative_path: str, entries: List[Dict[str, Any]]) -> None:
+    """
+    Escribe los documentos (cada uno con su "id" y su "payload") como NDJSON comprimido con zstd.
+    Se escribe en un temporal y se renombra, de modo que el archivo final
+    nunca queda a medias; reescribir el mismo lote es idempotente. Si el archivo
+    ya existe se conservan sus entradas con otros ids (filas ya archivadas en él).
+    """
+    import zstandard
+
+    target = settings.archive_root / relative_path
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(target.name + ".tmp")
+
+    if target.exists():
+        new_ids = {entry["id"] for entry in entries}
+        kept = [doc for doc_id, doc in _read_archive_file(relative_path).items() if doc_id not in new_ids]
+        entries = kept + list(entries)
+
+    lines = [json.dumps(entry, ensure_ascii=False, default=str) for entry in entries]
+    data = zstandard.ZstdCompressor(level=10).compress(("\n".join(lines) + "\n").encode("utf-8"))
+
+    with open(tmp, "wb") as fh:
+        fh.write(data)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, target)
+    _read_archive_file.cache_clear()
+
+
+@lru_cache(maxsize=4)
+def _read_archive_file(relative_path: str) -> Dict[int, Dict[str, Any]]:
+    import zstandard
+
+    path: Path = settings.archive_root / relative_path
+    with open(path, "rb") as fh:
+        raw = zstandard.ZstdDecompressor().stream_reader(fh).read()
+
+    documents: Dict[int, Dict[str, Any]] = {}
+    for line in raw.decode("utf-8").splitlines():
+        if line.strip():
+            doc = json.loads(line)
+            documents[doc["id"]] = doc
+    return documents
+
+
+def load_payload(record: Any) -> Dict[str, Any]:
+    """
+    Devuelve el payload completo de un documento (DocumentRecord o fila con
+    id, payload_json y archive_path), leyéndolo del archivo histórico si fue archivado.
+    """
+    if getattr(record, "archive_path", None):
+        try:
+            doc = _read_archive_file(record.archive_path).get(record.id)
+        except (OSError, ValueError):
+            doc = None
+        return (doc or {}).get("payload") or {}
+
+    try:
+        return json.loads(record.payload_json) if record.payload_json else {}
+    except json.JSONDecodeError:
+        return {}
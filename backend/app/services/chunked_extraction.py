@@ -0,0 +1,182 @@
+import contextvars
+import logging
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..config import settings
+from ..schemas.documents import ExtractedDocument, ExtractionInfo
+from .field_reextraction import SECTIONS
+from .openai_client import ModelOutputError
+from .segmentation import normalize_text
+from .tracing import start_span
+
+logger = logging.getLogger(__name__)
+
+ExtractFn = Callable[..., ExtractedDocument]
+
+# (candidato extraído de un fragmento, texto del fragmento normalizado)
+Candidate = Tuple[ExtractedDocument, str]
+
+
+def should_chunk(raw_text: Optional[str], image_bytes: Optional[bytes]) -> bool:
+    """Solo texto largo (no imágenes) se extrae por fragmentos."""
+    return (
+        settings.chunked_extraction_enabled
+        and not image_bytes
+        and len(raw_text or "") > settings.chunked_min_chars
+    )
+
+
+def split_text(text: str, chunk_chars: int, overlap_chars: int) -> List[str]:
+    """
+    Fragmentos de hasta `chunk_chars` que se solapan `overlap_chars`, para que una
+    cláusula partida en el borde quede completa en alguno de los dos. El corte se
+    mueve al último salto de párrafo (o de línea) dentro de la segunda mitad.
+    """
+    chunks: List[str] = []
+    start = 0
+    while start < len(text):
+        end = min(start + chunk_chars, len(text))
+        if end < len(text):
+            for separator in ("\n\n", "\n"):
+                cut = text.rfind(separator, start + chunk_chars // 2, end)
+                if cut != -1:
+                    end = cut + len(separator)
+                    break
+        chunks.append(text[start:end])
+        if end >= len(text):
+            break
+        start = max(end - overlap_chars, start + 1)
+    return chunks
+
+
+def _mode(values: List[Any]) -> Any:
+    """Valor más repetido; ante empate, el que aparece primero (fragmento más temprano)."""
+    counts = Counter(values)
+    best = max(counts.values())
+    return next(v for v in values if counts[v] == best)
+
+
+def _mentioning(keyword: str) -> Callable[[List[Tuple[Any, str]]], Any]:
+    """Prefiere los candidatos de fragmentos que mencionan `keyword` (la cláusula del campo)."""
+    def pick(values: List[Tuple[Any, str]]) -> Any:
+        preferred = [v for v, text in values if keyword in text]
+        return _mode(preferred or [v for v, _ in values])
+
+    return pick
+
+
+def _joined(values: List[Tuple[Any, str]]) -> Any:
+    unique = list(dict.fromkeys(v for v, _ in values))
+    return "; ".join(unique)
+
+
+def _union(values: List[Tuple[Any, str]]) -> Any:
+    """Listas (coberturas): unión por contenido, en orden de aparición."""
+    merged: List[Any] = []
+    for items, _ in values:
+        for item in items:
+            if item not in merged:
+                merged.append(item)
+    return merged
+
+
+# Reglas por campo ("seccion.campo"); el resto usa el valor más repetido
+_MERGE_RULES: Dict[str, Callable[[List[Tuple[Any, str]]], Any]] = {
+    "contrato.fecha_inicio": lambda values: min(v for v, _ in values),
+    "contrato.fecha_fin": lambda values: max(v for v, _ in values),
+    "contrato.valor_numerico": _mentioning("VALOR"),
+    "contrato.valor_textual": _mentioning("VALOR"),
+    "contrato.objeto": _mentioning("OBJETO"),
+    "contrato.duracion_meses": _mentioning("DURACION"),
+    "contrato.clausulas_relevantes": _joined,
+    "acta_seguro.fecha_inicio": lambda values: min(v for v, _ in values),
+    "acta_seguro.fecha_fin": lambda values: max(v for v, _ in values),
+    "acta_seguro.coberturas": _union,
+}
+
+
+def merge_candidates(candidates: List[Candidate], raw_text: str) -> ExtractedDocument:
+    """
+    Combina los resultados por fragmento: el doc_type por mayoría y, para cada
+    campo de su sección, el mejor candidato no vacío según _MERGE_RULES.
+    La calidad se evalúa después, una sola vez, sobre el resultado.
+    """
+    doc_type = _mode([extracted.doc_type for extracted, _ in candidates])
+    section, model = SECTIONS[doc_type]
+
+    sections = [
+        (getattr(extracted, section).model_dump(), text)
+        for extracted, text in candidates
+        if extracted.doc_type == doc_type and getattr(extracted, section) is not None
+    ]
+
+    merged_section = None
+    if sections:
+        values: Dict[str, Any] = {}
+        for field in model.model_fields:
+            found = [(data[field], text) for data, text in sections if data.get(field) not in (None, "", [])]
+            if found:
+                rule = _MERGE_RULES.get(f"{section}.{field}")
+                values[field] = rule(found) if rule else _mode([v for v, _ in found])
+        try:
+            merged_section = model(**values)
+        except ValueError:
+            # No debería ocurrir (cada valor ya pasó la validación); se usa el primer candidato
+            merged_section = model(**sections[0][0])
+
+    return ExtractedDocument(doc_type=doc_type, raw_text=raw_text, **{section: merged_section})
+
+
+def _sum(values: List[Optional[float]]) -> Optional[float]:
+    present = [v for v in values if v is not None]
+    return sum(present) if present else None
+
+
+def extract_chunked(extract: ExtractFn, raw_text: str, model: str, tier: str) -> ExtractedDocument:
+    """
+    Map-reduce para documentos largos: extrae cada fragmento en paralelo
+    (CHUNKED_MAX_PARALLEL) y combina los candidatos con merge_candidates.
+    Un fragmento con respuesta inválida se descarta; si fallan todos, se propaga el error.
+    """
+    chunks = split_text(raw_text, settings.chunk_chars, settings.chunk_overlap_chars)
+
+    with start_span("chunked_extract", {"llm.chunks": len(chunks)}) as span:
+        def run(chunk: str) -> ExtractedDocument:
+            return extract(raw_text=chunk, image_bytes=None, model=model, tier=tier)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=settings.chunked_max_parallel) as pool:
+            # Cada hilo hereda el contexto (span padre de la traza)
+            futures = [pool.submit(contextvars.copy_context().run, run, chunk) for chunk in chunks]
+
+        candidates: List[Candidate] = []
+        errors: List[ModelOutputError] = []
+        for chunk, future in zip(chunks, futures):
+            try:
+                candidates.append((future.result(), normalize_text(chunk)))
+            except ModelOutputError as exc:
+                errors.append(exc)
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+
+        span.set_attribute("llm.chunks_failed", len(errors))
+        if not candidates:
+            raise errors[0]
+        if errors:
+            logger.warning("%d de %d fragmentos sin respuesta válida", len(errors), len(chunks))
+
+        merged = merge_candidates(candidates, raw_text)
+
+    infos = [extracted.extraction for extracted, _ in candidates if extracted.extraction is not None]
+    merged.extraction = ExtractionInfo(
+        tier=tier,
+        model=model,
+        llm_ms=elapsed_ms,
+        prompt_tokens=_sum([i.prompt_tokens for i in infos]),
+        completion_tokens=_sum([i.completion_tokens for i in infos]),
+        cost_usd=_sum([i.cost_usd for i in infos]),
+        chunks=len(chunks),
+    )
+    return merged
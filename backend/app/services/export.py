@@ -0,0 +1,267 @@
+import csv
+import io
+import json
+import typing
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..models import DocumentRecord
+from ..schemas.documents import ActaSeguroData, CedulaData, ContratoData
+from .archive_store import load_payload
+
+
+EXPORT_FORMATS = ("ndjson", "csv", "parquet")
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# Filas por lote leídas de la BD y escritas en cada chunk / row group
+BATCH_SIZE = 500
+
+
+def _column_type(annotation: Any) -> str:
+    """Reduce la anotación de un campo pydantic a un tipo de columna simple."""
+    args = [a for a in typing.get_args(annotation) if a is not type(None)]
+    if typing.get_origin(annotation) is typing.Union and len(args) == 1:
+        annotation = args[0]
+
+    if typing.get_origin(annotation) in (list, List):
+        return "json"
+    if annotation in (int, float, date, datetime):
+        return annotation.__name__
+    return "str"
+
+
+def _section_columns(prefix: str, model: typing.Type[BaseModel]) -> List[Tuple[str, str, str, str]]:
+    return [
+        (f"{prefix}_{name}", prefix, name, _column_type(field.annotation))
+        for name, field in model.model_fields.items()
+    ]
+
+
+# (columna, sección del payload, campo, tipo). Las secciones anidadas
+# (cédula, acta de seguro, contrato) se aplanan con su nombre como prefijo.
+SECTION_COLUMNS = (
+    _section_columns("cedula", CedulaData)
+    + _section_columns("acta_seguro", ActaSeguroData)
+    + _section_columns("contrato", ContratoData)
+)
+
+BASE_COLUMNS: List[Tuple[str, str]] = [
+    ("id", "int"),
+    ("filename", "str"),
+    ("doc_type", "str"),
+    ("quality_score", "float"),
+    ("created_at", "datetime"),
+    ("issues_count", "int"),
+    ("issue_fields", "str"),
+    ("model_tier", "str"),
+    ("model", "str"),
+    ("llm_cost_usd", "float"),
+    ("upload_id", "int"),
+    ("page_from", "int"),
+    ("page_to", "int"),
+    ("near_duplicate_of", "int"),
+]
+
+
+def export_columns(include_raw_text: bool = False) -> List[Tuple[str, str]]:
+    """Columnas (nombre, tipo) de la exportación, en orden."""
+    columns = BASE_COLUMNS + [(name, col_type) for name, _, _, col_type in SECTION_COLUMNS]
+    if include_raw_text:
+        columns.append(("raw_text", "str"))
+    return columns
+
+
+def _coerce(value: Any, col_type: str) -> Any:
+    if value is None or value == "":
+        return None
+    try:
+        if col_type == "int":
+            return int(value)
+        if col_type == "float":
+            return float(value)
+        if col_type == "date":
+            return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+        if col_type == "datetime":
+            return value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+        if col_type == "json":
+            return json.dumps(value, ensure_ascii=False)
+    except (TypeError, ValueError):
+        return None
+    return str(value)
+
+
+def flatten_document(
+    record: DocumentRecord,
+    payload: Dict[str, Any],
+    include_raw_text: bool = False,
+) -> Dict[str, Any]:
+    """Convierte un documento y su payload anidado en una fila plana con tipos."""
+    issues = payload.get("issues") or []
+    extraction = payload.get("extraction") or {}
+    near_duplicate = payload.get("near_duplicate") or {}
+    row: Dict[str, Any] = {
+        "id": record.id,
+        "filename": record.filename,
+        "doc_type": record.doc_type,
+        "quality_score": record.quality_score,
+        "created_at": _coerce(record.created_at, "datetime"),
+        "issues_count": len(issues),
+        "issue_fields": ";".join(i.get("field_name", "") for i in issues) or None,
+        "model_tier": extraction.get("tier"),
+        "model": extraction.get("model"),
+        # Una extracción reutilizada de un casi duplicado no tuvo costo
+        "llm_cost_usd": 0.0 if near_duplicate.get("reused") else extraction.get("cost_usd"),
+        "upload_id": record.upload_id,
+        "page_from": record.page_from,
+        "page_to": record.page_to,
+        "near_duplicate_of": near_duplicate.get("document_id"),
+    }
+
+    for column, section, field, col_type in SECTION_COLUMNS:
+        data = payload.get(section) or {}
+        row[column] = _coerce(data.get(field), col_type)
+
+    if include_raw_text:
+        row["raw_text"] = payload.get("raw_text")
+
+    return row
+
+
+def iter_flat_rows(
+    db: Session,
+    doc_type: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    include_raw_text: bool = False,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Recorre los documentos con un cursor de servidor (stream_results + yield_per),
+    por lo que la memoria no depende del número de filas.
+    """
+    stmt = select(DocumentRecord).order_by(DocumentRecord.id)
+    if doc_type:
+        stmt = stmt.where(DocumentRecord.doc_type == doc_type)
+    if date_from:
+        stmt = stmt.where(DocumentRecord.created_at >= date_from)
+    if date_to:
+        stmt = stmt.where(DocumentRecord.created_at < date_to + timedelta(days=1))
+
+    stmt = stmt.execution_options(stream_results=True, yield_per=BATCH_SIZE)
+
+    for record in db.execute(stmt).scalars():
+        payload = load_payload(record)
+        yield flatten_document(record, payload, include_raw_text=include_raw_text)
+        # Evita que la sesión acumule todos los objetos cargados
+        db.expunge(record)
+
+
+def _batches(rows: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    batch: List[Dict[str, Any]] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Tipo no serializable: {type(value)}")
+
+
+def iter_ndjson(rows: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    for batch in _batches(rows, BATCH_SIZE):
+        lines = [json.dumps(row, ensure_ascii=False, default=_json_default) for row in batch]
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def iter_csv(rows: Iterable[Dict[str, Any]], columns: List[Tuple[str, str]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=[name for name, _ in columns])
+    writer.writeheader()
+
+    for batch in _batches(rows, BATCH_SIZE):
+        writer.writerows(batch)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate(0)
+
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Destino de escritura que acumula bytes para emitirlos por chunks."""
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_parquet(rows: Iterable[Dict[str, Any]], columns: List[Tuple[str, str]]) -> Iterator[bytes]:
+    """Escribe Parquet por row groups de BATCH_SIZE filas, emitiendo los bytes de cada uno."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    arrow_types = {
+        "int": pa.int64(),
+        "float": pa.float64(),
+        "date": pa.date32(),
+        "datetime": pa.timestamp("us"),
+        "str": pa.string(),
+        "json": pa.string(),
+    }
+    schema = pa.schema([(name, arrow_types[col_type]) for name, col_type in columns])
+
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, schema, compression="zstd") as writer:
+        for batch in _batches(rows, BATCH_SIZE):
+            writer.write_batch(pa.RecordBatch.from_pylist(batch, schema=schema))
+            yield sink.drain()
+
+    yield sink.drain()
+
+
+def iter_export(
+    rows: Iterable[Dict[str, Any]],
+    export_format: str,
+    include_raw_text: bool = False,
+) -> Iterator[bytes]:
+    """Serializa las filas en el formato pedido, chunk a chunk."""
+    columns = export_columns(include_raw_text)
+    if export_format == "ndjson":
+        return iter_ndjson(rows)
+    if export_format == "csv":
+        return iter_csv(rows, columns)
+    if export_format == "parquet":
+        return iter_parquet(rows, columns)
+    raise ValueError(f"Formato de exportación no soportado: {export_format}")
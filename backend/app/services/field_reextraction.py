@@ -0,0 +1,151 @@
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, Union, get_args, get_origin
+
+from pydantic import BaseModel, TypeAdapter
+
+from ..schemas.documents import (
+    ActaSeguroData,
+    CedulaData,
+    ContratoData,
+    DocumentType,
+    ExtractedDocument,
+    ExtractionInfo,
+)
+from .metrics import record_field_reextraction
+from .tracing import start_span
+
+
+# Sección del payload y modelo de cada tipo de documento
+SECTIONS: Dict[DocumentType, Tuple[str, Type[BaseModel]]] = {
+    DocumentType.CEDULA: ("cedula", CedulaData),
+    DocumentType.ACTA_SEGURO: ("acta_seguro", ActaSeguroData),
+    DocumentType.CONTRATO: ("contrato", ContratoData),
+}
+
+# Observaciones de evaluate_quality que abarcan varios campos
+COMPOSITE_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "acta_seguro.fecha_rango": ("acta_seguro.fecha_inicio", "acta_seguro.fecha_fin"),
+    "contrato.fecha_rango": ("contrato.fecha_inicio", "contrato.fecha_fin"),
+}
+
+# Tipo de Python -> tipo que se le indica al modelo en el esquema mínimo
+_TYPE_NAMES: Dict[type, str] = {
+    str: "string",
+    float: "number",
+    int: "integer",
+    date: "YYYY-MM-DD",
+}
+
+ExtractFieldsFn = Callable[..., Tuple[Dict[str, Any], ExtractionInfo]]
+
+
+def _scalar_type(model: Type[BaseModel], field: str) -> Optional[type]:
+    """Tipo escalar del campo (sin Optional); None si es una lista u objeto."""
+    annotation = model.model_fields[field].annotation
+    if get_origin(annotation) is Union:
+        args = [a for a in get_args(annotation) if a is not type(None)]
+        annotation = args[0] if len(args) == 1 else None
+    return annotation if annotation in _TYPE_NAMES else None
+
+
+def _expand(field_name: str) -> Tuple[str, ...]:
+    return COMPOSITE_FIELDS.get(field_name, (field_name,))
+
+
+def fields_to_reextract(extracted: ExtractedDocument, requested: Optional[List[str]] = None) -> List[str]:
+    """
+    Campos ("seccion.campo") que se le piden de nuevo al modelo: los indicados en
+    `requested` o, si no se indican, los que tienen observaciones de calidad.
+    Lanza ValueError si un campo pedido no existe o no es re-extraíble.
+    """
+    section, model = SECTIONS[extracted.doc_type]
+    names = requested if requested is not None else [issue.field_name for issue in extracted.issues]
+
+    paths: List[str] = []
+    for name in names:
+        for path in _expand(name):
+            prefix, _, field = path.partition(".")
+            if prefix != section or field not in model.model_fields or _scalar_type(model, field) is None:
+                if requested is None:
+                    continue  # observación sin un campo simple asociado
+                raise ValueError(f"Campo no re-extraíble para {extracted.doc_type.value}: {name}")
+            if path not in paths:
+                paths.append(path)
+    return paths
+
+
+def field_schema(doc_type: DocumentType, paths: List[str]) -> Dict[str, Dict[str, str]]:
+    """Esquema mínimo para el prompt, ej: {"cedula": {"estatura_m": "number | null"}}."""
+    section, model = SECTIONS[doc_type]
+    fields = {}
+    for path in paths:
+        field = path.split(".", 1)[1]
+        fields[field] = f"{_TYPE_NAMES[_scalar_type(model, field)]} | null"
+    return {section: fields}
+
+
+def merge_fields(
+    extracted: ExtractedDocument,
+    answer: Dict[str, Any],
+    paths: List[str],
+) -> Tuple[ExtractedDocument, List[str]]:
+    """
+    Aplica sobre el documento los valores no nulos de la respuesta que pasan la
+    validación de su campo. Devuelve el documento resultante y los campos que cambiaron.
+    """
+    section, model = SECTIONS[extracted.doc_type]
+    current = getattr(extracted, section)
+    values: Dict[str, Any] = current.model_dump() if current is not None else {}
+    answered = answer.get(section) if isinstance(answer.get(section), dict) else {}
+
+    updated: List[str] = []
+    for path in paths:
+        field = path.split(".", 1)[1]
+        value = answered.get(field)
+        if value is None or value == "":
+            continue
+        try:
+            value = TypeAdapter(model.model_fields[field].annotation).validate_python(value)
+        except ValueError:
+            continue
+        if value != values.get(field):
+            values[field] = value
+            updated.append(path)
+
+    if not updated:
+        return extracted, []
+    try:
+        # Valida la sección completa (campos obligatorios y validadores del modelo)
+        merged_section = model(**values)
+    except ValueError:
+        return extracted, []
+    return extracted.model_copy(update={section: merged_section}), updated
+
+
+def reextract_fields(
+    extract_fields: ExtractFieldsFn,
+    extracted: ExtractedDocument,
+    raw_text: Optional[str],
+    image_bytes: Optional[bytes],
+    paths: List[str],
+    model: str,
+) -> ExtractedDocument:
+    """
+    Pide al modelo solo `paths` con un esquema mínimo (reutilizando el texto o la
+    imagen ya obtenidos) y los combina con el documento existente. La calidad se
+    debe volver a evaluar después.
+    """
+    with start_span("reextract_fields", {"fields.requested": len(paths)}) as span:
+        schema = field_schema(extracted.doc_type, paths)
+        answer, info = extract_fields(raw_text, image_bytes, schema, model=model, tier="field")
+        merged, updated = merge_fields(extracted, answer, paths)
+        span.set_attribute("fields.updated", len(updated))
+
+    for path in paths:
+        record_field_reextraction(path, "fixed" if path in updated else "unchanged")
+
+    extraction = (merged.extraction or ExtractionInfo(tier="default", model=model)).model_copy(deep=True)
+    extraction.reextracted_fields = sorted(set(extraction.reextracted_fields) | set(updated))
+    if info.cost_usd is not None:
+        extraction.reextraction_cost_usd = (extraction.reextraction_cost_usd or 0.0) + info.cost_usd
+    return merged.model_copy(update={"extraction": extraction})
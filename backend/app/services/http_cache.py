@@ -0,0 +1,46 @@
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response
+
+from .metrics import record_cache_lookup
+
+
+# Los clientes deben revalidar siempre: el ETag evita re-descargar si nada cambió
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: object) -> str:
+    """ETag débil derivado de los valores que determinan el contenido de la respuesta."""
+    digest = hashlib.sha1(":".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+    return f'W/"{digest[:20]}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Compara If-None-Match con el ETag (comparación débil, admite listas y '*')."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+
+    current = etag.removeprefix("W/")
+    candidates = [c.strip().removeprefix("W/") for c in header.split(",")]
+    return current in candidates
+
+
+def not_modified_or_tag(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """
+    Devuelve una respuesta 304 si el cliente ya tiene esta versión.
+    Si no, agrega ETag y Cache-Control a la respuesta normal y devuelve None.
+    """
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    matches = etag_matches(request, etag)
+    if "if-none-match" in request.headers:
+        # Solo cuentan las peticiones condicionales (el cliente tenía una copia)
+        record_cache_lookup("etag", matches)
+    if matches:
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return None
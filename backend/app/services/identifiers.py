@@ -0,0 +1,116 @@
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy.orm import Session
+
+from ..models import DocumentIdentifier, DocumentRecord
+from ..schemas.documents import ExtractedDocument
+from .archive_store import load_payload
+
+
+# (sección del payload, campo) que se indexan como identificadores
+IDENTIFIER_FIELDS: List[Tuple[str, str]] = [
+    ("cedula", "numero"),
+    ("acta_seguro", "numero_poliza"),
+    ("acta_seguro", "identificacion"),
+    ("contrato", "contratante_nit"),
+    ("contrato", "contratista_identificacion"),
+]
+
+
+def canonicalize_identifier(value: str) -> str:
+    """Normaliza un identificador: sin puntos ni espacios y en mayúsculas."""
+    return "".join(value.split()).replace(".", "").upper()
+
+
+def extract_identifiers(payload: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """Devuelve pares (field_name, valor canónico) presentes en el payload del documento."""
+    found: List[Tuple[str, str]] = []
+    for section, field in IDENTIFIER_FIELDS:
+        data = payload.get(section) or {}
+        value = data.get(field)
+        if not value:
+            continue
+        canonical = canonicalize_identifier(str(value))
+        if canonical:
+            found.append((f"{section}.{field}", canonical))
+    return found
+
+
+def _add_identifiers(db: Session, document_id: int, payload: Dict[str, Any]) -> None:
+    for field_name, value in extract_identifiers(payload):
+        db.add(
+            DocumentIdentifier(
+                document_id=document_id,
+                field_name=field_name,
+                value=value,
+            )
+        )
+
+
+def index_identifiers(db: Session, record: DocumentRecord, extracted: ExtractedDocument) -> None:
+    """Registra los identificadores del documento dentro de la transacción del insert."""
+    _add_identifiers(db, record.id, extracted.model_dump(mode="json"))
+
+
+def replace_identifiers(db: Session, record: DocumentRecord, extracted: ExtractedDocument) -> None:
+    """Reemplaza los identificadores de un documento actualizado (misma transacción que el update)."""
+    db.query(DocumentIdentifier).filter(
+        DocumentIdentifier.document_id == record.id
+    ).delete(synchronize_session=False)
+    index_identifiers(db, record, extracted)
+
+
+def backfill_identifiers(db: Session, batch_size: int = 500) -> int:
+    """
+    Reconstruye la tabla de identificadores para los documentos existentes.
+    Procesa por lotes de ids y hace commit por lote para no bloquear escrituras mucho tiempo.
+    Devuelve el número de documentos procesados.
+    """
+    processed = 0
+    last_id = 0
+
+    while True:
+        rows = (
+            db.query(DocumentRecord.id, DocumentRecord.payload_json, DocumentRecord.archive_path)
+            .filter(DocumentRecord.id > last_id)
+            .order_by(DocumentRecord.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+
+        ids = [r.id for r in rows]
+        db.query(DocumentIdentifier).filter(
+            DocumentIdentifier.document_id.in_(ids)
+        ).delete(synchronize_session=False)
+
+        for row in rows:
+            _add_identifiers(db, row.id, load_payload(row))
+
+        db.commit()
+        processed += len(rows)
+        last_id = ids[-1]
+
+    return processed
+
+
+def find_documents_by_identifier(db: Session, value: str, limit: int = 100) -> List[DocumentRecord]:
+    """Documentos (más recientes primero) que contienen el identificador dado."""
+    canonical = canonicalize_identifier(value)
+    if not canonical:
+        return []
+
+    matching_ids = (
+        db.query(DocumentIdentifier.document_id)
+        .filter(DocumentIdentifier.value == canonical)
+        .distinct()
+    )
+
+    return (
+        db.query(DocumentRecord)
+        .filter(DocumentRecord.id.in_(matching_ids))
+        .order_by(DocumentRecord.created_at.desc(), DocumentRecord.id.desc())
+        .limit(limit)
+        .all()
+    )
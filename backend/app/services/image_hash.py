@@ -0,0 +1,102 @@
+from typing import List, Optional, Tuple
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from ..models import DocumentRecord, ImageHashBand
+
+# dHash de 64 bits: gradiente horizontal sobre una grilla de 9x8 en escala de grises
+_GRID_W, _GRID_H = 9, 8
+# Resolución intermedia; PyMuPDF la renderiza con antialiasing y se promedia por celda
+_SAMPLE = 8
+
+# El hash se indexa en 8 bandas de 8 bits: si dos hashes difieren en 7 bits o menos,
+# al menos una banda coincide exacta (palomar), así la búsqueda usa el índice
+HASH_BANDS = 8
+MAX_INDEXED_DISTANCE = HASH_BANDS - 1
+
+
+def dhash(image_bytes: bytes) -> Optional[str]:
+    """
+    Hash perceptual (dHash) de una imagen como 16 caracteres hexadecimales.
+    Re-escaneos o fotos del mismo documento dan hashes a poca distancia de Hamming
+    aunque los bytes sean distintos. None si la imagen no se puede decodificar.
+    """
+    import fitz
+
+    width, height = _GRID_W * _SAMPLE, _GRID_H * _SAMPLE
+    try:
+        with fitz.open(stream=image_bytes) as doc:
+            page = doc[0]
+            matrix = fitz.Matrix(width / page.rect.width, height / page.rect.height)
+            pix = page.get_pixmap(matrix=matrix, colorspace=fitz.csGRAY, alpha=False)
+    except (RuntimeError, ValueError, IndexError, ZeroDivisionError):
+        return None
+
+    samples, w, h, stride = pix.samples, pix.width, pix.height, pix.stride
+    grid: List[List[float]] = []
+    for row in range(_GRID_H):
+        y0, y1 = row * h // _GRID_H, (row + 1) * h // _GRID_H
+        cells = []
+        for col in range(_GRID_W):
+            x0, x1 = col * w // _GRID_W, (col + 1) * w // _GRID_W
+            total = sum(sum(samples[y * stride + x0 : y * stride + x1]) for y in range(y0, y1))
+            cells.append(total / max((y1 - y0) * (x1 - x0), 1))
+        grid.append(cells)
+
+    value = 0
+    for cells in grid:
+        for left, right in zip(cells, cells[1:]):
+            value = (value << 1) | (left < right)
+    return f"{value:016x}"
+
+
+def hamming_distance(a: str, b: str) -> int:
+    return bin(int(a, 16) ^ int(b, 16)).count("1")
+
+
+def hash_bands(image_hash: str) -> List[Tuple[int, int]]:
+    """(número de banda, valor de 8 bits) de un hash de 16 caracteres hexadecimales."""
+    return [(band, int(image_hash[band * 2 : band * 2 + 2], 16)) for band in range(HASH_BANDS)]
+
+
+def index_image_hash(db: Session, record: DocumentRecord, image_hash: str) -> None:
+    """Registra las bandas del hash dentro de la transacción del insert del documento."""
+    for band, value in hash_bands(image_hash):
+        db.add(ImageHashBand(document_id=record.id, band=band, value=value))
+
+
+def find_near_duplicate(
+    db: Session,
+    image_hash: str,
+    max_distance: int,
+) -> Optional[Tuple[DocumentRecord, int]]:
+    """
+    Documento más parecido (distancia de Hamming <= max_distance, y ante empate el
+    más reciente). Los candidatos salen del índice de bandas y la distancia exacta
+    se calcula sobre todos ellos: cada uno es solo un id y un hash de 64 bits, y
+    acotarlos podría dejar afuera justo al más cercano (las cédulas comparten
+    plantilla y con ella muchas bandas).
+    """
+    band_match = or_(
+        *(and_(ImageHashBand.band == band, ImageHashBand.value == value) for band, value in hash_bands(image_hash))
+    )
+    candidate_ids = db.query(ImageHashBand.document_id).filter(band_match).distinct()
+
+    rows = (
+        db.query(DocumentRecord.id, DocumentRecord.image_dhash)
+        .filter(DocumentRecord.id.in_(candidate_ids))
+        .order_by(DocumentRecord.id.desc())
+    )
+
+    best: Optional[Tuple[int, int]] = None
+    for document_id, candidate_hash in rows.yield_per(1000):
+        distance = hamming_distance(image_hash, candidate_hash)
+        if distance <= max_distance and (best is None or distance < best[1]):
+            best = (document_id, distance)
+            if distance == 0:
+                break
+
+    if best is None:
+        return None
+    return db.get(DocumentRecord, best[0]), best[1]
@@ -0,0 +1,268 @@
+import os
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+
+# Con varios workers cada proceso escribe sus valores en archivos de este directorio
+# (modo multiproceso de prometheus_client) y /metrics los agrega todos. Debe estar
+# vacío al arrancar y definirse antes de iniciar los workers.
+MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+# Desde milisegundos (validación, calidad) hasta minutos (LLM con contratos largos)
+STAGE_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0,
+)
+
+STAGE_SECONDS = Histogram(
+    "document_stage_seconds",
+    "Duración de cada etapa de /documents/process",
+    ["stage", "doc_type", "file_type", "outcome"],
+    buckets=STAGE_BUCKETS,
+)
+
+PROCESS_SECONDS = Histogram(
+    "document_process_seconds",
+    "Duración total de /documents/process",
+    ["doc_type", "file_type", "outcome"],
+    buckets=STAGE_BUCKETS,
+)
+
+# livesum: suma de los workers vivos (ignora los que ya terminaron)
+DOCUMENTS_IN_FLIGHT = Gauge(
+    "documents_in_flight",
+    "Documentos en procesamiento en este momento",
+    multiprocess_mode="livesum",
+)
+
+LLM_CALLS_IN_FLIGHT = Gauge(
+    "llm_calls_in_flight",
+    "Llamadas al modelo en curso",
+    multiprocess_mode="livesum",
+)
+
+LLM_ERRORS = Counter(
+    "llm_errors_total",
+    "Errores al llamar al modelo o al interpretar su respuesta",
+    ["kind"],
+)
+
+LLM_CALL_SECONDS = Histogram(
+    "llm_call_seconds",
+    "Duración de cada llamada al modelo por nivel de ruteo",
+    ["tier", "model"],
+    buckets=STAGE_BUCKETS,
+)
+
+LLM_TOKENS = Counter(
+    "llm_tokens_total",
+    "Tokens consumidos por nivel de ruteo",
+    ["tier", "model", "kind"],
+)
+
+LLM_COST_USD = Counter(
+    "llm_cost_usd_total",
+    "Costo estimado (USD) de las llamadas al modelo por nivel de ruteo",
+    ["tier", "model"],
+)
+
+LLM_ESCALATIONS = Counter(
+    "llm_escalations_total",
+    "Documentos re-procesados con el modelo fuerte",
+    ["reason"],
+)
+
+DOCUMENTS_BY_TIER = Counter(
+    "documents_by_tier_total",
+    "Documentos según el nivel de modelo que produjo el resultado final",
+    ["tier"],
+)
+
+FIELD_REEXTRACTIONS = Counter(
+    "field_reextractions_total",
+    "Campos re-extraídos por separado tras fallar la validación de calidad",
+    ["field", "outcome"],
+)
+
+LLM_RETRIES = Counter(
+    "llm_retries_total",
+    "Reintentos automáticos del cliente de OpenAI",
+)
+
+CACHE_LOOKUPS = Counter(
+    "cache_lookups_total",
+    "Consultas a caches (ETag, hash de contenido) por resultado",
+    ["cache", "result"],
+)
+
+DB_LOCK_RETRIES = Counter(
+    "db_lock_retries_total",
+    "Commits reintentados porque otro proceso retenía el lock de escritura de SQLite",
+)
+
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "admission_queue_depth",
+    "Documentos esperando turno en el control de admisión",
+    multiprocess_mode="livesum",
+)
+
+ADMISSION_BUFFERED_BYTES = Gauge(
+    "admission_buffered_bytes",
+    "Bytes retenidos en memoria por los documentos admitidos",
+    multiprocess_mode="livesum",
+)
+
+ADMISSION_REJECTIONS = Counter(
+    "admission_rejections_total",
+    "Documentos rechazados con 429 por el control de admisión",
+    ["reason"],
+)
+
+ADMISSION_WAIT_SECONDS = Histogram(
+    "admission_wait_seconds",
+    "Espera en la cola de admisión antes de empezar a procesar",
+    buckets=STAGE_BUCKETS,
+)
+
+FILE_TYPES = {
+    "application/pdf": "pdf",
+    "image/png": "png",
+    "image/jpeg": "jpeg",
+}
+
+
+def file_type_label(content_type: Optional[str]) -> str:
+    return FILE_TYPES.get(content_type or "", "other")
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    CACHE_LOOKUPS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+def record_llm_error(kind: str) -> None:
+    LLM_ERRORS.labels(kind=kind).inc()
+
+
+def record_llm_call(
+    tier: str,
+    model: str,
+    seconds: float,
+    prompt_tokens: Optional[int],
+    completion_tokens: Optional[int],
+    cost_usd: Optional[float],
+) -> None:
+    LLM_CALL_SECONDS.labels(tier, model).observe(seconds)
+    if prompt_tokens is not None:
+        LLM_TOKENS.labels(tier, model, "prompt").inc(prompt_tokens)
+    if completion_tokens is not None:
+        LLM_TOKENS.labels(tier, model, "completion").inc(completion_tokens)
+    if cost_usd is not None:
+        LLM_COST_USD.labels(tier, model).inc(cost_usd)
+
+
+def record_llm_escalation(reason: str) -> None:
+    LLM_ESCALATIONS.labels(reason=reason).inc()
+
+
+def record_document_tier(tier: str) -> None:
+    DOCUMENTS_BY_TIER.labels(tier=tier).inc()
+
+
+def record_field_reextraction(field: str, outcome: str) -> None:
+    """outcome: fixed (se completó el campo) o unchanged (el modelo no lo encontró)."""
+    FIELD_REEXTRACTIONS.labels(field=field, outcome=outcome).inc()
+
+
+def record_db_lock_retry() -> None:
+    DB_LOCK_RETRIES.inc()
+
+
+def record_admission_rejection(reason: str) -> None:
+    ADMISSION_REJECTIONS.labels(reason=reason).inc()
+
+
+def observe_admission_wait(seconds: float) -> None:
+    ADMISSION_WAIT_SECONDS.observe(seconds)
+
+
+class DocumentMetrics:
+    """
+    Tiempos de las etapas de un documento. Se acumulan en memoria y se registran
+    al final, cuando ya se conoce el doc_type (que solo se sabe después del LLM).
+    """
+
+    def __init__(self, file_type: str) -> None:
+        self.file_type = file_type
+        self.doc_type = "unknown"
+        self._stages: List[Tuple[str, float, str]] = []
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            yield
+            outcome = "ok"
+        finally:
+            self._stages.append((name, time.perf_counter() - start, outcome))
+
+    def observe(self, outcome: str, total_seconds: float) -> None:
+        for name, seconds, stage_outcome in self._stages:
+            STAGE_SECONDS.labels(name, self.doc_type, self.file_type, stage_outcome).observe(seconds)
+        PROCESS_SECONDS.labels(self.doc_type, self.file_type, outcome).observe(total_seconds)
+
+
+def _outcome(exc: Optional[BaseException]) -> str:
+    if exc is None:
+        return "ok"
+    if isinstance(exc, HTTPException):
+        return f"http_{exc.status_code}"
+    return "error"
+
+
+@asynccontextmanager
+async def track_document(content_type: Optional[str]) -> AsyncIterator[DocumentMetrics]:
+    """Mide un documento completo (/documents/process o una re-extracción): en curso, duración total y resultado."""
+    metrics = DocumentMetrics(file_type_label(content_type))
+    start = time.perf_counter()
+    DOCUMENTS_IN_FLIGHT.inc()
+    exc: Optional[BaseException] = None
+    try:
+        yield metrics
+    except BaseException as e:
+        exc = e
+        raise
+    finally:
+        DOCUMENTS_IN_FLIGHT.dec()
+        metrics.observe(_outcome(exc), time.perf_counter() - start)
+
+
+def record_llm_retry() -> None:
+    LLM_RETRIES.inc()
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Cuerpo y content-type de la exposición en formato Prometheus (de todos los workers)."""
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+def mark_worker_stopped() -> None:
+    """Descarta los gauges de este proceso al terminar (los contadores se conservan)."""
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(os.getpid())
@@ -0,0 +1,120 @@
+from typing import Callable, List, Optional
+
+from ..config import settings
+from ..schemas.documents import ExtractedDocument, ExtractionInfo
+from .chunked_extraction import extract_chunked, should_chunk
+from .field_reextraction import SECTIONS, ExtractFieldsFn, reextract_fields
+from .metrics import record_document_tier, record_llm_escalation
+from .openai_client import ModelOutputError
+from .tracing import start_span
+
+
+FAST = "fast"
+STRONG = "strong"
+DEFAULT = "default"
+
+ExtractFn = Callable[..., ExtractedDocument]
+
+
+def tier_model(tier: str) -> str:
+    return settings.openai_strong_model if tier == STRONG else settings.openai_model
+
+
+def field_model() -> str:
+    """Las re-extracciones por campo usan el modelo fuerte (o OPENAI_MODEL sin ruteo)."""
+    return tier_model(STRONG if settings.model_routing_enabled else DEFAULT)
+
+
+def choose_tier(raw_text: Optional[str], image_bytes: Optional[bytes], page_count: int) -> str:
+    """
+    Texto digital corto (pocas páginas y caracteres) va al modelo rápido;
+    imágenes escaneadas y documentos largos, al fuerte.
+    """
+    if not settings.model_routing_enabled:
+        return DEFAULT
+    if image_bytes:
+        return STRONG
+    if page_count > settings.routing_fast_max_pages or len(raw_text or "") > settings.routing_fast_max_chars:
+        return STRONG
+    return FAST
+
+
+class RoutedExtraction:
+    """
+    Extracción de un documento según el ruteo de modelos. Si el nivel rápido
+    devuelve una respuesta inválida (run) o de baja calidad (escalate), el mismo
+    documento se re-procesa con el modelo fuerte. Los campos que aún fallan la
+    validación se pueden pedir por separado (reextract_fields).
+    """
+
+    def __init__(
+        self,
+        extract: ExtractFn,
+        raw_text: Optional[str],
+        image_bytes: Optional[bytes],
+        page_count: int = 1,
+        extract_fields: Optional[ExtractFieldsFn] = None,
+    ) -> None:
+        self._extract = extract
+        self._extract_fields = extract_fields
+        self._raw_text = raw_text
+        self._image_bytes = image_bytes
+        self.tier = choose_tier(raw_text, image_bytes, page_count)
+        # Texto muy largo: map-reduce por fragmentos en lugar de una sola llamada
+        self.chunked = should_chunk(raw_text, image_bytes)
+
+    def _call(self, tier: str) -> ExtractedDocument:
+        model = tier_model(tier)
+        if self.chunked:
+            extracted = extract_chunked(self._extract, self._raw_text, model, tier)
+        else:
+            extracted = self._extract(raw_text=self._raw_text, image_bytes=self._image_bytes, model=model, tier=tier)
+        if extracted.extraction is None:
+            extracted.extraction = ExtractionInfo(tier=tier, model=model)
+        return extracted
+
+    def run(self) -> ExtractedDocument:
+        try:
+            extracted = self._call(self.tier)
+        except ModelOutputError:
+            if self.tier != FAST:
+                raise
+            return self.escalate("invalid_output")
+        return extracted
+
+    def escalation_reason(self, extracted: ExtractedDocument) -> Optional[str]:
+        """
+        Motivo para re-procesar con el modelo fuerte el resultado (ya evaluado) del
+        nivel rápido: 'missing_section' si falta la sección de su tipo, 'low_quality'
+        si hay observaciones y el quality_score no alcanza el mínimo. Un 0.0 sin
+        observaciones solo indica que ninguna validación aplicaba, no que algo fallara.
+        """
+        if self.tier != FAST:
+            return None
+        section, _ = SECTIONS[extracted.doc_type]
+        if getattr(extracted, section) is None:
+            return "missing_section"
+        if extracted.issues and extracted.quality_score < settings.routing_escalation_min_quality:
+            return "low_quality"
+        return None
+
+    def escalate(self, reason: str) -> ExtractedDocument:
+        record_llm_escalation(reason)
+        previous, self.tier = self.tier, STRONG
+        with start_span("escalate", {"llm.escalation_reason": reason, "llm.escalated_from": previous}):
+            extracted = self._call(STRONG)
+        extracted.extraction.escalated_from = previous
+        extracted.extraction.escalation_reason = reason
+        return extracted
+
+    def reextract_fields(self, extracted: ExtractedDocument, paths: List[str]) -> ExtractedDocument:
+        """Pide solo `paths` al modelo, con el mismo texto o imagen de la extracción."""
+        if self._extract_fields is None:
+            raise ValueError("No hay función de re-extracción por campo configurada")
+        return reextract_fields(
+            self._extract_fields, extracted, self._raw_text, self._image_bytes, paths, field_model()
+        )
+
+    def record_served(self) -> None:
+        """Cuenta el documento en el nivel que produjo el resultado final."""
+        record_document_tier(self.tier)
@@ -1,20 +1,55 @@
 import base64
 import json
-from typing import Any, Dict, Optional, List
-
-from openai import OpenAI
+import time
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, Optional, List, Sequence, Tuple, Union
 
 from ..config import settings
+from .metrics import LLM_CALLS_IN_FLIGHT, record_llm_call, record_llm_error, record_llm_retry
+from .tracing import start_span
 from ..schemas.documents import (
     ExtractedDocument,
+    ExtractionInfo,
     DocumentType,
     CedulaData,
     ActaSeguroData,
     ContratoData,
 )
 
-# Cliente OpenAI
-client = OpenAI(api_key=settings.openai_api_key)
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+
+# Una imagen, o varias para un mismo documento (páginas escaneadas de un paquete)
+ImageInput = Union[bytes, Sequence[bytes]]
+
+
+def _images(image_bytes: Optional[ImageInput]) -> List[bytes]:
+    if not image_bytes:
+        return []
+    return [image_bytes] if isinstance(image_bytes, bytes) else list(image_bytes)
+
+
+class ModelOutputError(ValueError):
+    """La respuesta del modelo no es un JSON válido o no cumple el esquema esperado."""
+
+
+@lru_cache(maxsize=1)
+def get_client() -> "OpenAI":
+    """
+    Cliente OpenAI compartido. Se crea en el primer uso (o en el warm-up del arranque)
+    porque importar openai es la parte más costosa del arranque del backend.
+    """
+    from openai import DefaultHttpxClient, OpenAI
+
+    http_client = DefaultHttpxClient(event_hooks={"request": [_count_retry]})
+    return OpenAI(api_key=settings.openai_api_key, http_client=http_client)
+
+
+def _count_retry(request: Any) -> None:
+    """El SDK reintenta por su cuenta; cada intento lleva su número en x-stainless-retry-count."""
+    if request.headers.get("x-stainless-retry-count", "0") != "0":
+        record_llm_retry()
 
 
 SYSTEM_PROMPT = """
@@ -89,18 +124,36 @@ Reglas importantes:
 """
 
 
-def _build_content(raw_text: Optional[str], image_bytes: Optional[bytes]) -> List[Dict[str, Any]]:
+FIELDS_SYSTEM_PROMPT = """
+Eres un sistema experto en análisis de documentos legales y financieros en Colombia.
+Ya se extrajeron los datos de este documento, pero algunos campos quedaron vacíos
+o con valores inconsistentes. Vuelve a leer el documento y devuelve SOLO esos campos,
+como un único objeto JSON con exactamente la estructura indicada por el usuario.
+
+Reglas importantes:
+- Si un campo no aparece en el documento, devuélvelo como null. No inventes valores.
+- Fechas en formato YYYY-MM-DD; números de identificación o pólizas como string.
+- estatura_m en metros (por ejemplo 1.65 si ves "1,65 M"); grupo_sanguineo_rh como "O+", "A-", etc.
+- No escribas nada fuera del JSON.
+"""
+
+DEFAULT_USER_INSTRUCTIONS = (
+    "Analiza el siguiente documento (texto e imagen si está disponible). "
+    "Recuerda devolver SOLO un JSON válido siguiendo la estructura indicada."
+)
+
+
+def _build_content(
+    raw_text: Optional[str],
+    image_bytes: Optional[ImageInput],
+    user_instructions: str = DEFAULT_USER_INSTRUCTIONS,
+) -> List[Dict[str, Any]]:
     """
     Construye la lista de 'content' para el mensaje del usuario.
-    Puede incluir texto, imagen o ambos.
+    Puede incluir texto, una o varias imágenes (en orden de página) o ambos.
     """
     content: List[Dict[str, Any]] = []
 
-    user_instructions = (
-        "Analiza el siguiente documento (texto e imagen si está disponible). "
-        "Recuerda devolver SOLO un JSON válido siguiendo la estructura indicada."
-    )
-
     # Instrucciones
     content.append({"type": "text", "text": user_instructions})
 
@@ -108,9 +161,9 @@ def _build_content(raw_text: Optional[str], image_bytes: Optional[bytes]) -> Lis
     if raw_text:
         content.append({"type": "text", "text": raw_text})
 
-    # Imagen en base64 (si hay)
-    if image_bytes:
-        b64 = base64.b64encode(image_bytes).decode("utf-8")
+    # Imágenes en base64 (si hay)
+    for image in _images(image_bytes):
+        b64 = base64.b64encode(image).decode("utf-8")
         data_url = f"data:image/jpeg;base64,{b64}"
         content.append(
             {
@@ -128,51 +181,117 @@ def _parse_model_json(content: str) -> Dict[str, Any]:
     """Parsea el JSON devuelto por el modelo. Si falla, lanza ValueError."""
     try:
         return json.loads(content)
-    except json.JSONDecodeError as exc:
-        raise ValueError(f"No se pudo parsear la respuesta JSON del modelo: {exc}") from exc
+    except (json.JSONDecodeError, TypeError) as exc:
+        record_llm_error("invalid_json")
+        raise ModelOutputError(f"No se pudo parsear la respuesta JSON del modelo: {exc}") from exc
+
+
+def estimate_cost_usd(model: str, prompt_tokens: int, completion_tokens: int) -> Optional[float]:
+    """Costo según MODEL_PRICES_PER_MTOK; None si el modelo no tiene precio configurado."""
+    prices = settings.model_prices_per_mtok.get(model)
+    if not prices:
+        return None
+    input_price, output_price = prices
+    return (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+
+
+def _request_json(
+    system_prompt: str,
+    raw_text: Optional[str],
+    image_bytes: Optional[ImageInput],
+    model: str,
+    tier: str,
+    user_instructions: str = DEFAULT_USER_INSTRUCTIONS,
+) -> Tuple[Dict[str, Any], ExtractionInfo]:
+    """
+    Llama al modelo en modo JSON y devuelve el objeto parseado junto con
+    el modelo, la latencia, los tokens y el costo de la llamada.
+    """
+    with start_span("build_content") as span:
+        span.set_attribute("llm.input_text_chars", len(raw_text or ""))
+        span.set_attribute("llm.input_image_bytes", sum(len(image) for image in _images(image_bytes)))
+        messages = [
+            {
+                "role": "system",
+                "content": [{"type": "text", "text": system_prompt}],
+            },
+            {
+                "role": "user",
+                "content": _build_content(raw_text, image_bytes, user_instructions),
+            },
+        ]
+
+    with start_span("llm_call", {"llm.model": model, "llm.tier": tier}) as span:
+        started = time.perf_counter()
+        try:
+            with LLM_CALLS_IN_FLIGHT.track_inprogress():
+                completion = get_client().chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=0,
+                    response_format={"type": "json_object"},
+                )
+        except Exception as exc:
+            # Cualquier fallo de la API se expone como ValueError hacia arriba
+            record_llm_error("api")
+            raise ValueError(f"Error al llamar a la API de OpenAI: {exc}") from exc
+
+        llm_seconds = time.perf_counter() - started
+
+        usage = getattr(completion, "usage", None)
+        prompt_tokens = completion_tokens = cost_usd = None
+        if usage is not None:
+            prompt_tokens, completion_tokens = usage.prompt_tokens, usage.completion_tokens
+            cost_usd = estimate_cost_usd(model, prompt_tokens, completion_tokens)
+            span.set_attribute("llm.prompt_tokens", prompt_tokens)
+            span.set_attribute("llm.completion_tokens", completion_tokens)
+            span.set_attribute("llm.total_tokens", usage.total_tokens)
+            if cost_usd is not None:
+                span.set_attribute("llm.cost_usd", cost_usd)
+        # Se registra aunque la respuesta resulte inválida: la llamada igual se pagó
+        record_llm_call(tier, model, llm_seconds, prompt_tokens, completion_tokens, cost_usd)
+
+    content = completion.choices[0].message.content
+    with start_span("parse_json", {"llm.response_chars": len(content or "")}):
+        data = _parse_model_json(content)
+    if not isinstance(data, dict):
+        record_llm_error("invalid_json")
+        raise ModelOutputError("La respuesta del modelo no es un objeto JSON.")
+
+    info = ExtractionInfo(
+        tier=tier,
+        model=model,
+        llm_ms=round(llm_seconds * 1000, 1),
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        cost_usd=cost_usd,
+    )
+    return data, info
 
 
 def classify_and_extract(
     raw_text: Optional[str] = None,
-    image_bytes: Optional[bytes] = None,
+    image_bytes: Optional[ImageInput] = None,
+    model: Optional[str] = None,
+    tier: str = "default",
 ) -> ExtractedDocument:
     """
     Envía el documento al modelo de OpenAI (texto, imagen o ambos),
     clasifica el tipo y extrae los campos estructurados.
+    `model` (por defecto OPENAI_MODEL) y `tier` los decide el ruteo (model_routing).
     """
+    model = model or settings.openai_model
     if not raw_text and not image_bytes:
         raise ValueError("Se requiere al menos texto o imagen para analizar el documento.")
 
-    messages = [
-        {
-            "role": "system",
-            "content": [{"type": "text", "text": SYSTEM_PROMPT}],
-        },
-        {
-            "role": "user",
-            "content": _build_content(raw_text, image_bytes),
-        },
-    ]
-
-    try:
-        completion = client.chat.completions.create(
-            model=settings.openai_model,
-            messages=messages,
-            temperature=0,
-            response_format={"type": "json_object"},
-        )
-    except Exception as exc:
-        # Cualquier fallo de la API se expone como ValueError hacia arriba
-        raise ValueError(f"Error al llamar a la API de OpenAI: {exc}") from exc
-
-    content = completion.choices[0].message.content
-    data = _parse_model_json(content)
+    data, info = _request_json(SYSTEM_PROMPT, raw_text, image_bytes, model, tier)
 
     # doc_type
     try:
         doc_type = DocumentType(data["doc_type"])
     except Exception as exc:
-        raise ValueError(f"doc_type inválido en la respuesta del modelo: {data.get('doc_type')}") from exc
+        record_llm_error("invalid_doc_type")
+        raise ModelOutputError(f"doc_type inválido en la respuesta del modelo: {data.get('doc_type')}") from exc
 
     # Submodelos
     cedula_model: Optional[CedulaData] = None
@@ -183,12 +302,17 @@ def classify_and_extract(
     acta_payload = data.get("acta_seguro")
     contrato_payload = data.get("contrato")
 
-    if cedula_payload:
-        cedula_model = CedulaData(**cedula_payload)
-    if acta_payload:
-        acta_model = ActaSeguroData(**acta_payload)
-    if contrato_payload:
-        contrato_model = ContratoData(**contrato_payload)
+    try:
+        if cedula_payload:
+            cedula_model = CedulaData(**cedula_payload)
+        if acta_payload:
+            acta_model = ActaSeguroData(**acta_payload)
+        if contrato_payload:
+            contrato_model = ContratoData(**contrato_payload)
+    except ValueError as exc:
+        # Incluye ValidationError de pydantic (campos con formato inválido)
+        record_llm_error("invalid_fields")
+        raise ModelOutputError(f"Campos inválidos en la respuesta del modelo: {exc}") from exc
 
     extracted = ExtractedDocument(
         doc_type=doc_type,
@@ -198,6 +322,30 @@ def classify_and_extract(
         contrato=contrato_model,
         quality_score=0.0,  # se calcula luego en evaluate_quality
         issues=[],
+        extraction=info,
     )
 
     return extracted
+
+
+def extract_fields(
+    raw_text: Optional[str],
+    image_bytes: Optional[ImageInput],
+    schema: Dict[str, Dict[str, str]],
+    model: Optional[str] = None,
+    tier: str = "field",
+) -> Tuple[Dict[str, Any], ExtractionInfo]:
+    """
+    Pide al modelo solo los campos de `schema` ({sección: {campo: tipo}}), para
+    corregir los que fallaron en evaluate_quality sin re-procesar todo el documento.
+    Devuelve el JSON parseado (misma forma que `schema`) y los datos de la llamada.
+    """
+    model = model or settings.openai_model
+    if not raw_text and not image_bytes:
+        raise ValueError("Se requiere al menos texto o imagen para analizar el documento.")
+
+    instructions = (
+        "Devuelve SOLO un JSON válido con esta estructura exacta "
+        f"(tipos indicados como texto): {json.dumps(schema, ensure_ascii=False)}"
+    )
+    return _request_json(FIELDS_SYSTEM_PROMPT, raw_text, image_bytes, model, tier, instructions)
@@ -1,17 +1,22 @@
 from typing import Dict, Any, List
 import io
 
-import fitz  
+from .tracing import start_span
 
 
 def extract_text_from_pdf(file_bytes: bytes) -> Dict[str, Any]:
+    # Import diferido: PyMuPDF solo se carga al recibir el primer PDF (o en el warm-up)
+    import fitz
+
     pages: List[str] = []
 
     with fitz.open(stream=io.BytesIO(file_bytes), filetype="pdf") as doc:
-        for page in doc:
-            text = page.get_text("text")
-            if text is None:
-                text = ""
+        for number, page in enumerate(doc, start=1):
+            with start_span("pdf_page", {"pdf.page_number": number}) as span:
+                text = page.get_text("text")
+                if text is None:
+                    text = ""
+                span.set_attribute("pdf.page_chars", len(text))
             pages.append(text)
 
     full_text = "\n\n".join(pages)
@@ -22,3 +27,56 @@ def extract_text_from_pdf(file_bytes: bytes) -> Dict[str, Any]:
         "full_text": full_text,
         "has_text": has_text,
     }
+
+
+# Detección de páginas en blanco: se renderizan a baja resolución en grises y una
+# página es "en blanco" si casi ningún pixel es bastante más oscuro que el fondo
+_BLANK_DPI = 36
+_BLANK_INK_DELTA = 48
+_BLANK_MAX_INK = 0.001
+
+
+def inspect_scanned_pages(file_bytes: bytes, page_numbers: List[int]) -> Dict[int, Dict[str, Any]]:
+    """
+    Rasgos de las páginas sin texto (1-based) para segmentar paquetes:
+    `size` (ancho, alto en puntos) y `blank` (hoja en blanco o separadora).
+    """
+    import fitz
+
+    info: Dict[int, Dict[str, Any]] = {}
+    with fitz.open(stream=io.BytesIO(file_bytes), filetype="pdf") as doc:
+        for number in page_numbers:
+            page = doc[number - 1]
+            pix = page.get_pixmap(dpi=_BLANK_DPI, colorspace=fitz.csGRAY, alpha=False)
+            histogram = [0] * 256
+            for value in pix.samples:
+                histogram[value] += 1
+
+            # Fondo = mediana de los pixeles (el papel ocupa casi toda la hoja)
+            total = pix.width * pix.height
+            seen = 0
+            for background, count in enumerate(histogram):
+                seen += count
+                if seen * 2 >= total:
+                    break
+            ink = sum(histogram[: max(background - _BLANK_INK_DELTA, 0)])
+
+            info[number] = {
+                "size": (round(page.rect.width), round(page.rect.height)),
+                "blank": ink <= total * _BLANK_MAX_INK,
+            }
+    return info
+
+
+def render_pdf_pages(file_bytes: bytes, page_numbers: List[int], dpi: int = 150) -> List[bytes]:
+    """Renderiza páginas (1-based) como JPEG, para páginas escaneadas sin texto."""
+    import fitz
+
+    images: List[bytes] = []
+    with fitz.open(stream=io.BytesIO(file_bytes), filetype="pdf") as doc:
+        for number in page_numbers:
+            with start_span("pdf_render", {"pdf.page_number": number}) as span:
+                image = doc[number - 1].get_pixmap(dpi=dpi).tobytes("jpeg")
+                span.set_attribute("pdf.image_bytes", len(image))
+            images.append(image)
+    return images
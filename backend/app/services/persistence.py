@@ -0,0 +1,189 @@
+import logging
+import time
+from typing import Callable, List, Optional, Tuple, TypeVar
+
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from ..config import settings
+from ..db import is_database_locked
+from ..models import DocumentRecord, UploadRecord
+from ..schemas.documents import ExtractedDocument
+from .analytics import (
+    apply_rollup_increments,
+    collect_rollup_increments,
+    new_rollup_increments,
+    replace_quality_rollups,
+    update_quality_rollups,
+)
+from .identifiers import index_identifiers, replace_identifiers
+from .image_hash import index_image_hash
+from .metrics import record_db_lock_retry
+from .search import index_document
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# (nombre de archivo, documento extraído, sha256 del archivo original, dHash si es imagen)
+PendingDocument = Tuple[str, ExtractedDocument, Optional[str], Optional[str]]
+
+# (documento extraído, página inicial, página final) de un PDF paquete
+BundleSegment = Tuple[ExtractedDocument, int, int]
+
+
+def _commit_with_retry(db: Session, write: Callable[[], T]) -> T:
+    """
+    Ejecuta `write` y hace commit. Si otro proceso retiene el lock de escritura
+    de SQLite más allá de busy_timeout, deshace y reintenta la transacción
+    completa con espera exponencial (hasta SQLITE_WRITE_RETRIES veces).
+    """
+    attempt = 0
+    while True:
+        try:
+            result = write()
+            db.commit()
+            return result
+        except Exception as exc:
+            db.rollback()
+            if not is_database_locked(exc) or attempt >= settings.sqlite_write_retries:
+                raise
+            attempt += 1
+            record_db_lock_retry()
+            logger.warning("Base de datos bloqueada; reintento %d del commit", attempt)
+            time.sleep(min(0.05 * 2 ** attempt, 1.0))
+
+
+def _add_document(
+    db: Session,
+    filename: str,
+    extracted: ExtractedDocument,
+    content_sha256: Optional[str] = None,
+    image_hash: Optional[str] = None,
+    **links,
+) -> DocumentRecord:
+    """
+    Inserta el documento, su índice de búsqueda y sus identificadores sin hacer commit.
+    `links` son las columnas del paquete de origen (upload_id, page_from, page_to).
+    """
+    record = DocumentRecord(
+        filename=filename,
+        doc_type=extracted.doc_type.value,
+        quality_score=extracted.quality_score,
+        payload_json=extracted.model_dump_json(),
+        content_sha256=content_sha256,
+        image_dhash=image_hash,
+        **links,
+    )
+    db.add(record)
+    db.flush()  # asigna record.id sin cerrar la transacción
+    index_document(db, record, extracted)
+    index_identifiers(db, record, extracted)
+    if image_hash:
+        index_image_hash(db, record, image_hash)
+    return record
+
+
+def save_document(
+    db: Session,
+    filename: str,
+    extracted: ExtractedDocument,
+    content_sha256: Optional[str] = None,
+    image_hash: Optional[str] = None,
+) -> DocumentRecord:
+    """
+    Persiste el documento procesado y actualiza los índices derivados
+    (búsqueda de texto completo, identificadores, hash perceptual, agregaciones
+    de calidad) en la misma transacción.
+    """
+    def write() -> DocumentRecord:
+        record = _add_document(db, filename, extracted, content_sha256, image_hash)
+        update_quality_rollups(db, record, extracted)
+        return record
+
+    record = _commit_with_retry(db, write)
+    db.refresh(record)
+    return record
+
+
+def save_documents(db: Session, items: List[PendingDocument]) -> List[int]:
+    """
+    Persiste varios documentos en una sola transacción (group commit).
+    Las agregaciones de calidad se acumulan y se aplican una vez por lote.
+    Devuelve los ids en el mismo orden de `items`.
+    """
+    def write() -> List[DocumentRecord]:
+        totals, issues = new_rollup_increments()
+        records = []
+        for filename, extracted, content_sha256, image_hash in items:
+            record = _add_document(db, filename, extracted, content_sha256, image_hash)
+            collect_rollup_increments(record, extracted, totals, issues)
+            records.append(record)
+        apply_rollup_increments(db, totals, issues)
+        return records
+
+    records = _commit_with_retry(db, write)
+    return [r.id for r in records]
+
+
+def save_bundle(
+    db: Session,
+    filename: str,
+    content_sha256: Optional[str],
+    page_count: int,
+    segments: List[BundleSegment],
+) -> Tuple[int, List[int]]:
+    """
+    Persiste un PDF paquete: el upload y un documento por segmento, enlazados
+    con upload_id, en una sola transacción. Devuelve el id del upload y los
+    ids de los documentos en el orden de `segments`.
+    """
+    def write() -> Tuple[UploadRecord, List[DocumentRecord]]:
+        upload = UploadRecord(filename=filename, content_sha256=content_sha256, page_count=page_count)
+        db.add(upload)
+        db.flush()
+
+        totals, issues = new_rollup_increments()
+        records = []
+        for extracted, page_from, page_to in segments:
+            # El hash es del paquete completo: queda en el upload, no en cada segmento
+            record = _add_document(
+                db,
+                filename,
+                extracted,
+                upload_id=upload.id,
+                page_from=page_from,
+                page_to=page_to,
+            )
+            collect_rollup_increments(record, extracted, totals, issues)
+            records.append(record)
+        apply_rollup_increments(db, totals, issues)
+        return upload, records
+
+    upload, records = _commit_with_retry(db, write)
+    return upload.id, [r.id for r in records]
+
+
+def update_document(
+    db: Session,
+    record: DocumentRecord,
+    previous: ExtractedDocument,
+    extracted: ExtractedDocument,
+) -> DocumentRecord:
+    """
+    Reemplaza el resultado de un documento ya guardado (re-extracción de campos)
+    y sus índices derivados en una sola transacción; marca updated_at.
+    """
+    def write() -> DocumentRecord:
+        replace_quality_rollups(db, record, previous, extracted)
+        record.payload_json = extracted.model_dump_json()
+        record.quality_score = extracted.quality_score
+        record.updated_at = func.now()
+        db.flush()
+        index_document(db, record, extracted)
+        replace_identifiers(db, record, extracted)
+        return record
+
+    record = _commit_with_retry(db, write)
+    db.refresh(record)
+    return record
@@ -0,0 +1,127 @@
+import logging
+import time
+import typing
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from fastapi import HTTPException, Request, Response
+from pydantic import BaseModel
+
+
+logger = logging.getLogger(__name__)
+
+# Por debajo de este tamaño comprimir no compensa (mismo umbral que GZipMiddleware)
+COMPRESSION_MINIMUM_SIZE = 1000
+
+# Nivel de brotli para respuestas dinámicas: buena relación compresión / CPU
+BROTLI_QUALITY = 5
+
+# Formato include/exclude de pydantic: {"raw_text": True, "acta_seguro": {"coberturas": True}}
+Projection = Dict[str, Any]
+
+
+def _nested_model(annotation: Any) -> Tuple[Optional[Type[BaseModel]], bool]:
+    """Modelo anidado de un campo (Optional[Model] o List[Model]) y si es una lista."""
+    args = [a for a in typing.get_args(annotation) if a is not type(None)]
+    if typing.get_origin(annotation) is typing.Union and len(args) == 1:
+        annotation = args[0]
+
+    is_list = typing.get_origin(annotation) in (list, typing.List)
+    if is_list:
+        annotation = (typing.get_args(annotation) or (None,))[0]
+
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation, is_list
+    return None, is_list
+
+
+def _add_path(projection: Projection, path: List[str], model: Type[BaseModel], raw: str) -> None:
+    name, rest = path[0], path[1:]
+    field = model.model_fields.get(name)
+    if field is None:
+        raise HTTPException(status_code=400, detail=f"Campo desconocido: '{raw}'")
+
+    if not rest:
+        projection[name] = True
+        return
+
+    nested, is_list = _nested_model(field.annotation)
+    if nested is None:
+        raise HTTPException(status_code=400, detail=f"Campo desconocido: '{raw}'")
+
+    current = projection.get(name)
+    if current is True:
+        # El campo completo ya está incluido
+        return
+    if current is None:
+        current = {}
+        projection[name] = {"__all__": current} if is_list else current
+    elif is_list:
+        current = current["__all__"]
+
+    _add_path(current, rest, nested, raw)
+
+
+def parse_projection(value: Optional[str], model: Type[BaseModel]) -> Optional[Projection]:
+    """
+    Convierte "raw_text,acta_seguro.coberturas" en el formato include/exclude de pydantic.
+    Los campos se validan contra el modelo: un nombre desconocido responde 400.
+    """
+    if not value:
+        return None
+
+    projection: Projection = {}
+    for raw in value.split(","):
+        raw = raw.strip()
+        if raw:
+            _add_path(projection, raw.split("."), model, raw)
+    return projection or None
+
+
+def _brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def json_response(
+    request: Request,
+    model: BaseModel,
+    include: Optional[Projection] = None,
+    exclude: Optional[Projection] = None,
+) -> Response:
+    """
+    Serializa el modelo con el serializador de pydantic-core (sin pasar por
+    jsonable_encoder), aplicando la proyección de campos. Si el cliente acepta
+    brotli y el cuerpo es grande, lo comprime aquí; si no, GZipMiddleware se
+    encarga del gzip. Registra el tamaño y los tiempos en el log y en Server-Timing.
+    """
+    start = time.perf_counter()
+    body = model.model_dump_json(include=include, exclude=exclude).encode("utf-8")
+    serialize_ms = (time.perf_counter() - start) * 1000
+    raw_size = len(body)
+
+    headers = {"Vary": "Accept-Encoding"}
+    timings = [f"serialize;dur={serialize_ms:.2f}"]
+
+    accepts_br = "br" in request.headers.get("accept-encoding", "")
+    brotli = _brotli() if accepts_br and raw_size >= COMPRESSION_MINIMUM_SIZE else None
+    if brotli is not None:
+        start = time.perf_counter()
+        body = brotli.compress(body, quality=BROTLI_QUALITY)
+        timings.append(f"compress;dur={(time.perf_counter() - start) * 1000:.2f}")
+        headers["Content-Encoding"] = "br"
+
+    headers["Server-Timing"] = ", ".join(timings)
+
+    logger.info(
+        "%s %s: %d bytes JSON%s, serializado en %.2f ms",
+        request.method,
+        request.url.path,
+        raw_size,
+        f" ({len(body)} con brotli)" if brotli is not None else "",
+        serialize_ms,
+    )
+
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,164 @@
+import json
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import String, type_coerce
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..db import reclaim_free_pages
+from ..models import DocumentRecord
+from .archive_store import archive_relative_path, write_archive_file
+from .search import strip_archived_text
+
+logger = logging.getLogger(__name__)
+
+# updated_at tal como está guardado: func.now() y los datetime de Python se
+# serializan distinto en SQLite, así que se compara el valor crudo
+_STORED_UPDATED_AT = type_coerce(DocumentRecord.updated_at, String)
+
+
+def _as_datetime(value: Any) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value))
+
+
+def archive_batch(
+    db: Session, cutoff: datetime, batch_size: int, after_id: int = 0
+) -> Tuple[int, int, int]:
+    """
+    Archiva un lote de documentos creados antes de `cutoff` con id mayor que `after_id`.
+
+    1. Lee el lote (solo lectura).
+    2. Escribe un archivo comprimido por mes, fuera de cualquier transacción.
+    3. En una transacción corta deja las filas como stub (sin payload), solo si
+       su updated_at sigue siendo el leído: una re-extracción que se confirmó
+       entre la lectura y el stub no se pierde; esa fila se salta.
+
+    Devuelve (último id leído, archivados, saltados); último id 0 cuando ya no quedan.
+    """
+    rows = (
+        db.query(DocumentRecord, _STORED_UPDATED_AT)
+        .filter(DocumentRecord.archived_at.is_(None))
+        .filter(DocumentRecord.created_at < cutoff)
+        .filter(DocumentRecord.id > after_id)
+        .order_by(DocumentRecord.id)
+        .limit(batch_size)
+        .all()
+    )
+    if not rows:
+        return 0, 0, 0
+    records = [r for r, _ in rows]
+    read_versions = {r.id: stored for r, stored in rows}
+
+    by_month: Dict[Tuple[int, int], List[DocumentRecord]] = defaultdict(list)
+    for r in records:
+        created_at = _as_datetime(r.created_at)
+        by_month[(created_at.year, created_at.month)].append(r)
+
+    # Filas agrupadas por archivo y por el updated_at leído
+    ids_by_version: Dict[Tuple[str, Any], List[int]] = defaultdict(list)
+    for (year, month), month_records in by_month.items():
+        relative_path = archive_relative_path(
+            year, month, month_records[0].id, month_records[-1].id
+        )
+        entries = []
+        for r in month_records:
+            try:
+                payload = json.loads(r.payload_json) if r.payload_json else {}
+            except json.JSONDecodeError:
+                payload = {}
+            entries.append(
+                {
+                    "id": r.id,
+                    "filename": r.filename,
+                    "doc_type": r.doc_type,
+                    "quality_score": r.quality_score,
+                    "created_at": r.created_at,
+                    "payload": payload,
+                }
+            )
+        write_archive_file(relative_path, entries)
+        for r in month_records:
+            ids_by_version[(relative_path, read_versions[r.id])].append(r.id)
+    read_ids = [r.id for r in records]
+
+    # Cerrar la lectura antes de abrir la transacción de escritura
+    db.rollback()
+
+    now = datetime.now(timezone.utc)
+    try:
+        for (relative_path, updated_at), ids in ids_by_version.items():
+            unchanged = (
+                DocumentRecord.updated_at.is_(None)
+                if updated_at is None
+                else _STORED_UPDATED_AT == updated_at
+            )
+            db.query(DocumentRecord).filter(
+                DocumentRecord.id.in_(ids),
+                DocumentRecord.archived_at.is_(None),
+                unchanged,
+            ).update(
+                {
+                    DocumentRecord.payload_json: "",
+                    DocumentRecord.archived_at: now,
+                    DocumentRecord.archive_path: relative_path,
+                },
+                synchronize_session=False,
+            )
+        archived_ids = [
+            row.id
+            for row in db.query(DocumentRecord.id).filter(
+                DocumentRecord.id.in_(read_ids),
+                DocumentRecord.archived_at == now,
+            )
+        ]
+        strip_archived_text(db, archived_ids)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    return read_ids[-1], len(archived_ids), len(read_ids) - len(archived_ids)
+
+
+def archive_old_documents(
+    db: Session,
+    retention_days: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    max_batches: Optional[int] = None,
+) -> int:
+    """
+    Aplica la política de retención: archiva por lotes los documentos con más de
+    `retention_days` días. Es incremental: puede interrumpirse y retomarse.
+    Después de cada lote se devuelven al sistema hasta ARCHIVE_VACUUM_PAGES páginas
+    liberadas, para que el archivo de la BD (y sus backups) se achique.
+    Devuelve el total de documentos archivados.
+    """
+    retention_days = settings.retention_days if retention_days is None else retention_days
+    batch_size = batch_size or settings.archive_batch_size
+    # created_at se guarda en UTC (CURRENT_TIMESTAMP) y sin zona en SQLite
+    cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=retention_days)
+
+    total = 0
+    skipped = 0
+    batches = 0
+    last_id = 0
+    while max_batches is None or batches < max_batches:
+        last_id, archived, batch_skipped = archive_batch(db, cutoff, batch_size, last_id)
+        if last_id == 0:
+            break
+        total += archived
+        skipped += batch_skipped
+        batches += 1
+        reclaim_free_pages(settings.archive_vacuum_pages)
+
+    if skipped:
+        logger.warning(
+            "%d documentos modificados durante el archivado quedan para la próxima ejecución",
+            skipped,
+        )
+    return total
@@ -0,0 +1,227 @@
+import re
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from ..models import DocumentRecord
+from ..schemas.documents import ExtractedDocument
+from .archive_store import load_payload
+from .identifiers import canonicalize_identifier
+
+
+FTS_TABLE = "documents_fts"
+
+# Columnas del índice. El rowid de la tabla FTS es el id del DocumentRecord.
+FTS_COLUMNS = [
+    "filename",
+    "nombres",
+    "identificaciones",
+    "objeto",
+    "coberturas",
+    "raw_text",
+]
+
+# Pesos bm25 en el mismo orden que FTS_COLUMNS: los campos clave pesan más que el texto crudo
+FTS_WEIGHTS = [2.0, 5.0, 8.0, 3.0, 3.0, 1.0]
+
+SNIPPET_TOKENS = 16
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def is_search_supported(engine: Engine) -> bool:
+    """FTS5 solo está disponible cuando la base de datos es SQLite."""
+    return engine.dialect.name == "sqlite"
+
+
+def ensure_search_index(engine: Engine) -> None:
+    """
+    Crea la tabla virtual FTS5 si no existe.
+    Si se acaba de crear, la puebla con los documentos ya persistidos.
+    """
+    if not is_search_supported(engine):
+        return
+
+    with engine.begin() as conn:
+        exists = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": FTS_TABLE},
+        ).first()
+        if exists:
+            return
+
+        columns = ", ".join(FTS_COLUMNS)
+        conn.execute(
+            text(
+                f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+                f"{columns}, tokenize = 'unicode61 remove_diacritics 2')"
+            )
+        )
+        weights = ", ".join(str(w) for w in FTS_WEIGHTS)
+        conn.execute(
+            text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) VALUES ('rank', :rank)"),
+            {"rank": f"bm25({weights})"},
+        )
+
+    with Session(bind=engine) as db:
+        rebuild_search_index(db)
+
+
+def _join(values: List[Optional[str]]) -> str:
+    # dict.fromkeys elimina duplicados conservando el orden
+    return " ".join(dict.fromkeys(v for v in values if v))
+
+
+def _search_fields(filename: str, payload: Dict[str, Any]) -> Dict[str, str]:
+    """Obtiene el texto de cada columna del índice a partir del payload del documento."""
+    cedula = payload.get("cedula") or {}
+    acta = payload.get("acta_seguro") or {}
+    contrato = payload.get("contrato") or {}
+
+    nombres = _join(
+        [
+            cedula.get("nombres"),
+            cedula.get("apellidos"),
+            acta.get("compania"),
+            acta.get("tomador_asegurado"),
+            contrato.get("contratante_nombre"),
+            contrato.get("contratista_nombre"),
+        ]
+    )
+
+    # Los identificadores se indexan tal cual y sin puntos ni espacios,
+    # para que "1.098.765.432" y "1098765432" encuentren el mismo documento.
+    ids = [
+        cedula.get("numero"),
+        acta.get("numero_poliza"),
+        acta.get("identificacion"),
+        acta.get("nit_compania"),
+        contrato.get("numero_contrato"),
+        contrato.get("contratante_nit"),
+        contrato.get("contratista_identificacion"),
+    ]
+    identificaciones = _join(ids + [canonicalize_identifier(v) for v in ids if v])
+
+    coberturas = _join([c.get("nombre") for c in acta.get("coberturas") or []])
+
+    return {
+        "filename": filename or "",
+        "nombres": nombres,
+        "identificaciones": identificaciones,
+        "objeto": contrato.get("objeto") or "",
+        "coberturas": coberturas,
+        "raw_text": payload.get("raw_text") or "",
+    }
+
+
+def _insert_row(db: Session, document_id: int, fields: Dict[str, str]) -> None:
+    columns = ", ".join(FTS_COLUMNS)
+    params = ", ".join(f":{c}" for c in FTS_COLUMNS)
+    db.execute(
+        text(f"INSERT OR REPLACE INTO {FTS_TABLE}(rowid, {columns}) VALUES (:rowid, {params})"),
+        {"rowid": document_id, **fields},
+    )
+
+
+def index_document(db: Session, record: DocumentRecord, extracted: ExtractedDocument) -> None:
+    """
+    Agrega el documento al índice de búsqueda.
+    Se ejecuta dentro de la transacción del insert, por lo que el índice queda en sincronía.
+    """
+    if not is_search_supported(db.get_bind()):
+        return
+
+    payload = extracted.model_dump(mode="json")
+    _insert_row(db, record.id, _search_fields(record.filename, payload))
+
+
+def rebuild_search_index(db: Session) -> int:
+    """Regenera el índice completo desde la tabla documents. Devuelve el número de filas indexadas."""
+    if not is_search_supported(db.get_bind()):
+        return 0
+
+    db.execute(text(f"DELETE FROM {FTS_TABLE}"))
+
+    count = 0
+    query = db.query(
+        DocumentRecord.id,
+        DocumentRecord.filename,
+        DocumentRecord.payload_json,
+        DocumentRecord.archive_path,
+    )
+    for row in query.yield_per(500):
+        payload = load_payload(row)
+        if row.archive_path:
+            # Los documentos archivados no conservan el texto completo en el índice
+            payload["raw_text"] = ""
+        _insert_row(db, row.id, _search_fields(row.filename, payload))
+        count += 1
+
+    db.commit()
+    return count
+
+
+def strip_archived_text(db: Session, document_ids: List[int]) -> None:
+    """
+    Vacía raw_text en el índice para documentos archivados, conservando los campos clave.
+    Debe ejecutarse dentro de la transacción que archiva los documentos.
+    """
+    if not document_ids or not is_search_supported(db.get_bind()):
+        return
+
+    for document_id in document_ids:
+        db.execute(
+            text(f"UPDATE {FTS_TABLE} SET raw_text = '' WHERE rowid = :rowid"),
+            {"rowid": document_id},
+        )
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """
+    Convierte el texto libre del usuario en una expresión MATCH segura:
+    cada término va entre comillas (sin operadores FTS) y el último admite prefijo.
+    """
+    tokens = _TOKEN_RE.findall(query or "")
+    if not tokens:
+        return None
+
+    terms = [f'"{t}"' for t in tokens]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def search_documents(
+    db: Session,
+    query: str,
+    doc_type: Optional[str] = None,
+    limit: int = 20,
+) -> List[Dict[str, Any]]:
+    """
+    Busca documentos ordenados por relevancia (bm25) con un fragmento resaltado.
+    El score es positivo: mayor score, más relevante.
+    """
+    match = build_match_query(query)
+    if match is None:
+        return []
+
+    doc_type_filter = "AND d.doc_type = :doc_type" if doc_type else ""
+
+    rows = db.execute(
+        text(
+            f"""
+            SELECT d.id, d.filename, d.doc_type, d.quality_score, d.created_at,
+                   -{FTS_TABLE}.rank AS score,
+                   snippet({FTS_TABLE}, -1, '**', '**', '…', {SNIPPET_TOKENS}) AS snippet
+            FROM {FTS_TABLE}
+            JOIN documents d ON d.id = {FTS_TABLE}.rowid
+            WHERE {FTS_TABLE} MATCH :match {doc_type_filter}
+            ORDER BY {FTS_TABLE}.rank
+            LIMIT :limit
+            """
+        ),
+        {"match": match, "doc_type": doc_type, "limit": limit},
+    ).mappings()
+
+    return [dict(r) for r in rows]
@@ -0,0 +1,181 @@
+import re
+import unicodedata
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..schemas.documents import DocumentType
+
+
+# Palabras clave por tipo (texto en mayúsculas y sin tildes). Son baratas de
+# evaluar y solo sirven para detectar dónde empieza otro documento; el tipo
+# definitivo de cada segmento lo decide el modelo.
+_KEYWORDS: Dict[DocumentType, Tuple[str, ...]] = {
+    DocumentType.CEDULA: (
+        "CEDULA DE CIUDADANIA",
+        "IDENTIFICACION PERSONAL",
+        "REGISTRADURIA",
+        "ESTATURA",
+        "G.S. RH",
+        "FECHA Y LUGAR DE NACIMIENTO",
+    ),
+    DocumentType.ACTA_SEGURO: (
+        "POLIZA",
+        "ASEGURADO",
+        "TOMADOR",
+        "COBERTURA",
+        "ASEGURADORA",
+        "PRIMA",
+    ),
+    DocumentType.CONTRATO: (
+        "CONTRATANTE",
+        "CONTRATISTA",
+        "CLAUSULA",
+        "OBJETO DEL CONTRATO",
+        "LAS PARTES",
+        "CONTRATO DE PRESTACION",
+    ),
+}
+
+# Mínimo de palabras clave distintas para atribuir un tipo a la página
+_MIN_KEYWORD_HITS = 2
+
+# "Página 1 de 3", "PAG. 1/3": primera página de un documento
+_FIRST_PAGE_RE = re.compile(r"\bPAG(?:INA)?\.?\s*1\s*(?:DE|/)\s*\d+")
+
+# Diferencia relativa de tamaño entre dos páginas escaneadas a partir de la cual la
+# segunda se toma como otro documento (ej. una cédula escaneada seguida de un contrato)
+_SCAN_SIZE_TOLERANCE = 0.03
+
+
+class PageFeatures:
+    __slots__ = ("number", "chars", "doc_type", "first_page")
+
+    def __init__(self, number: int, chars: int, doc_type: Optional[DocumentType], first_page: bool) -> None:
+        self.number = number
+        self.chars = chars
+        self.doc_type = doc_type
+        self.first_page = first_page
+
+    @property
+    def is_scan(self) -> bool:
+        return self.chars == 0
+
+
+class Segment:
+    """
+    Páginas consecutivas (1-based, inclusivas) que forman un documento. En un
+    segmento escaneado, `scan_pages` son las páginas a enviar como imagen
+    (sin las hojas en blanco intermedias).
+    """
+
+    __slots__ = ("page_from", "page_to", "doc_type_hint", "is_scan", "scan_pages", "scan_size")
+
+    def __init__(
+        self,
+        page_from: int,
+        doc_type_hint: Optional[DocumentType],
+        is_scan: bool = False,
+        scan_size: Optional[Tuple[int, int]] = None,
+    ) -> None:
+        self.page_from = page_from
+        self.page_to = page_from
+        self.doc_type_hint = doc_type_hint
+        self.is_scan = is_scan
+        self.scan_pages = [page_from] if is_scan else []
+        self.scan_size = scan_size
+
+    @property
+    def page_count(self) -> int:
+        return len(self.scan_pages) if self.is_scan else self.page_to - self.page_from + 1
+
+    def text(self, pages: List[str]) -> str:
+        return "\n\n".join(pages[self.page_from - 1 : self.page_to])
+
+
+def normalize_text(text: str) -> str:
+    """Mayúsculas y sin tildes, para comparar con palabras clave."""
+    decomposed = unicodedata.normalize("NFKD", text.upper())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def page_features(number: int, text: str) -> PageFeatures:
+    """Rasgos baratos de una página: cantidad de texto, tipo probable y marca de primera página."""
+    stripped = text.strip()
+    if not stripped:
+        return PageFeatures(number, 0, None, False)
+
+    normalized = normalize_text(stripped)
+    scores = {
+        doc_type: sum(1 for keyword in keywords if keyword in normalized)
+        for doc_type, keywords in _KEYWORDS.items()
+    }
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    best, best_hits = ranked[0]
+    # Sin suficientes coincidencias, o con empate, la página no define tipo
+    doc_type = best if best_hits >= _MIN_KEYWORD_HITS and best_hits > ranked[1][1] else None
+
+    return PageFeatures(number, len(stripped), doc_type, bool(_FIRST_PAGE_RE.search(normalized)))
+
+
+def _same_size(a: Optional[Tuple[int, int]], b: Optional[Tuple[int, int]]) -> bool:
+    if a is None or b is None:
+        return True
+    return all(abs(x - y) <= max(x, y) * _SCAN_SIZE_TOLERANCE for x, y in zip(a, b))
+
+
+def segment_pages(
+    pages: List[str],
+    scans: Optional[Dict[int, Dict[str, Any]]] = None,
+    max_scan_pages: int = 10,
+) -> List[Segment]:
+    """
+    Divide las páginas de un PDF en documentos. Empieza un segmento nuevo cuando
+    la página tiene un tipo probable distinto al del segmento actual o una marca
+    de "página 1". Las páginas sin tipo claro continúan el segmento actual.
+
+    Las páginas escaneadas (sin texto) consecutivas forman un solo segmento, salvo
+    que cambie el tamaño de hoja (otro documento) o se llegue a `max_scan_pages`.
+    `scans` (de inspect_scanned_pages) da el tamaño de cada página escaneada y
+    si está en blanco: las hojas en blanco se descartan sin cortar el segmento.
+    """
+    segments: List[Segment] = []
+    current: Optional[Segment] = None
+
+    for number, text in enumerate(pages, start=1):
+        features = page_features(number, text)
+
+        if features.is_scan:
+            info = (scans or {}).get(number, {})
+            if info.get("blank"):
+                continue
+            size = info.get("size")
+            if (
+                current is not None
+                and current.is_scan
+                and len(current.scan_pages) < max_scan_pages
+                and _same_size(current.scan_size, size)
+            ):
+                current.page_to = number
+                current.scan_pages.append(number)
+            else:
+                current = Segment(number, None, is_scan=True, scan_size=size)
+                segments.append(current)
+            continue
+
+        starts_new = (
+            current is None
+            or current.is_scan
+            or features.first_page
+            or (
+                features.doc_type is not None
+                and current.doc_type_hint is not None
+                and features.doc_type != current.doc_type_hint
+            )
+        )
+        if starts_new:
+            current = Segment(number, features.doc_type)
+            segments.append(current)
+        else:
+            current.page_to = number
+            current.doc_type_hint = current.doc_type_hint or features.doc_type
+
+    return segments
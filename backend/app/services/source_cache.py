@@ -0,0 +1,85 @@
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+from ..config import settings
+
+# Al superar el límite se borra hasta dejar esta fracción, para no recorrer el
+# directorio en cada archivo nuevo
+_PRUNE_TARGET = 0.8
+
+# Tamaño de la cache según este worker: se mide al primer guardado y después se
+# suma lo que guarda; solo al pasar el límite se vuelve a recorrer el directorio
+# (y con ello se cuenta lo que guardaron los otros workers)
+_cache_bytes: Optional[int] = None
+_cache_lock = threading.Lock()
+
+
+def _source_path(content_sha256: str) -> Path:
+    return settings.source_cache_root / content_sha256[:2] / content_sha256
+
+
+def store_source(content_sha256: str, data: bytes) -> None:
+    """
+    Guarda el archivo original (las imágenes, cuyo contenido no queda en el payload)
+    para re-extraer campos más tarde. Al superar SOURCE_CACHE_MAX_MB se borran
+    los archivos usados hace más tiempo.
+    """
+    if settings.source_cache_max_mb <= 0:
+        return
+
+    target = _source_path(content_sha256)
+    if target.exists():
+        os.utime(target)
+        return
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, target)
+    _account(len(data), settings.source_cache_max_mb * 1024 * 1024)
+
+
+def _account(added: int, max_bytes: int) -> None:
+    global _cache_bytes
+    with _cache_lock:
+        if _cache_bytes is not None:
+            _cache_bytes += added
+            if _cache_bytes <= max_bytes:
+                return
+        _cache_bytes = _prune(max_bytes)
+
+
+def load_source(content_sha256: str) -> Optional[bytes]:
+    """Archivo original guardado para ese SHA-256, o None si no está (o ya se borró)."""
+    target = _source_path(content_sha256)
+    try:
+        data = target.read_bytes()
+        os.utime(target)
+    except OSError:
+        return None
+    return data
+
+
+def _prune(max_bytes: int) -> int:
+    """Recorre la cache y, si supera `max_bytes`, la reduce a _PRUNE_TARGET. Devuelve el tamaño final."""
+    entries = []
+    for path in settings.source_cache_root.glob("*/*"):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue  # otro worker lo borró
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    if total <= max_bytes:
+        return total
+
+    target = max_bytes * _PRUNE_TARGET
+    for _, size, path in sorted(entries):
+        if total <= target:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+    return total
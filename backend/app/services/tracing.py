@@ -0,0 +1,116 @@
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Mapping, Optional, Sequence
+
+from opentelemetry import context, propagate, trace
+
+from ..config import settings
+
+
+TRACER_NAME = "document-intelligence"
+
+# Sin un TracerProvider configurado (TRACING_EXPORTER=none) la API de OpenTelemetry
+# devuelve spans no-op: el costo en el camino crítico es prácticamente nulo.
+_tracer = trace.get_tracer(TRACER_NAME)
+_provider = None
+
+
+@contextmanager
+def start_span(name: str, attributes: Optional[Dict[str, Any]] = None) -> Iterator[trace.Span]:
+    """Span hijo del span actual (también a través de run_in_threadpool)."""
+    with _tracer.start_as_current_span(name, attributes=attributes) as span:
+        yield span
+
+
+@contextmanager
+def start_request_span(
+    name: str,
+    headers: Mapping[str, str],
+    attributes: Optional[Dict[str, Any]] = None,
+) -> Iterator[trace.Span]:
+    """
+    Span raíz del procesamiento de un request. Si ya hay un span activo (el del
+    servidor HTTP) se anida en él; si no, continúa la traza del `traceparent` del
+    cliente y respeta su decisión de muestreo (útil para forzar una traza puntual).
+    """
+    if trace.get_current_span().get_span_context().is_valid:
+        with start_span(name, attributes) as span:
+            yield span
+        return
+
+    token = context.attach(propagate.extract(headers))
+    try:
+        with start_span(name, attributes) as span:
+            yield span
+    finally:
+        context.detach(token)
+
+
+def _json_lines_exporter(path: Path):
+    from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+
+    class JsonLinesSpanExporter(SpanExporter):
+        """Exporta cada span como una línea JSON (formato de ReadableSpan.to_json)."""
+
+        def __init__(self) -> None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._fh = open(path, "a", encoding="utf-8")
+            self._lock = threading.Lock()
+
+        def export(self, spans: Sequence[Any]) -> "SpanExportResult":
+            lines = [span.to_json(indent=None) for span in spans]
+            with self._lock:
+                self._fh.write("\n".join(lines) + "\n")
+                self._fh.flush()
+            return SpanExportResult.SUCCESS
+
+        def shutdown(self) -> None:
+            with self._lock:
+                self._fh.close()
+
+    return JsonLinesSpanExporter()
+
+
+def setup_tracing() -> Optional[str]:
+    """
+    Configura el exportador según TRACING_EXPORTER (none, file u otlp) con muestreo
+    por cabeza: solo TRACING_SAMPLE_RATIO de las trazas nuevas se registran.
+    Los spans se exportan en lote desde un hilo aparte. Devuelve el exportador activo.
+    """
+    global _provider
+
+    exporter_name = settings.tracing_exporter.lower()
+    if exporter_name == "none" or _provider is not None:
+        return None
+
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+    if exporter_name == "file":
+        exporter = _json_lines_exporter(settings.tracing_file_path)
+    elif exporter_name == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+        exporter = OTLPSpanExporter(endpoint=settings.tracing_otlp_endpoint)
+    else:
+        raise ValueError(f"TRACING_EXPORTER no soportado: {settings.tracing_exporter}")
+
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": TRACER_NAME}),
+        sampler=ParentBased(TraceIdRatioBased(settings.tracing_sample_ratio)),
+    )
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    _provider = provider
+    return exporter_name
+
+
+def shutdown_tracing() -> None:
+    """Exporta los spans pendientes antes de terminar."""
+    # El TracerProvider global solo puede configurarse una vez por proceso:
+    # se conserva la referencia para no volver a registrarlo.
+    if _provider is not None:
+        _provider.shutdown()
@@ -9,6 +9,11 @@ from ..schemas.documents import (
 )
 
 
+# Patrones compilados una sola vez (se usan en cada documento)
+_ESTATURA_RE = re.compile(r"ESTATURA\s*[:\-]?\s*([0-9]+(?:[.,][0-9]+)?)\s*M")
+_GRUPO_RH_RE = re.compile(r"G\.?\s*S\.?\s*RH\s*[:\-]?\s*([ABO0][+-])")
+
+
 def _add_issue(
     issues: List[FieldIssue],
     field_name: str,
@@ -36,7 +41,7 @@ def _enrich_cedula_from_text(extracted: ExtractedDocument) -> None:
 
     # Estatura: patrones tipo "ESTATURA: 1.65 M" o "ESTATURA 1,65 M"
     if c.estatura_m is None:
-        m = re.search(r"ESTATURA\s*[:\-]?\s*([0-9]+(?:[.,][0-9]+)?)\s*M", text)
+        m = _ESTATURA_RE.search(text)
         if m:
             value_str = m.group(1).replace(",", ".")
             try:
@@ -46,7 +51,7 @@ def _enrich_cedula_from_text(extracted: ExtractedDocument) -> None:
 
     # Grupo sanguíneo RH: patrones tipo "G.S. RH: O+"
     if not c.grupo_sanguineo_rh:
-        m = re.search(r"G\.?\s*S\.?\s*RH\s*[:\-]?\s*([ABO0][+-])", text)
+        m = _GRUPO_RH_RE.search(text)
         if m:
             group = m.group(1)
             # Algunas veces la O puede aparecer como 0
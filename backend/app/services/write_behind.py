@@ -0,0 +1,172 @@
+import asyncio
+import logging
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from ..schemas.documents import ExtractedDocument
+from .persistence import save_document, save_documents
+
+logger = logging.getLogger(__name__)
+
+_Pending = Tuple[str, ExtractedDocument, Optional[str], Optional[str], "asyncio.Future[int]"]
+
+
+class WriterUnavailableError(RuntimeError):
+    """El escritor no está activo y el documento no se escribió: se puede guardar por otra vía."""
+
+
+class DocumentWriter:
+    """
+    Cola de persistencia con un único escritor.
+
+    Los requests encolan el documento y esperan su id; el escritor agrupa
+    los inserts pendientes en una sola transacción (un fsync por lote),
+    cerrando el lote al llegar a `max_batch` documentos o a `max_latency_ms`
+    desde el primero. El id se devuelve solo cuando el commit terminó.
+
+    Si la tarea del escritor termina por un error inesperado, los documentos
+    encolados fallan con WriterUnavailableError (no se escribieron: el request
+    puede guardarlos directamente) y la tarea se vuelve a iniciar.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        max_batch: int = 50,
+        max_latency_ms: int = 25,
+    ) -> None:
+        self._session_factory = session_factory
+        self._max_batch = max_batch
+        self._max_latency = max_latency_ms / 1000
+        self._queue: "asyncio.Queue[Optional[_Pending]]" = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+        # Lote en escritura: si la tarea muere, su estado es incierto y no se reintenta
+        self._writing: List[_Pending] = []
+        self._stopping = False
+        self.restarts = 0
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._stopping = False
+            self._spawn()
+
+    def _spawn(self) -> None:
+        self._task = asyncio.create_task(self._run())
+        self._task.add_done_callback(self._on_task_done)
+
+    def _on_task_done(self, task: asyncio.Task) -> None:
+        if task is not self._task or (not task.cancelled() and task.exception() is None):
+            return  # terminó normalmente (stop)
+
+        error = None if task.cancelled() else task.exception()
+        logger.error("El escritor de documentos terminó inesperadamente", exc_info=error)
+
+        for item in self._writing:
+            if not item[-1].done():
+                item[-1].set_exception(RuntimeError("Falló la escritura del documento."))
+        self._writing = []
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not None and not item[-1].done():
+                item[-1].set_exception(WriterUnavailableError("El escritor de documentos no está activo."))
+
+        if self._stopping or task.cancelled():
+            return
+        self.restarts += 1
+        self._spawn()
+
+    async def stop(self) -> None:
+        """Procesa todo lo encolado y detiene el escritor."""
+        if self._task is None:
+            return
+        self._stopping = True
+        task = self._task
+        await self._queue.put(None)
+        try:
+            await task
+        except Exception:
+            pass  # ya informado por _on_task_done
+        self._task = None
+
+    async def submit(
+        self,
+        filename: str,
+        extracted: ExtractedDocument,
+        content_sha256: Optional[str] = None,
+        image_hash: Optional[str] = None,
+    ) -> int:
+        """Encola el documento y espera a que el commit sea durable. Devuelve el id."""
+        if self._task is None or self._task.done() or self._stopping:
+            raise WriterUnavailableError("El escritor de documentos no está activo.")
+        future: "asyncio.Future[int]" = asyncio.get_running_loop().create_future()
+        await self._queue.put((filename, extracted, content_sha256, image_hash, future))
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+
+        while not stopping:
+            first = await self._queue.get()
+            if first is None:
+                break
+
+            batch: List[_Pending] = [first]
+            deadline = loop.time() + self._max_latency
+            while len(batch) < self._max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._writing = batch
+            await asyncio.to_thread(self._write_batch, batch)
+            self._writing = []
+
+    def _write_batch(self, batch: List[_Pending]) -> None:
+        items = [item[:4] for item in batch]
+        try:
+            with self._session_factory() as db:
+                ids = save_documents(db, items)
+        except Exception:
+            logger.exception("Falló el group commit de %d documentos; se reintenta uno a uno", len(batch))
+            self._write_one_by_one(batch)
+            return
+
+        for item, document_id in zip(batch, ids):
+            self._resolve(item[-1], result=document_id)
+
+    def _write_one_by_one(self, batch: List[_Pending]) -> None:
+        # Un documento inválido no debe hacer fallar a los demás del lote
+        for filename, extracted, content_sha256, image_hash, future in batch:
+            try:
+                with self._session_factory() as db:
+                    record = save_document(db, filename, extracted, content_sha256, image_hash)
+                self._resolve(future, result=record.id)
+            except Exception as exc:
+                self._resolve(future, error=exc)
+
+    @staticmethod
+    def _resolve(
+        future: "asyncio.Future[int]",
+        result: Optional[int] = None,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        def _set() -> None:
+            if future.done():
+                return
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+        # _write_batch corre en un hilo: los futures se resuelven en su event loop
+        future.get_loop().call_soon_threadsafe(_set)
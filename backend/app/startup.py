@@ -0,0 +1,76 @@
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Tuple
+
+from sqlalchemy import text
+
+from .db import engine
+
+
+logger = logging.getLogger(__name__)
+
+
+class StartupReport:
+    """Duración (ms) de cada fase del arranque, en el orden en que se ejecutaron."""
+
+    def __init__(self) -> None:
+        self.phases: List[Tuple[str, float]] = []
+
+    def add(self, name: str, elapsed_ms: float) -> None:
+        self.phases.append((name, elapsed_ms))
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - start) * 1000)
+
+    @property
+    def total_ms(self) -> float:
+        return sum(ms for _, ms in self.phases)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "phases": [{"name": name, "ms": round(ms, 1)} for name, ms in self.phases],
+            "total_ms": round(self.total_ms, 1),
+        }
+
+    def format(self) -> str:
+        width = max((len(name) for name, _ in self.phases), default=0)
+        lines = [f"  {name:<{width}}  {ms:8.1f} ms" for name, ms in self.phases]
+        lines.append(f"  {'total':<{width}}  {self.total_ms:8.1f} ms")
+        return "\n".join(lines)
+
+    def log(self) -> None:
+        logger.info("Tiempos de arranque:\n%s", self.format())
+
+
+def warm_up_database() -> None:
+    """Abre la primera conexión del pool (aplica los PRAGMA de SQLite)."""
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+
+def warm_up_model_client() -> None:
+    """Importa openai y crea el cliente (pool HTTP) antes del primer documento."""
+    from .services.openai_client import get_client
+
+    get_client()
+
+
+def warm_up_pdf_reader() -> None:
+    """Importa PyMuPDF, que de otro modo se cargaría en el primer PDF recibido."""
+    import fitz  # noqa: F401
+
+
+def run_warmup(report: StartupReport) -> None:
+    """Precarga lo que el primer request pagaría de otro modo, midiendo cada paso."""
+    with report.phase("warmup_database"):
+        warm_up_database()
+    with report.phase("warmup_model_client"):
+        warm_up_model_client()
+    with report.phase("warmup_pdf_reader"):
+        warm_up_pdf_reader()
@@ -0,0 +1,7 @@
+import os
+import sys
+from pathlib import Path
+
+# Settings exige OPENAI_API_KEY; las pruebas no llaman al modelo
+os.environ.setdefault("OPENAI_API_KEY", "test")
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
@@ -0,0 +1,59 @@
+from backend.app.schemas.documents import ContratoData, DocumentType, ExtractedDocument, ExtractionInfo
+from backend.app.services.model_routing import FAST, STRONG, RoutedExtraction
+from backend.app.services.validation import evaluate_quality
+
+
+class FakeExtract:
+    def __init__(self, responses):
+        self.responses = responses
+        self.tiers = []
+
+    def __call__(self, raw_text, image_bytes, model, tier):
+        self.tiers.append(tier)
+        extracted = self.responses[tier].model_copy(deep=True)
+        extracted.extraction = ExtractionInfo(tier=tier, model=model)
+        return extracted
+
+
+def _route(responses):
+    extract = FakeExtract(responses)
+    routed = RoutedExtraction(extract, raw_text="CONTRATO DE PRESTACION", image_bytes=None)
+    assert routed.tier == FAST
+    return routed, extract
+
+
+def test_no_applicable_checks_does_not_escalate():
+    # Contrato sin fechas ni valor: ninguna validación aplica y el score queda en 0.0
+    contrato = ExtractedDocument(
+        doc_type=DocumentType.CONTRATO,
+        raw_text="CONTRATO",
+        contrato=ContratoData(contratante_nit="900.123.456-7", objeto="Prestación de servicios"),
+    )
+    routed, extract = _route({FAST: contrato})
+
+    evaluated = evaluate_quality(routed.run())
+
+    assert evaluated.quality_score == 0.0
+    assert evaluated.issues == []
+    assert routed.escalation_reason(evaluated) is None
+    assert extract.tiers == [FAST]
+
+
+def test_missing_section_escalates():
+    routed, _ = _route({FAST: ExtractedDocument(doc_type=DocumentType.CONTRATO, raw_text="CONTRATO")})
+
+    assert routed.escalation_reason(evaluate_quality(routed.run())) == "missing_section"
+
+
+def test_failed_checks_escalate():
+    contrato = ExtractedDocument(
+        doc_type=DocumentType.CONTRATO, raw_text="CONTRATO", contrato=ContratoData(valor_numerico=-1)
+    )
+    routed, extract = _route({FAST: contrato, STRONG: contrato})
+
+    evaluated = evaluate_quality(routed.run())
+    reason = routed.escalation_reason(evaluated)
+
+    assert reason == "low_quality"
+    routed.escalate(reason)
+    assert extract.tiers == [FAST, STRONG]
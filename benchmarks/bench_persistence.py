@@ -0,0 +1,110 @@
+"""
+Compara inserts/seg: commit por request vs. write-behind con group commit.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.bench_persistence --documents 2000 --concurrency 32
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+def _configure_env(db_path: Path) -> None:
+    # Debe ejecutarse antes de importar backend.app (la config se lee al importar)
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+
+def _sample_documents(n: int):
+    from backend.app.schemas.documents import CedulaData, DocumentType, ExtractedDocument
+
+    return [
+        ExtractedDocument(
+            doc_type=DocumentType.CEDULA,
+            raw_text=f"REPUBLICA DE COLOMBIA CEDULA {i} ESTATURA 1.70 M G.S. RH O+",
+            cedula=CedulaData(numero=f"1.000.{i:03d}", apellidos="PEREZ", nombres="JUAN"),
+            quality_score=1.0,
+        )
+        for i in range(n)
+    ]
+
+
+async def _per_request_commit(docs, concurrency: int) -> float:
+    from backend.app.db import SessionLocal
+    from backend.app.services.persistence import save_document
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    def write(doc) -> None:
+        with SessionLocal() as db:
+            save_document(db, "bench.pdf", doc)
+
+    async def one(doc) -> None:
+        async with semaphore:
+            await asyncio.to_thread(write, doc)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(d) for d in docs))
+    return time.perf_counter() - start
+
+
+async def _write_behind(docs, concurrency: int, max_batch: int, max_latency_ms: int) -> float:
+    from backend.app.db import SessionLocal
+    from backend.app.services.write_behind import DocumentWriter
+
+    writer = DocumentWriter(SessionLocal, max_batch=max_batch, max_latency_ms=max_latency_ms)
+    await writer.start()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(doc) -> None:
+        async with semaphore:
+            await writer.submit("bench.pdf", doc)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(d) for d in docs))
+    elapsed = time.perf_counter() - start
+    await writer.stop()
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--max-batch", type=int, default=50)
+    parser.add_argument("--max-latency-ms", type=int, default=25)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _configure_env(Path(tmp) / "bench.db")
+        from backend.app.db import engine, init_db
+        from backend.app.services.search import ensure_search_index
+
+        init_db()
+        ensure_search_index(engine)
+
+        docs = _sample_documents(args.documents)
+        per_request = asyncio.run(_per_request_commit(docs, args.concurrency))
+        grouped = asyncio.run(
+            _write_behind(docs, args.concurrency, args.max_batch, args.max_latency_ms)
+        )
+        engine.dispose()
+
+    result = {
+        "documents": args.documents,
+        "concurrency": args.concurrency,
+        "per_request_commit_inserts_per_sec": round(args.documents / per_request, 1),
+        "write_behind_inserts_per_sec": round(args.documents / grouped, 1),
+        "speedup": round(per_request / grouped, 2),
+    }
+    json.dump(result, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+"""
+Benchmark de punta a punta de /documents/process con un corpus sintético
+(cédulas, pólizas y contratos en PDF digital y escaneos PNG/JPEG) y un LLM falso local.
+
+Reporta p50/p95/p99 por etapa (texto del PDF, LLM, calidad, persistencia,
+serialización y el request completo), documentos/seg y el pico de RSS por fase.
+El resultado es JSON para comparar corridas entre sí.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.bench_pipeline --documents 300 --concurrency 16 --output bench.json
+    python -m benchmarks.bench_pipeline --documents 300 --baseline bench.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from functools import wraps
+from pathlib import Path
+from typing import Any, Dict, List
+
+from .corpus import DOC_KINDS, corpus_summary, generate_corpus
+from .fake_llm import FakeLLM
+from .stats import RssSampler, summarize_ms
+
+
+def _configure_env(db_path: Path, write_behind: bool) -> None:
+    # Debe ejecutarse antes de importar backend.app (la config se lee al importar)
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    # Las imágenes originales y el archivo histórico también van al directorio
+    # temporal, para no escribir en data/ del repositorio
+    os.environ["SOURCE_CACHE_DIR"] = str(db_path.parent / "sources")
+    os.environ["ARCHIVE_DIR"] = str(db_path.parent / "archive")
+    os.environ["WRITE_BEHIND_ENABLED"] = "true" if write_behind else "false"
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+    # El cliente de OpenAI no se usa: no tiene sentido precargarlo
+    os.environ.setdefault("STARTUP_WARMUP", "false")
+
+
+class StageTimer:
+    """Envuelve las funciones del pipeline en backend.app.main y acumula sus duraciones."""
+
+    def __init__(self) -> None:
+        self.durations_ms: Dict[str, List[float]] = defaultdict(list)
+
+    def record(self, stage: str, elapsed_ms: float) -> None:
+        self.durations_ms[stage].append(elapsed_ms)
+
+    def wrap(self, stage: str, func):
+        @wraps(func)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(stage, (time.perf_counter() - start) * 1000)
+
+        return timed
+
+    def wrap_async(self, stage: str, func):
+        @wraps(func)
+        async def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                self.record(stage, (time.perf_counter() - start) * 1000)
+
+        return timed
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        return {stage: summarize_ms(values) for stage, values in self.durations_ms.items()}
+
+
+def _instrument(main_module, timer: StageTimer, fake_llm: FakeLLM) -> None:
+    main_module.extract_text_from_pdf = timer.wrap("pdf_text", main_module.extract_text_from_pdf)
+    main_module.classify_and_extract = timer.wrap("llm", fake_llm)
+    main_module.extract_fields = timer.wrap("llm_fields", fake_llm.extract_fields)
+    main_module.evaluate_quality = timer.wrap("quality", main_module.evaluate_quality)
+    main_module.save_document = timer.wrap("persist", main_module.save_document)
+
+
+def _server_timing_ms(header: str, name: str) -> float | None:
+    for part in header.split(","):
+        metric, _, params = part.strip().partition(";")
+        if metric == name and params.startswith("dur="):
+            return float(params[4:])
+    return None
+
+
+async def _drive(app, corpus, concurrency: int, exclude: str, timer: StageTimer) -> Dict[str, Any]:
+    import httpx
+
+    semaphore = asyncio.Semaphore(concurrency)
+    errors: Dict[str, int] = defaultdict(int)
+    params = {"exclude": exclude} if exclude else {}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+
+        async def one(doc) -> None:
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post(
+                    "/documents/process",
+                    params=params,
+                    files={"file": (doc.filename, doc.content, doc.mime_type)},
+                )
+                timer.record("request", (time.perf_counter() - start) * 1000)
+
+            if response.status_code != 200:
+                errors[str(response.status_code)] += 1
+                return
+            serialize_ms = _server_timing_ms(response.headers.get("server-timing", ""), "serialize")
+            if serialize_ms is not None:
+                timer.record("serialize", serialize_ms)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(doc) for doc in corpus))
+        elapsed = time.perf_counter() - start
+
+    ok = len(corpus) - sum(errors.values())
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "documents_ok": ok,
+        "errors": dict(errors),
+        "docs_per_sec": round(ok / elapsed, 2) if elapsed else 0.0,
+    }
+
+
+async def _run_pipeline(corpus, args, timer: StageTimer, rss: RssSampler) -> Dict[str, Any]:
+    import backend.app.main as main_module
+
+    fake_llm = FakeLLM(
+        corpus,
+        latency_ms=args.llm_latency_ms,
+        ms_per_kchar=args.llm_ms_per_kchar,
+        jitter=args.llm_jitter,
+        seed=args.seed,
+    )
+    _instrument(main_module, timer, fake_llm)
+    app = main_module.app
+
+    with rss.phase("startup"):
+        lifespan = app.router.lifespan_context(app)
+        await lifespan.__aenter__()
+    try:
+        if main_module.document_writer is not None:
+            writer = main_module.document_writer
+            writer.submit = timer.wrap_async("persist", writer.submit)
+
+        with rss.phase("process"):
+            throughput = await _drive(app, corpus, args.concurrency, args.exclude, timer)
+    finally:
+        await lifespan.__aexit__(None, None, None)
+
+    throughput["startup"] = app.state.startup_report.as_dict()
+    return throughput
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+
+# (ruta en el JSON, True si más alto es mejor)
+_COMPARED_METRICS = [
+    (("throughput", "docs_per_sec"), True),
+    (("stages", "request", "p50_ms"), False),
+    (("stages", "request", "p95_ms"), False),
+    (("stages", "request", "p99_ms"), False),
+    (("stages", "pdf_text", "p95_ms"), False),
+    (("stages", "persist", "p95_ms"), False),
+    (("stages", "serialize", "p95_ms"), False),
+    (("peak_rss_mb", "process"), False),
+]
+
+
+def _lookup(data: Dict[str, Any], path) -> float | None:
+    for key in path:
+        if not isinstance(data, dict) or key not in data:
+            return None
+        data = data[key]
+    return data if isinstance(data, (int, float)) else None
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float) -> bool:
+    """Imprime la comparación en stderr. Devuelve False si alguna métrica empeoró más que `tolerance`."""
+    ok = True
+    print(f"{'métrica':<28} {'base':>10} {'actual':>10} {'cambio':>8}", file=sys.stderr)
+    for path, higher_is_better in _COMPARED_METRICS:
+        old, new = _lookup(baseline, path), _lookup(current, path)
+        if old is None or new is None or old == 0:
+            continue
+        change = (new - old) / old
+        worse = -change if higher_is_better else change
+        flag = "  <-- regresión" if worse > tolerance else ""
+        ok = ok and not flag
+        print(f"{'.'.join(path):<28} {old:>10.2f} {new:>10.2f} {change:>+8.1%}{flag}", file=sys.stderr)
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--kinds", default=",".join(DOC_KINDS), help="cedula,poliza,contrato")
+    parser.add_argument("--min-pages", type=int, default=1)
+    parser.add_argument("--max-pages", type=int, default=3)
+    parser.add_argument("--scan-ratio", type=float, default=0.25, help="Fracción entregada como imagen")
+    parser.add_argument("--image-format", choices=("png", "jpeg", "mixed"), default="mixed")
+    parser.add_argument("--dpi", type=int, default=100)
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0)
+    parser.add_argument("--llm-ms-per-kchar", type=float, default=5.0)
+    parser.add_argument("--llm-jitter", type=float, default=0.3)
+    parser.add_argument("--exclude", default="raw_text", help="Proyección pedida, como el frontend")
+    parser.add_argument("--write-behind", action="store_true")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="-", help="Archivo JSON de salida ('-' para stdout)")
+    parser.add_argument("--baseline", default=None, help="JSON de una corrida anterior para comparar")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Regresión tolerada (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    rss = RssSampler()
+    rss.start()
+    timer = StageTimer()
+
+    with rss.phase("corpus"):
+        start = time.perf_counter()
+        corpus = generate_corpus(
+            args.documents,
+            kinds=[k.strip() for k in args.kinds.split(",") if k.strip()],
+            min_pages=args.min_pages,
+            max_pages=args.max_pages,
+            scan_ratio=args.scan_ratio,
+            image_format=args.image_format,
+            dpi=args.dpi,
+            seed=args.seed,
+        )
+        corpus_seconds = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _configure_env(Path(tmp) / "bench.db", args.write_behind)
+        throughput = asyncio.run(_run_pipeline(corpus, args, timer, rss))
+
+        from backend.app.db import engine
+
+        engine.dispose()
+
+    rss.stop()
+
+    result = {
+        "benchmark": "pipeline",
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "baseline")},
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "git_commit": _git_commit(),
+        },
+        "corpus": {**corpus_summary(corpus), "generation_s": round(corpus_seconds, 3)},
+        "throughput": {k: v for k, v in throughput.items() if k != "startup"},
+        "stages": timer.summary(),
+        "peak_rss_mb": rss.as_dict(),
+        "startup": throughput["startup"],
+    }
+
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output == "-":
+        print(text)
+    else:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        if not compare_results(baseline, result, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Escalamiento de /documents/process con el número de workers de uvicorn.
+
+Para cada valor de --workers levanta `benchmarks.fake_server` (LLM falso, BD SQLite
+compartida y métricas en modo multiproceso) y lo satura en lazo cerrado con
+--concurrency clientes durante --duration segundos. Reporta documentos/seg, la
+aceleración respecto de la primera configuración y verifica la consistencia entre
+procesos: filas guardadas y el contador agregado de /metrics contra las respuestas 200.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.bench_workers --workers 1,2,4,8 --concurrency 64 --duration 20 --output workers.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List
+
+from .corpus import corpus_summary, generate_corpus
+from .loadtest import FakeServer, _int_list
+from .stats import summarize_ms
+
+
+async def _saturate(url: str, corpus, concurrency: int, duration: float) -> Dict[str, Any]:
+    import httpx
+
+    latencies: List[float] = []
+    errors: Dict[str, int] = defaultdict(int)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=120.0) as client:
+        deadline = time.perf_counter() + duration
+
+        async def worker(offset: int) -> None:
+            i = offset
+            while time.perf_counter() < deadline:
+                doc = corpus[i % len(corpus)]
+                i += concurrency
+                start = time.perf_counter()
+                try:
+                    response = await client.post(
+                        "/documents/process",
+                        params={"exclude": "raw_text"},
+                        files={"file": (doc.filename, doc.content, doc.mime_type)},
+                    )
+                    status = str(response.status_code)
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                if status == "200":
+                    latencies.append((time.perf_counter() - start) * 1000)
+                else:
+                    errors[status] += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(n) for n in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+        metrics_text = (await client.get("/metrics")).text
+
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "documents_ok": len(latencies),
+        "errors": dict(errors),
+        "docs_per_sec": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency": summarize_ms(latencies),
+        "metrics": _scrape(metrics_text),
+    }
+
+
+def _scrape(text: str) -> Dict[str, float]:
+    """Suma (sobre todas las etiquetas) de las series que interesan para validar el agregado."""
+    wanted = {
+        'document_process_seconds_count{': "processed_ok",
+        "db_lock_retries_total": "db_lock_retries",
+    }
+    totals: Dict[str, float] = defaultdict(float)
+    for line in text.splitlines():
+        if line.startswith("#"):
+            continue
+        for prefix, key in wanted.items():
+            if line.startswith(prefix) and (key != "processed_ok" or 'outcome="ok"' in line):
+                totals[key] += float(line.rsplit(" ", 1)[1])
+    return dict(totals)
+
+
+def _count_rows(db_path: Path) -> int:
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=_int_list, default=[1, 2, 4])
+    parser.add_argument("--concurrency", type=int, default=64, help="Clientes en lazo cerrado")
+    parser.add_argument("--duration", type=float, default=20.0, help="Segundos por configuración")
+    parser.add_argument("--corpus-size", type=int, default=60)
+    parser.add_argument("--max-pages", type=int, default=3)
+    parser.add_argument("--scan-ratio", type=float, default=0.25)
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0, help="Bajo, para que domine la CPU")
+    parser.add_argument("--write-behind", action="store_true")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="-", help="Archivo JSON de salida ('-' para stdout)")
+    args = parser.parse_args()
+
+    corpus = generate_corpus(
+        args.corpus_size, max_pages=args.max_pages, scan_ratio=args.scan_ratio, seed=args.seed
+    )
+    extra_env = {
+        "WRITE_BEHIND_ENABLED": "true" if args.write_behind else "false",
+        "FAKE_LLM_MS_PER_KCHAR": "0",
+    }
+
+    runs = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for workers in args.workers:
+            with FakeServer(workers, args.port, tmp, args.llm_latency_ms, extra_env) as server:
+                run = asyncio.run(_saturate(server.url, corpus, args.concurrency, args.duration))
+            run = {"workers": workers, **run, "rows_saved": _count_rows(server.db_path)}
+            # Cada 200 debe tener su fila y estar contado en el /metrics agregado
+            run["consistent"] = (
+                run["rows_saved"] == run["documents_ok"]
+                and run["metrics"].get("processed_ok") == run["documents_ok"]
+            )
+            first = runs[0] if runs else run
+            if first["docs_per_sec"]:
+                run["speedup"] = round(run["docs_per_sec"] / first["docs_per_sec"], 2)
+                run["efficiency"] = round(run["speedup"] * first["workers"] / workers, 2)
+            runs.append(run)
+            print(
+                f"{workers:>2} worker(s): {run['docs_per_sec']:>8.2f} docs/s  x{run.get('speedup', 0):<5} "
+                f"p95 {run['latency'].get('p95_ms', float('nan')):>8.1f} ms  "
+                f"errores {sum(run['errors'].values())}  reintentos BD {run['metrics'].get('db_lock_retries', 0):.0f}  "
+                f"{'ok' if run['consistent'] else 'INCONSISTENTE'}",
+                file=sys.stderr,
+            )
+
+    result = {
+        "benchmark": "workers",
+        "config": {k: v for k, v in vars(args).items() if k != "output"},
+        "cpu_count": os.cpu_count(),
+        "corpus": corpus_summary(corpus),
+        "runs": runs,
+    }
+
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output == "-":
+        print(text)
+    else:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
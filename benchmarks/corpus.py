@@ -0,0 +1,234 @@
+"""
+Corpus sintético para benchmarks: cédulas, pólizas y contratos como PDF digital
+(con texto embebido) o como "escaneo" PNG/JPEG (la página rasterizada).
+
+Es reproducible: la misma semilla genera exactamente los mismos bytes.
+"""
+import random
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+DOC_KINDS = ("cedula", "poliza", "contrato")
+
+_NOMBRES = ["JUAN CARLOS", "ANA MARIA", "LUIS FERNANDO", "SANDRA PATRICIA", "JORGE ENRIQUE", "DIANA"]
+_APELLIDOS = ["PEREZ GOMEZ", "RODRIGUEZ DIAZ", "MARTINEZ RUIZ", "GARCIA LOPEZ", "HERNANDEZ CASTRO"]
+_CIUDADES = ["BOGOTA D.C.", "MEDELLIN", "CALI", "BARRANQUILLA", "BUCARAMANGA"]
+_ASEGURADORAS = ["SEGUROS BOLIVAR S.A.", "SURAMERICANA S.A.", "ALLIANZ SEGUROS S.A."]
+_COBERTURAS = ["Responsabilidad civil", "Incendio", "Terremoto", "Hurto", "Daños materiales"]
+_PARRAFO = (
+    "Las partes declaran que conocen y aceptan las condiciones generales y particulares "
+    "del presente documento, las cuales hacen parte integral del mismo. Cualquier "
+    "modificación deberá constar por escrito y ser firmada por ambas partes. "
+)
+
+# Dimensiones de una página carta en puntos
+_PAGE_WIDTH, _PAGE_HEIGHT = 612, 792
+
+
+@dataclass
+class SyntheticDocument:
+    """Un archivo del corpus y el resultado que un extractor perfecto devolvería."""
+
+    filename: str
+    content: bytes
+    mime_type: str
+    doc_type: str  # CEDULA / ACTA_SEGURO / CONTRATO
+    pages: int
+    expected: Dict[str, Any] = field(default_factory=dict)  # sección del payload
+
+    @property
+    def is_scan(self) -> bool:
+        return self.mime_type != "application/pdf"
+
+
+def _numero_cedula(rng: random.Random) -> str:
+    n = rng.randint(10_000_000, 1_199_999_999)
+    return f"{n:,}".replace(",", ".")
+
+
+def _cedula(rng: random.Random, ref: str) -> Tuple[str, Dict[str, Any], str]:
+    data = {
+        "numero": _numero_cedula(rng),
+        "apellidos": rng.choice(_APELLIDOS),
+        "nombres": rng.choice(_NOMBRES),
+        "fecha_nacimiento": f"19{rng.randint(50, 99)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        "lugar_nacimiento": rng.choice(_CIUDADES),
+        "estatura_m": round(rng.uniform(1.50, 1.90), 2),
+        "grupo_sanguineo_rh": rng.choice(["O+", "A+", "B+", "AB-"]),
+        "sexo": rng.choice(["M", "F"]),
+    }
+    text = (
+        "REPUBLICA DE COLOMBIA\nIDENTIFICACION PERSONAL\nCEDULA DE CIUDADANIA\n"
+        f"NUMERO {data['numero']}\nAPELLIDOS {data['apellidos']}\nNOMBRES {data['nombres']}\n"
+        f"FECHA DE NACIMIENTO {data['fecha_nacimiento']}\nLUGAR DE NACIMIENTO {data['lugar_nacimiento']}\n"
+        f"ESTATURA {data['estatura_m']} M  G.S. RH {data['grupo_sanguineo_rh']}  SEXO {data['sexo']}\n"
+        f"Referencia: {ref}\n"
+    )
+    return "CEDULA", data, text
+
+
+def _poliza(rng: random.Random, ref: str) -> Tuple[str, Dict[str, Any], str]:
+    coberturas = [
+        {"nombre": nombre, "monto": f"${rng.randint(1, 900) * 1_000_000:,} COP".replace(",", ".")}
+        for nombre in rng.sample(_COBERTURAS, rng.randint(1, 4))
+    ]
+    data = {
+        "compania": rng.choice(_ASEGURADORAS),
+        "numero_poliza": f"{rng.randint(1000, 9999)}-{rng.randint(10, 99)}",
+        "tomador_asegurado": f"{rng.choice(_NOMBRES)} {rng.choice(_APELLIDOS)}",
+        "identificacion": _numero_cedula(rng),
+        "ciudad_emision": rng.choice(_CIUDADES),
+        "coberturas": coberturas,
+    }
+    lines = "\n".join(f"  {c['nombre']}: {c['monto']}" for c in coberturas)
+    text = (
+        f"{data['compania']}\nCERTIFICADO DE POLIZA DE SEGURO\n"
+        f"POLIZA No. {data['numero_poliza']}\nTOMADOR / ASEGURADO {data['tomador_asegurado']}\n"
+        f"IDENTIFICACION {data['identificacion']}\nCIUDAD DE EMISION {data['ciudad_emision']}\n"
+        f"COBERTURAS\n{lines}\nReferencia: {ref}\n"
+    )
+    return "ACTA_SEGURO", data, text
+
+
+def _contrato(rng: random.Random, ref: str) -> Tuple[str, Dict[str, Any], str]:
+    data = {
+        "numero_contrato": f"{rng.randint(1, 999):03d}-{rng.randint(2020, 2025)}",
+        "contratante_nombre": "CONSTRUCTORA ANDINA S.A.S",
+        "contratante_nit": f"900.{rng.randint(100, 999)}.{rng.randint(100, 999)}-{rng.randint(0, 9)}",
+        "contratista_nombre": f"{rng.choice(_NOMBRES)} {rng.choice(_APELLIDOS)}",
+        "contratista_identificacion": _numero_cedula(rng),
+        "objeto": "Prestación de servicios profesionales de consultoría",
+        "valor_numerico": rng.randint(5, 500) * 1_000_000,
+        "ciudad_firma": rng.choice(_CIUDADES),
+    }
+    text = (
+        f"CONTRATO DE PRESTACION DE SERVICIOS No. {data['numero_contrato']}\n"
+        f"CONTRATANTE {data['contratante_nombre']} NIT {data['contratante_nit']}\n"
+        f"CONTRATISTA {data['contratista_nombre']} C.C. {data['contratista_identificacion']}\n"
+        f"OBJETO {data['objeto']}\nVALOR ${data['valor_numerico']:,}\n"
+        f"CIUDAD DE FIRMA {data['ciudad_firma']}\nReferencia: {ref}\n"
+    ).replace(",", ".")
+    return "CONTRATO", data, text
+
+
+_BUILDERS = {"cedula": _cedula, "poliza": _poliza, "contrato": _contrato}
+
+
+def _pages_text(first_page: str, pages: int, rng: random.Random) -> List[str]:
+    """Primera página con los datos; las demás con cláusulas de relleno."""
+    texts = [first_page]
+    for number in range(2, pages + 1):
+        clauses = "\n\n".join(
+            f"CLAUSULA {number}.{i}. " + _PARRAFO * rng.randint(1, 3) for i in range(1, 5)
+        )
+        texts.append(clauses)
+    return texts
+
+
+def _render_pdf(pages_text: Sequence[str]):
+    import fitz
+
+    doc = fitz.open()
+    for text in pages_text:
+        page = doc.new_page(width=_PAGE_WIDTH, height=_PAGE_HEIGHT)
+        page.insert_textbox(fitz.Rect(54, 54, _PAGE_WIDTH - 54, _PAGE_HEIGHT - 54), text, fontsize=10)
+    # Sin fechas ni ids aleatorios: bytes reproducibles entre corridas
+    doc.set_metadata({})
+    return doc
+
+
+def _pdf_bytes(pages_text: Sequence[str]) -> bytes:
+    doc = _render_pdf(pages_text)
+    try:
+        return doc.tobytes(garbage=3, deflate=True, no_new_id=True)
+    finally:
+        doc.close()
+
+
+def _scan_bytes(first_page: str, image_format: str, dpi: int, rng: random.Random) -> bytes:
+    """Rasteriza la primera página (un escaneo es una sola imagen) con una leve rotación."""
+    import fitz
+
+    doc = _render_pdf([first_page])
+    try:
+        angle = rng.uniform(-1.5, 1.5)
+        matrix = fitz.Matrix(dpi / 72, dpi / 72).prerotate(angle)
+        pixmap = doc[0].get_pixmap(matrix=matrix, alpha=False)
+        if image_format == "jpeg":
+            return pixmap.tobytes("jpeg", jpg_quality=80)
+        return pixmap.tobytes("png")
+    finally:
+        doc.close()
+
+
+def generate_corpus(
+    count: int,
+    kinds: Sequence[str] = DOC_KINDS,
+    min_pages: int = 1,
+    max_pages: int = 3,
+    scan_ratio: float = 0.25,
+    image_format: str = "mixed",
+    dpi: int = 100,
+    seed: int = 42,
+) -> List[SyntheticDocument]:
+    """
+    Genera `count` documentos. Una fracción `scan_ratio` se entrega como imagen
+    (PNG, JPEG o ambos alternados con image_format="mixed"); el resto como PDF
+    de min_pages..max_pages páginas.
+    """
+    rng = random.Random(seed)
+    documents: List[SyntheticDocument] = []
+
+    for i in range(count):
+        kind = kinds[i % len(kinds)]
+        ref = f"BENCH-{seed}-{i:06d}"
+        doc_type, expected, first_page = _BUILDERS[kind](rng, ref)
+
+        if rng.random() < scan_ratio:
+            fmt = image_format if image_format != "mixed" else rng.choice(["png", "jpeg"])
+            content = _scan_bytes(first_page, fmt, dpi, rng)
+            ext, mime = ("jpg", "image/jpeg") if fmt == "jpeg" else ("png", "image/png")
+            pages = 1
+        else:
+            pages = rng.randint(min_pages, max_pages)
+            content = _pdf_bytes(_pages_text(first_page, pages, rng))
+            ext, mime = "pdf", "application/pdf"
+
+        documents.append(
+            SyntheticDocument(
+                filename=f"{kind}-{i:06d}.{ext}",
+                content=content,
+                mime_type=mime,
+                doc_type=doc_type,
+                pages=pages,
+                expected=expected,
+            )
+        )
+
+    return documents
+
+
+def corpus_summary(documents: Sequence[SyntheticDocument]) -> Dict[str, Any]:
+    by_type: Dict[str, int] = {}
+    by_mime: Dict[str, int] = {}
+    for d in documents:
+        by_type[d.doc_type] = by_type.get(d.doc_type, 0) + 1
+        by_mime[d.mime_type] = by_mime.get(d.mime_type, 0) + 1
+    return {
+        "documents": len(documents),
+        "pages": sum(d.pages for d in documents),
+        "bytes": sum(len(d.content) for d in documents),
+        "by_doc_type": by_type,
+        "by_mime_type": by_mime,
+    }
+
+
+def find_reference(text: Optional[str]) -> Optional[str]:
+    """Extrae la referencia BENCH-... que identifica al documento en su texto."""
+    if not text:
+        return None
+    marker = "Referencia: "
+    start = text.find(marker)
+    if start < 0:
+        return None
+    return text[start + len(marker):].split()[0]
@@ -0,0 +1,27 @@
+"""
+Backend con el LLM reemplazado por FakeLLM, para pruebas de carga contra un servidor real.
+
+Uso (desde la raíz del proyecto, con DATABASE_URL apuntando a una BD desechable):
+    FAKE_LLM_LATENCY_MS=300 uvicorn benchmarks.fake_server:app --workers 2
+"""
+import os
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ.setdefault("STARTUP_WARMUP", "false")
+
+import backend.app.main as main_module  # noqa: E402
+
+from .fake_llm import FakeLLM  # noqa: E402
+
+fake_llm = FakeLLM(
+    [],
+    latency_ms=float(os.getenv("FAKE_LLM_LATENCY_MS", "300")),
+    ms_per_kchar=float(os.getenv("FAKE_LLM_MS_PER_KCHAR", "5")),
+    jitter=float(os.getenv("FAKE_LLM_JITTER", "0.3")),
+    seed=os.getpid(),
+    strict=False,
+)
+main_module.classify_and_extract = fake_llm
+main_module.extract_fields = fake_llm.extract_fields
+
+app = main_module.app
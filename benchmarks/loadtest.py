@@ -0,0 +1,302 @@
+"""
+Prueba de carga de lazo abierto contra un backend real (uvicorn) con un LLM falso.
+
+Para cada número de workers levanta `benchmarks.fake_server` y, para cada tasa
+ofrecida (requests/seg), genera llegadas Poisson o en ráfagas durante --duration
+segundos. Las llegadas no esperan a que terminen las anteriores (lazo abierto), y la
+latencia se mide desde el instante programado, así que la cola del servidor se ve.
+Mezcla cargas de PDF/imágenes a /documents/process con lecturas de /documents/history.
+
+El resultado son curvas de saturación (throughput vs. latencia) por configuración, en JSON.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.loadtest --workers 1,2 --rates 2,4,8,16 --duration 20 --output load.json
+    python -m benchmarks.loadtest --url http://127.0.0.1:8000 --rates 1,2 --pattern burst
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .corpus import corpus_summary, generate_corpus
+from .stats import summarize_ms
+
+
+_PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+
+def arrival_offsets(
+    rate: float,
+    duration: float,
+    pattern: str,
+    rng: random.Random,
+    burst_size: int = 10,
+) -> List[float]:
+    """
+    Instantes de llegada (segundos desde el inicio) con tasa media `rate`.
+    poisson: intervalos exponenciales; burst: `burst_size` llegadas simultáneas
+    cada burst_size/rate segundos.
+    """
+    offsets: List[float] = []
+    if pattern == "poisson":
+        t = rng.expovariate(rate)
+        while t < duration:
+            offsets.append(t)
+            t += rng.expovariate(rate)
+    elif pattern == "burst":
+        period = burst_size / rate
+        t = 0.0
+        while t < duration:
+            offsets.extend([t] * burst_size)
+            t += period
+    else:
+        raise ValueError(f"Patrón de llegadas desconocido: {pattern}")
+    return offsets
+
+
+class _Results:
+    def __init__(self) -> None:
+        self.latencies_ms: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.completed = 0
+        self.last_completion = 0.0
+
+
+async def run_point(
+    client,
+    corpus,
+    rate: float,
+    duration: float,
+    pattern: str,
+    history_ratio: float,
+    burst_size: int,
+    seed: int,
+) -> Dict[str, Any]:
+    """Una tasa ofrecida: programa las llegadas, espera a que todas terminen y resume."""
+    import httpx
+
+    rng = random.Random(seed)
+    offsets = arrival_offsets(rate, duration, pattern, rng, burst_size)
+    plan = [
+        ("history", None) if rng.random() < history_ratio else ("process", rng.choice(corpus))
+        for _ in offsets
+    ]
+    results = _Results()
+    loop = asyncio.get_running_loop()
+
+    async def one(kind: str, doc, scheduled: float) -> None:
+        try:
+            if kind == "history":
+                response = await client.get("/documents/history", params={"limit": 20})
+            else:
+                response = await client.post(
+                    "/documents/process",
+                    params={"exclude": "raw_text"},
+                    files={"file": (doc.filename, doc.content, doc.mime_type)},
+                )
+            status = response.status_code
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+
+        finished = loop.time()
+        if status == 200:
+            results.latencies_ms[kind].append((finished - scheduled) * 1000)
+            results.completed += 1
+            results.last_completion = max(results.last_completion, finished)
+        else:
+            results.errors[f"{kind}:{status}"] += 1
+
+    start = loop.time() + 0.1
+    tasks = []
+    for offset, (kind, doc) in zip(offsets, plan):
+        scheduled = start + offset
+        delay = scheduled - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(one(kind, doc, scheduled)))
+    await asyncio.gather(*tasks)
+
+    elapsed = max(results.last_completion - start, duration)
+    all_latencies = [ms for values in results.latencies_ms.values() for ms in values]
+    failed = sum(results.errors.values())
+    return {
+        "offered_rps": rate,
+        "requests": len(offsets),
+        "achieved_rps": round(results.completed / elapsed, 2),
+        "error_rate": round(failed / len(offsets), 4) if offsets else 0.0,
+        "errors": dict(results.errors),
+        "latency": summarize_ms(all_latencies),
+        "by_endpoint": {kind: summarize_ms(values) for kind, values in results.latencies_ms.items()},
+    }
+
+
+def _knee(points: List[Dict[str, Any]], slo_ms: float) -> Optional[float]:
+    """Mayor tasa ofrecida que se sostiene: p95 dentro del SLO, <1% errores y sin cola creciente."""
+    sustained = [
+        p["offered_rps"]
+        for p in points
+        if p["latency"].get("p95_ms", float("inf")) <= slo_ms
+        and p["error_rate"] < 0.01
+        and p["achieved_rps"] >= 0.9 * p["offered_rps"]
+    ]
+    return max(sustained) if sustained else None
+
+
+class FakeServer:
+    """uvicorn benchmarks.fake_server:app en un subproceso, con una BD temporal."""
+
+    def __init__(self, workers: int, port: int, db_dir: str, llm_latency_ms: float, extra_env: Dict[str, str]):
+        self.workers = workers
+        self.port = port
+        self.url = f"http://127.0.0.1:{port}"
+        self.db_path = Path(db_dir) / f"load-{workers}w.db"
+        self.env = {
+            "OPENAI_API_KEY": "benchmark",
+            **os.environ,
+            "DATABASE_URL": f"sqlite:///{self.db_path}",
+            "FAKE_LLM_LATENCY_MS": str(llm_latency_ms),
+            # Los límites de admisión se reparten entre los workers
+            "WEB_CONCURRENCY": str(workers),
+            # /metrics agrega los valores de todos los workers
+            "PROMETHEUS_MULTIPROC_DIR": tempfile.mkdtemp(prefix=f"metrics-{workers}w-", dir=db_dir),
+            **extra_env,
+        }
+        self.process: Optional[subprocess.Popen] = None
+
+    def __enter__(self) -> "FakeServer":
+        self.process = subprocess.Popen(
+            [
+                sys.executable, "-m", "uvicorn", "benchmarks.fake_server:app",
+                "--host", "127.0.0.1", "--port", str(self.port),
+                "--workers", str(self.workers), "--log-level", "warning",
+            ],
+            env=self.env,
+            cwd=_PROJECT_ROOT,
+        )
+        self._wait_ready()
+        return self
+
+    def _wait_ready(self, timeout: float = 60.0) -> None:
+        import httpx
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError("El servidor de prueba terminó al arrancar")
+            try:
+                if httpx.get(f"{self.url}/health", timeout=1.0).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.2)
+        raise RuntimeError("El servidor de prueba no respondió a tiempo")
+
+    def __exit__(self, *exc) -> None:
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+async def run_curve(url: str, corpus, args) -> List[Dict[str, Any]]:
+    import httpx
+
+    limits = httpx.Limits(max_connections=args.max_connections, max_keepalive_connections=args.max_connections)
+    points = []
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=args.timeout) as client:
+        for i, rate in enumerate(args.rates):
+            point = await run_point(
+                client,
+                corpus,
+                rate,
+                args.duration,
+                args.pattern,
+                args.history_ratio,
+                args.burst_size,
+                seed=args.seed + i,
+            )
+            points.append(point)
+            lat = point["latency"]
+            print(
+                f"  {rate:>7.1f} rps ofrecidos -> {point['achieved_rps']:>7.2f} rps, "
+                f"p50 {lat.get('p50_ms', float('nan')):>8.1f} ms, p95 {lat.get('p95_ms', float('nan')):>8.1f} ms, "
+                f"errores {point['error_rate']:.1%}",
+                file=sys.stderr,
+            )
+            await asyncio.sleep(args.cooldown)
+    return points
+
+
+def _float_list(value: str) -> List[float]:
+    return [float(v) for v in value.split(",") if v.strip()]
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=None, help="Backend ya levantado (si no, se levanta fake_server)")
+    parser.add_argument("--workers", type=_int_list, default=[1], help="Lista, ej: 1,2,4")
+    parser.add_argument("--rates", type=_float_list, default=[1, 2, 4, 8], help="Requests/seg ofrecidos")
+    parser.add_argument("--duration", type=float, default=20.0, help="Segundos por tasa")
+    parser.add_argument("--cooldown", type=float, default=2.0)
+    parser.add_argument("--pattern", choices=("poisson", "burst"), default="poisson")
+    parser.add_argument("--burst-size", type=int, default=10)
+    parser.add_argument("--history-ratio", type=float, default=0.2, help="Fracción de lecturas de historial")
+    parser.add_argument("--corpus-size", type=int, default=60)
+    parser.add_argument("--scan-ratio", type=float, default=0.3)
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0)
+    parser.add_argument("--max-connections", type=int, default=1000)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--slo-ms", type=float, default=2000.0, help="p95 aceptable para el punto de saturación")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--server-env", action="append", default=[], help="VAR=valor para el servidor (repetible)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="-", help="Archivo JSON de salida ('-' para stdout)")
+    args = parser.parse_args()
+
+    corpus = generate_corpus(args.corpus_size, scan_ratio=args.scan_ratio, seed=args.seed)
+    extra_env = dict(item.split("=", 1) for item in args.server_env)
+
+    curves = []
+    if args.url:
+        print(f"Servidor externo {args.url}", file=sys.stderr)
+        points = asyncio.run(run_curve(args.url, corpus, args))
+        curves.append({"workers": None, "points": points, "knee_rps": _knee(points, args.slo_ms)})
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            for workers in args.workers:
+                print(f"{workers} worker(s)", file=sys.stderr)
+                with FakeServer(workers, args.port, tmp, args.llm_latency_ms, extra_env) as server:
+                    points = asyncio.run(run_curve(server.url, corpus, args))
+                curves.append({"workers": workers, "points": points, "knee_rps": _knee(points, args.slo_ms)})
+
+    result = {
+        "benchmark": "loadtest",
+        "config": {
+            k: v for k, v in vars(args).items() if k not in ("output",)
+        },
+        "corpus": corpus_summary(corpus),
+        "curves": curves,
+    }
+
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output == "-":
+        print(text)
+    else:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Utilidades comunes de los benchmarks: percentiles y memoria residente (RSS)."""
+import math
+import os
+import resource
+import sys
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Sequence
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Percentil q (0-100) con interpolación lineal sobre valores ya ordenados."""
+    if not sorted_values:
+        return math.nan
+    position = (len(sorted_values) - 1) * q / 100
+    lower = math.floor(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    weight = position - lower
+    return sorted_values[lower] * (1 - weight) + sorted_values[upper] * weight
+
+
+def summarize_ms(values_ms: Sequence[float]) -> Dict[str, float]:
+    """count, media, p50/p95/p99 y máximo (ms, redondeados a 0.01)."""
+    ordered = sorted(values_ms)
+    if not ordered:
+        return {"count": 0}
+    return {
+        "count": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered), 2),
+        "p50_ms": round(percentile(ordered, 50), 2),
+        "p95_ms": round(percentile(ordered, 95), 2),
+        "p99_ms": round(percentile(ordered, 99), 2),
+        "max_ms": round(ordered[-1], 2),
+    }
+
+
+def current_rss_mb() -> Optional[float]:
+    """RSS actual del proceso (Linux, /proc); None en otros sistemas."""
+    try:
+        with open("/proc/self/statm") as fh:
+            pages = int(fh.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+def max_rss_mb() -> float:
+    """Pico de RSS del proceso desde que arrancó (ru_maxrss)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux lo reporta en KB, macOS en bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class RssSampler:
+    """
+    Muestrea el RSS en un hilo y guarda el pico de cada fase del benchmark.
+    Sin /proc (macOS) usa ru_maxrss, que es el pico acumulado del proceso.
+    """
+
+    def __init__(self, interval_s: float = 0.01) -> None:
+        self.interval_s = interval_s
+        self.peaks: Dict[str, float] = {}
+        self._phase: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _sample(self) -> None:
+        if self._phase is None:
+            return
+        rss = current_rss_mb()
+        if rss is None:
+            rss = max_rss_mb()
+        self.peaks[self._phase] = max(self.peaks.get(self._phase, 0.0), rss)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            self._sample()
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        self._phase = name
+        self._sample()
+        try:
+            yield
+        finally:
+            self._sample()
+            self._phase = None
+
+    def as_dict(self) -> Dict[str, float]:
+        return {name: round(mb, 1) for name, mb in self.peaks.items()}
@@ -1,56 +1,315 @@
 import os
 import json
-from typing import Any, Dict, List
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Tuple
 
 import requests
 import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.util.retry import Retry
 
 # URL base del backend: en Docker es http://backend:8000
-BACKEND_BASE_URL = os.getenv("BACKEND_URL", "http://127.0.0.1:8000")
-PROCESS_URL = f"{BACKEND_BASE_URL.rstrip('/')}/documents/process"
-HISTORY_URL = f"{BACKEND_BASE_URL.rstrip('/')}/documents/history"
+BACKEND_BASE_URL = os.getenv("BACKEND_URL", "http://127.0.0.1:8000").rstrip("/")
+PROCESS_URL = f"{BACKEND_BASE_URL}/documents/process"
+HISTORY_URL = f"{BACKEND_BASE_URL}/documents/history"
+HISTORY_SUMMARY_URL = f"{BACKEND_BASE_URL}/documents/history/summary"
+DOCUMENTS_URL = f"{BACKEND_BASE_URL}/documents"
+DOCUMENTS_BY_HASH_URL = f"{BACKEND_BASE_URL}/documents/by-hash"
 
+# Timeouts (conexión, lectura) en segundos. El procesamiento incluye la llamada al LLM.
+CONNECT_TIMEOUT = float(os.getenv("BACKEND_CONNECT_TIMEOUT", "3.05"))
+PROCESS_READ_TIMEOUT = float(os.getenv("BACKEND_PROCESS_TIMEOUT", "120"))
+READ_TIMEOUT = float(os.getenv("BACKEND_READ_TIMEOUT", "30"))
 
-def call_backend(file) -> Dict[str, Any] | None:
-    """Envía el archivo al backend FastAPI y devuelve el JSON de respuesta."""
+# La UI no muestra el texto extraído: se pide la respuesta sin él
+PROCESS_EXCLUDE_FIELDS = "raw_text"
+
+# Ante un 429 (backend saturado) el envío se reintenta respetando Retry-After:
+# el documento no llegó a procesarse, así que reintentar el POST es seguro
+PROCESS_MAX_RETRIES_429 = int(os.getenv("BACKEND_PROCESS_RETRIES_429", "3"))
+MAX_RETRY_AFTER_SECONDS = 30.0
+
+# Conexiones keep-alive reutilizables hacia el backend
+POOL_MAXSIZE = int(os.getenv("BACKEND_POOL_MAXSIZE", "10"))
+
+# Cache de respuestas GET validadas con ETag: clave -> (etag, cuerpo JSON).
+# LRU acotada (la comparten todas las sesiones del proceso y los detalles incluyen raw_text)
+ETAG_CACHE_MAX_ENTRIES = int(os.getenv("ETAG_CACHE_MAX_ENTRIES", "200"))
+_ETAG_CACHE: "OrderedDict[str, Tuple[str, Any]]" = OrderedDict()
+_ETAG_CACHE_LOCK = threading.Lock()
+
+# Última latencia medida por endpoint (ms), para mostrarla en la UI
+_LAST_LATENCY_MS: Dict[str, float] = {}
+
+# Cliente HTTP compartido (se crea una vez por proceso)
+_SESSION: requests.Session | None = None
+_SESSION_LOCK = threading.Lock()
+
+# Tiempo que el historial se sirve desde la cache de Streamlit sin consultar al backend
+HISTORY_CACHE_TTL_SECONDS = int(os.getenv("HISTORY_CACHE_TTL_SECONDS", "60"))
+
+
+class BackendError(Exception):
+    """Error al consultar el backend; el mensaje se muestra tal cual en la UI."""
+
+
+def get_http_session() -> requests.Session:
+    """
+    Cliente HTTP compartido por todas las sesiones de Streamlit y por los hilos
+    de envío en paralelo. Mantiene un pool de conexiones keep-alive y reintenta solo
+    llamadas idempotentes (GET/HEAD); el POST de procesamiento nunca se reintenta.
+    """
+    global _SESSION
+    if _SESSION is not None:
+        return _SESSION
+
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            retry = Retry(
+                total=2,
+                backoff_factor=0.3,
+                status_forcelist=(502, 503, 504),
+                allowed_methods=frozenset({"GET", "HEAD"}),
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=POOL_MAXSIZE,
+                max_retries=retry,
+            )
+
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            # gzip/deflate, y brotli si está instalado
+            session.headers.update({"Accept-Encoding": ACCEPT_ENCODING})
+            _SESSION = session
+
+    return _SESSION
+
+
+def _request(name: str, method: str, url: str, read_timeout: float, **kwargs) -> requests.Response:
+    """Ejecuta la llamada con el cliente compartido y registra su latencia."""
+    start = time.perf_counter()
+    try:
+        return get_http_session().request(
+            method,
+            url,
+            timeout=(CONNECT_TIMEOUT, read_timeout),
+            **kwargs,
+        )
+    finally:
+        _LAST_LATENCY_MS[name] = (time.perf_counter() - start) * 1000
+
+
+def last_latency_ms(name: str) -> float | None:
+    """Última latencia observada (ms) para 'process', 'lookup', 'history' o 'document'."""
+    return _LAST_LATENCY_MS.get(name)
+
+
+def submit_document(filename: str, content: bytes, mime_type: str) -> Dict[str, Any]:
+    """
+    Envía un archivo al backend y devuelve el JSON de respuesta.
+    No usa st.*, por lo que puede llamarse desde hilos; los errores se lanzan como BackendError.
+    """
     files = {
-        "file": (file.name, file.getvalue(), file.type),
+        "file": (filename, content, mime_type),
     }
 
-    try:
-        response = requests.post(PROCESS_URL, files=files, timeout=60)
-    except requests.RequestException as e:
-        st.error(f"Error al conectar con el backend: {e}")
-        return None
+    for attempt in range(PROCESS_MAX_RETRIES_429 + 1):
+        try:
+            response = _request(
+                "process",
+                "POST",
+                PROCESS_URL,
+                PROCESS_READ_TIMEOUT,
+                files=files,
+                params={"exclude": PROCESS_EXCLUDE_FIELDS},
+            )
+        except requests.RequestException as e:
+            raise BackendError(f"Error al conectar con el backend: {e}") from e
 
+        if response.status_code != 429 or attempt == PROCESS_MAX_RETRIES_429:
+            break
+        time.sleep(_retry_after_seconds(response))
+
+    if response.status_code == 429:
+        raise BackendError("El backend está saturado; intente de nuevo en unos minutos.")
     if response.status_code != 200:
-        st.error(f"Error del backend ({response.status_code}): {response.text}")
-        return None
+        raise BackendError(f"Error del backend ({response.status_code}): {response.text}")
 
     try:
         return response.json()
-    except json.JSONDecodeError:
-        st.error("La respuesta del backend no es JSON válido.")
-        return None
+    except json.JSONDecodeError as e:
+        raise BackendError("La respuesta del backend no es JSON válido.") from e
 
 
-def fetch_history(limit: int = 20) -> List[Dict[str, Any]] | None:
-    """Obtiene el historial de documentos procesados desde el backend."""
+def _retry_after_seconds(response: requests.Response) -> float:
+    """Retry-After en segundos (acotado); 1 s si falta o no es numérico."""
+    try:
+        seconds = float(response.headers.get("Retry-After", "1"))
+    except ValueError:
+        seconds = 1.0
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER_SECONDS)
+
+
+def content_sha256(content: bytes) -> str:
+    """Hash del contenido con el que el backend identifica archivos ya procesados."""
+    return hashlib.sha256(content).hexdigest()
+
+
+def find_processed_document(sha256: str) -> Dict[str, Any] | None:
+    """
+    Consulta previa a la carga: si el backend ya procesó un archivo con ese hash
+    devuelve su resultado (el mismo JSON que /documents/process), si no, None.
+    Como submit_document, no usa st.* y lanza BackendError.
+    """
     try:
-        response = requests.get(HISTORY_URL, params={"limit": limit}, timeout=30)
+        response = _request("lookup", "HEAD", f"{DOCUMENTS_BY_HASH_URL}/{sha256}", READ_TIMEOUT)
     except requests.RequestException as e:
-        st.error(f"Error al conectar con el backend (historial): {e}")
+        raise BackendError(f"Error al conectar con el backend: {e}") from e
+
+    if response.status_code == 404:
         return None
+    if response.status_code != 200:
+        raise BackendError(f"Error del backend al buscar el archivo ({response.status_code}).")
+
+    document_id = response.headers.get("X-Document-Id")
+    if not document_id:
+        return None
+
+    document = _get_json_conditional(
+        "document", f"{DOCUMENTS_URL}/{document_id}", {}, "documento"
+    )
+    return document.get("payload") or None
+
+
+def _cache_key(url: str, params: Dict[str, Any]) -> str:
+    return f"{url}?{sorted(params.items())}"
+
+
+def _get_json_conditional(
+    name: str,
+    url: str,
+    params: Dict[str, Any],
+    label: str,
+    total_header: str | None = None,
+) -> Any:
+    """
+    GET con validación por ETag: envía If-None-Match con el último ETag y,
+    si el backend responde 304, reutiliza el cuerpo ya descargado.
+    Con `total_header` devuelve (cuerpo, total) leyendo ese header de la respuesta.
+    Lanza BackendError (que st.cache_data no cachea) ante cualquier fallo.
+    """
+    key = _cache_key(url, params)
+    with _ETAG_CACHE_LOCK:
+        cached = _ETAG_CACHE.get(key)
+        if cached:
+            _ETAG_CACHE.move_to_end(key)
+    headers = {"If-None-Match": cached[0]} if cached else {}
+
+    try:
+        response = _request(name, "GET", url, READ_TIMEOUT, params=params, headers=headers)
+    except requests.RequestException as e:
+        raise BackendError(f"Error al conectar con el backend ({label}): {e}") from e
+
+    if response.status_code == 304 and cached:
+        return cached[1]
 
     if response.status_code != 200:
-        st.error(
-            f"Error del backend al obtener historial "
+        raise BackendError(
+            f"Error del backend al obtener {label} "
             f"({response.status_code}): {response.text}"
         )
+
+    try:
+        body = response.json()
+    except json.JSONDecodeError as e:
+        raise BackendError(f"La respuesta del backend ({label}) no es JSON válido.") from e
+    if total_header:
+        try:
+            body = (body, int(response.headers.get(total_header, len(body))))
+        except ValueError:
+            body = (body, len(body))
+
+    etag = response.headers.get("ETag")
+    if etag:
+        with _ETAG_CACHE_LOCK:
+            _ETAG_CACHE[key] = (etag, body)
+            _ETAG_CACHE.move_to_end(key)
+            while len(_ETAG_CACHE) > ETAG_CACHE_MAX_ENTRIES:
+                _ETAG_CACHE.popitem(last=False)
+    return body
+
+
+@st.cache_data(ttl=HISTORY_CACHE_TTL_SECONDS, show_spinner=False)
+def _get_history(limit: int) -> List[Dict[str, Any]]:
+    return _get_json_conditional("history", HISTORY_URL, {"limit": limit}, "historial")
+
+
+@st.cache_data(ttl=HISTORY_CACHE_TTL_SECONDS, show_spinner=False)
+def _get_history_summary(
+    limit: int, offset: int, doc_type: str | None
+) -> Tuple[List[Dict[str, Any]], int]:
+    params: Dict[str, Any] = {"limit": limit, "offset": offset}
+    if doc_type:
+        params["doc_type"] = doc_type
+    return _get_json_conditional(
+        "history", HISTORY_SUMMARY_URL, params, "historial", total_header="X-Total-Count"
+    )
+
+
+@st.cache_data(ttl=HISTORY_CACHE_TTL_SECONDS, max_entries=200, show_spinner=False)
+def _get_document(document_id: int) -> Dict[str, Any]:
+    # Un documento puede cambiar después de registrado (re-extracción de campos):
+    # vencido el TTL se revalida con su ETag, y si no cambió el backend responde 304
+    return _get_json_conditional(
+        "document", f"{DOCUMENTS_URL}/{document_id}", {}, "documento"
+    )
+
+
+def fetch_history(limit: int = 20) -> List[Dict[str, Any]] | None:
+    """
+    Obtiene el historial de documentos procesados desde el backend.
+    Se cachea durante HISTORY_CACHE_TTL_SECONDS (los reruns de Streamlit no
+    vuelven a consultar) y se invalida al procesar un documento nuevo.
+    """
+    try:
+        return _get_history(limit)
+    except BackendError as e:
+        st.error(str(e))
         return None
 
+
+def fetch_history_summary(
+    limit: int = 20, offset: int = 0, doc_type: str | None = None
+) -> Tuple[List[Dict[str, Any]], int] | None:
+    """
+    Una página del historial sin payload (id, archivo, tipo, calidad, fecha) y el
+    total de documentos con ese filtro. Cada página se cachea por separado.
+    """
     try:
-        return response.json()
-    except json.JSONDecodeError:
-        st.error("La respuesta del backend (historial) no es JSON válido.")
+        return _get_history_summary(limit, offset, doc_type)
+    except BackendError as e:
+        st.error(str(e))
+        return None
+
+
+def fetch_document(document_id: int) -> Dict[str, Any] | None:
+    """Detalle completo de un documento (incluye `payload`)."""
+    try:
+        return _get_document(document_id)
+    except BackendError as e:
+        st.error(str(e))
         return None
+
+
+def invalidate_history_cache() -> None:
+    """Descarta el historial y los detalles cacheados (documento nuevo o recarga manual)."""
+    _get_history.clear()
+    _get_history_summary.clear()
+    _get_document.clear()
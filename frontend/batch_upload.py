@@ -0,0 +1,104 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, List
+
+import streamlit as st
+
+from backend_client import (
+    BackendError,
+    content_sha256,
+    find_processed_document,
+    invalidate_history_cache,
+    submit_document,
+)
+from document_components import render_upload_status_grid
+
+# Número de archivos que se envían al backend al mismo tiempo
+UPLOAD_PARALLELISM = int(os.getenv("UPLOAD_PARALLELISM", "4"))
+
+# Intervalo de refresco de la grilla de estado mientras hay envíos en curso
+_POLL_SECONDS = 0.3
+
+
+def upload_key(uploaded_file) -> str:
+    """
+    Identifica un archivo cargado por el SHA-256 de su contenido, de modo que dos
+    archivos distintos con el mismo nombre no se confunden y el mismo archivo con
+    otro nombre no se vuelve a procesar. El hash se calcula una vez por carga.
+    """
+    hashes: Dict[str, str] = st.session_state.setdefault("upload_hashes", {})
+    file_id = getattr(uploaded_file, "file_id", None) or f"{uploaded_file.name}:{uploaded_file.size}"
+    if file_id not in hashes:
+        hashes[file_id] = content_sha256(uploaded_file.getvalue())
+    return hashes[file_id]
+
+
+def _process_one(entry: Dict[str, Any], content: bytes, mime_type: str) -> None:
+    # Corre en un hilo del pool: solo modifica `entry`, nunca llama a st.*
+    entry["status"] = "processing"
+    try:
+        # Si el backend ya tiene el resultado, no se sube el archivo ni se llama al LLM
+        result = find_processed_document(entry["sha256"])
+        entry["cached"] = result is not None
+        if result is None:
+            result = submit_document(entry["filename"], content, mime_type)
+        entry["result"] = result
+        entry["status"] = "done"
+    except BackendError as e:
+        entry["error"] = str(e)
+        entry["status"] = "error"
+
+
+def process_uploads(uploaded_files: List[Any], parallelism: int) -> List[Dict[str, Any]]:
+    """
+    Envía en paralelo los archivos que aún no tienen resultado en la sesión,
+    mostrando una grilla de estado que se actualiza a medida que terminan.
+    Devuelve las entradas (filename, status, result, error) de los archivos cargados.
+    """
+    entries: Dict[str, Dict[str, Any]] = st.session_state.setdefault("uploads", {})
+
+    current: List[Dict[str, Any]] = []
+    pending = []
+    for f in uploaded_files:
+        key = upload_key(f)
+        entry = entries.get(key)
+        if entry is None:
+            entry = {
+                "filename": f.name,
+                "sha256": key,
+                "status": "queued",
+                "result": None,
+                "error": None,
+                "cached": False,
+            }
+            entries[key] = entry
+            pending.append((entry, f.getvalue(), f.type))
+        if entry not in current:
+            # El mismo contenido cargado dos veces se muestra una sola vez
+            current.append(entry)
+
+    grid = st.empty()
+
+    if pending:
+        with ThreadPoolExecutor(max_workers=max(1, parallelism)) as pool:
+            futures = {pool.submit(_process_one, *args) for args in pending}
+            while futures:
+                with grid.container():
+                    render_upload_status_grid(current)
+                _, futures = wait(futures, timeout=_POLL_SECONDS, return_when=FIRST_COMPLETED)
+
+        if any(entry["status"] == "done" and not entry["cached"] for entry, _, _ in pending):
+            # Hay documentos nuevos: el historial cacheado dejó de estar vigente
+            invalidate_history_cache()
+
+    with grid.container():
+        render_upload_status_grid(current)
+
+    return current
+
+
+def retry_failed_uploads() -> None:
+    """Olvida los envíos con error para que se vuelvan a enviar en el próximo rerun."""
+    entries: Dict[str, Dict[str, Any]] = st.session_state.get("uploads", {})
+    for key in [k for k, e in entries.items() if e["status"] == "error"]:
+        del entries[key]
@@ -2,7 +2,6 @@
 
 from typing import Dict, Any, List
 
-import pandas as pd
 import streamlit as st
 
 from backend_client import fetch_history
@@ -38,6 +37,51 @@ def quality_badge(score: float) -> str:
     """
 
 
+# =========================
+#  GRILLA DE ESTADO DE CARGA
+# =========================
+
+UPLOAD_STATUS = {
+    "queued": ("En cola", "#777777"),
+    "processing": ("Procesando", "#1F6FB2"),
+    "done": ("Listo", "#0A8754"),
+    "cached": ("Ya procesado", "#0A8754"),
+    "error": ("Error", "#D64545"),
+}
+
+
+def render_upload_status_grid(entries: List[Dict[str, Any]]) -> None:
+    """Tabla con el estado de cada archivo de una carga múltiple."""
+    rows_html = ""
+    for entry in entries:
+        status = "cached" if entry["status"] == "done" and entry.get("cached") else entry["status"]
+        label, color = UPLOAD_STATUS.get(status, (status, "#777777"))
+        detail = ""
+        if entry["status"] == "done" and entry.get("result"):
+            detail = quality_badge(float(entry["result"].get("quality_score", 0.0)))
+        elif entry["status"] == "error":
+            detail = f"<span style='color:#A63A3A;'>{entry.get('error') or ''}</span>"
+
+        rows_html += f"""
+        <div class="kv-row">
+            <div class="kv-label">{entry["filename"]}</div>
+            <div class="kv-value">
+                <span style="color:{color};font-weight:600;margin-right:8px;">{label}</span>
+                {detail}
+            </div>
+        </div>
+        """
+
+    st.markdown(
+        f"""
+        <div class="kv-card">
+            {rows_html}
+        </div>
+        """,
+        unsafe_allow_html=True,
+    )
+
+
 # =========================
 #  TARJETAS KEY–VALUE
 # =========================
@@ -116,9 +160,9 @@ def render_acta_seguro_section(acta: Dict[str, Any]) -> None:
             """,
             unsafe_allow_html=True,
         )
-        df = pd.DataFrame(coberturas)
-        df = df.rename(columns={"nombre": "Cobertura", "monto": "Monto"})
-        st.table(df)
+        st.table(
+            [{"Cobertura": c.get("nombre"), "Monto": c.get("monto")} for c in coberturas]
+        )
 
 
 def render_contrato_section(contrato: Dict[str, Any]) -> None:
@@ -1,9 +1,60 @@
-from typing import Any, Dict, List, Optional
+import math
+import time
+from typing import Any, Dict, Optional
 
 import streamlit as st
 
-from backend_client import fetch_history
-from document_components import render_document_result
+from backend_client import (
+    fetch_document,
+    fetch_history_summary,
+    invalidate_history_cache,
+    last_latency_ms,
+)
+from document_components import quality_badge, render_document_result
+
+PAGE_SIZE_OPTIONS = [10, 20, 50]
+
+
+def _render_history_item(item: Dict[str, Any]) -> None:
+    """
+    Fila resumen de un documento. El detalle completo se descarga y se
+    renderiza solo cuando el usuario lo abre.
+    """
+    document_id = item.get("id")
+    filename = item.get("filename", "—")
+    doc_type = item.get("doc_type", "—")
+    quality_score = float(item.get("quality_score", 0.0))
+    created_at = item.get("created_at", "")
+    created_display = created_at.replace("T", " ")[:19] if created_at else "—"
+
+    col_info, col_toggle = st.columns([5, 1])
+    with col_info:
+        st.markdown(
+            f"""
+            <div style="font-size:13px;color:#222222;padding-top:6px;">
+                <b>{filename}</b> · {doc_type} · {created_display}
+                &nbsp;{quality_badge(quality_score)}
+            </div>
+            """,
+            unsafe_allow_html=True,
+        )
+    with col_toggle:
+        is_open = st.toggle("Ver detalle", key=f"history_open_{document_id}")
+
+    if not is_open:
+        return
+
+    detail = fetch_document(document_id)
+    if detail is None:
+        return
+
+    payload = detail.get("payload") or {}
+    if "doc_type" not in payload:
+        payload["doc_type"] = doc_type
+    if "quality_score" not in payload:
+        payload["quality_score"] = quality_score
+
+    render_document_result(payload, filename=filename)
 
 
 def render_history_view() -> None:
@@ -35,7 +86,7 @@ def render_history_view() -> None:
         "Seguro": "ACTA_SEGURO",
     }
 
-    col_filtro, _ = st.columns([2, 3])
+    col_filtro, col_refresh, _ = st.columns([2, 1, 2])
     with col_filtro:
         st.markdown('<div class="dv-filter-select">', unsafe_allow_html=True)
         seleccion = st.selectbox(
@@ -46,50 +97,83 @@ def render_history_view() -> None:
         )
         st.markdown("</div>", unsafe_allow_html=True)
 
+    with col_refresh:
+        # Alinear el botón con el selectbox (que tiene etiqueta arriba)
+        st.markdown("<div style='height:28px;'></div>", unsafe_allow_html=True)
+        if st.button("Actualizar", key="history_refresh"):
+            invalidate_history_cache()
+
     st.markdown("</div>", unsafe_allow_html=True)
 
     tipo_filtrado: Optional[str] = tipo_map[seleccion]
 
-    # ----- Obtener historial desde el backend -----
-    history = fetch_history(limit=50)
-    if history is None:
+    # ----- Paginación -----
+    # Al cambiar el filtro se vuelve a la primera página
+    if st.session_state.get("history_last_filter") != seleccion:
+        st.session_state["history_last_filter"] = seleccion
+        st.session_state["history_page"] = 1
+
+    # ----- Obtener la página pedida (el backend filtra y pagina; cada página se cachea) -----
+    page_size = st.session_state.get("history_page_size", PAGE_SIZE_OPTIONS[0])
+    page = st.session_state.get("history_page", 1)
+    result = fetch_history_summary(limit=page_size, offset=(page - 1) * page_size, doc_type=tipo_filtrado)
+    if result is None:
         return
-
-    # Filtrar por tipo (si aplica)
-    filtered_history: List[Dict[str, Any]] = []
-    for item in history:
-        doc_type = item.get("doc_type", "—")
-        if tipo_filtrado is not None and doc_type != tipo_filtrado:
-            continue
-        filtered_history.append(item)
+    page_items, total = result
+
+    total_pages = max(1, math.ceil(total / page_size))
+    if page > total_pages:
+        # El historial cambió (o el tamaño de página): se muestra la última página
+        page = total_pages
+        st.session_state["history_page"] = page
+        result = fetch_history_summary(limit=page_size, offset=(page - 1) * page_size, doc_type=tipo_filtrado)
+        if result is None:
+            return
+        page_items, total = result
+
+    latency = last_latency_ms("history")
+    if latency is not None:
+        st.caption(f"Última consulta al backend: {latency:,.0f} ms")
 
     st.markdown(
         '<div class="dv-content" style="padding-top:12px;">',
         unsafe_allow_html=True,
     )
 
-    if len(filtered_history) == 0:
+    if total == 0:
         st.info("No hay documentos en el historial para el filtro seleccionado.")
         st.markdown("</div>", unsafe_allow_html=True)
         return
 
-    # ----- Render de cada item del historial -----
-    for item in filtered_history:
-        filename = item.get("filename", "—")
-        doc_type = item.get("doc_type", "—")
-        quality_score = float(item.get("quality_score", 0.0))
-        created_at = item.get("created_at", "")
-        payload = item.get("payload") or {}
-
-        created_display = created_at.replace("T", " ")[:19] if created_at else "—"
-        header = f"{filename} · {doc_type} · {created_display}"
+    col_size, col_page, col_info = st.columns([1, 1, 3])
+    with col_size:
+        st.selectbox(
+            "Documentos por página",
+            options=PAGE_SIZE_OPTIONS,
+            index=0,
+            key="history_page_size",
+        )
+    with col_page:
+        st.number_input(
+            "Página",
+            min_value=1,
+            max_value=total_pages,
+            step=1,
+            key="history_page",
+        )
+    with col_info:
+        st.markdown(
+            f"<div style='font-size:12px;color:#555555;padding-top:34px;'>"
+            f"Página {page} de {total_pages} · {total} documentos</div>",
+            unsafe_allow_html=True,
+        )
 
-        with st.expander(header, expanded=False):
-            if "doc_type" not in payload:
-                payload["doc_type"] = doc_type
-            if "quality_score" not in payload:
-                payload["quality_score"] = quality_score
+    # ----- Render de los items de la página -----
+    render_start = time.perf_counter()
+    for item in page_items:
+        _render_history_item(item)
+    render_ms = (time.perf_counter() - render_start) * 1000
 
-            render_document_result(payload, filename=filename)
+    st.caption(f"Render de la página: {render_ms:,.0f} ms ({len(page_items)} documentos)")
 
     st.markdown("</div>", unsafe_allow_html=True)
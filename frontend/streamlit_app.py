@@ -1,18 +1,14 @@
-import os
 from typing import Any, Dict
 
 import streamlit as st
 
-from backend_client import call_backend
+from backend_client import last_latency_ms, POOL_MAXSIZE
+from batch_upload import UPLOAD_PARALLELISM, process_uploads, retry_failed_uploads
 from document_components import render_document_result
 from history_view import render_history_view
 from header import render_header
 from styles import inject_global_css
 
-# URL base del backend: en Docker es http://backend:8000
-BACKEND_BASE_URL = os.getenv("BACKEND_URL", "http://127.0.0.1:8000")
-PROCESS_URL = f"{BACKEND_BASE_URL.rstrip('/')}/documents/process"
-
 
 def get_current_view() -> str:
     """
@@ -77,10 +73,10 @@ def main() -> None:
                 '<div class="dv-uploader-title">Carga de documentos</div>',
                 unsafe_allow_html=True,
             )
-            uploaded_file = st.file_uploader(
-                "Seleccione un archivo en formato PDF o imagen",
+            uploaded_files = st.file_uploader(
+                "Seleccione uno o varios archivos en formato PDF o imagen",
                 type=["pdf", "png", "jpg", "jpeg"],
-                accept_multiple_files=False,
+                accept_multiple_files=True,
                 label_visibility="collapsed",
             )
 
@@ -95,26 +91,48 @@ def main() -> None:
                 unsafe_allow_html=True,
             )
 
+            parallelism = st.number_input(
+                "Archivos procesados en paralelo",
+                min_value=1,
+                max_value=POOL_MAXSIZE,
+                value=min(UPLOAD_PARALLELISM, POOL_MAXSIZE),
+                key="upload_parallelism",
+            )
+
         result_to_show: Dict[str, Any] | None = None
         filename_to_show: str | None = None
 
-        if uploaded_file is not None:
-            # Si es el mismo archivo, usamos el resultado cacheado
-            if (
-                st.session_state.get("last_filename") == uploaded_file.name
-                and st.session_state.get("last_result") is not None
-            ):
-                result_to_show = st.session_state["last_result"]
-                filename_to_show = st.session_state["last_filename"]
-            else:
-                with st.spinner(f"Procesando {uploaded_file.name}..."):
-                    result = call_backend(uploaded_file)
-
-                if result:
-                    st.session_state["last_result"] = result
-                    st.session_state["last_filename"] = uploaded_file.name
-                    result_to_show = result
-                    filename_to_show = uploaded_file.name
+        if uploaded_files:
+            # Solo se envían los archivos que aún no tienen resultado en la sesión
+            with st.container():
+                st.markdown('<div class="dv-content">', unsafe_allow_html=True)
+                entries = process_uploads(uploaded_files, int(parallelism))
+
+                latency = last_latency_ms("process")
+                if latency is not None:
+                    st.caption(f"Tiempo de respuesta del backend (último envío): {latency:,.0f} ms")
+
+                if any(e["status"] == "error" for e in entries):
+                    if st.button("Reintentar archivos con error", key="upload_retry"):
+                        retry_failed_uploads()
+                        st.rerun()
+
+                finished = [e for e in entries if e["status"] == "done"]
+                if finished:
+                    names = [e["filename"] for e in finished]
+                    selected = st.selectbox(
+                        "Ver resultado de",
+                        options=range(len(finished)),
+                        format_func=lambda i: names[i],
+                        index=len(finished) - 1,
+                        key="upload_selected",
+                    )
+                    entry = finished[selected]
+                    st.session_state["last_result"] = entry["result"]
+                    st.session_state["last_filename"] = entry["filename"]
+                    result_to_show = entry["result"]
+                    filename_to_show = entry["filename"]
+                st.markdown("</div>", unsafe_allow_html=True)
         else:
             # Si no hay archivo cargado pero ya hubo uno antes, lo mostramos
             if st.session_state.get("last_result") is not None: